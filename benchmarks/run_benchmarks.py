@@ -0,0 +1,512 @@
+#!/usr/bin/env python
+"""
+Benchmark suite of conflex. Start with --help to see help.
+
+Benchmarks run on synthetic configurations (wide, deep, many layers, large environments, large YAML files) and
+report the time per call, the peak memory and the memory retained by the result of each operation as JSON:
+$ python benchmarks/run_benchmarks.py run --output baseline.json
+
+The compare command runs the benchmarks again, or reads them from a file, and flags the regressions against
+a saved baseline. It exits with a non-zero status if a benchmark regressed:
+$ python benchmarks/run_benchmarks.py compare baseline.json
+"""
+
+import argparse
+import atexit
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import yaml
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")))
+
+from conflex import __version__  # noqa: E402
+from conflex.backends.env import EnvConfigLoader  # noqa: E402
+from conflex.backends.yaml import BaseSafeLoader, YamlConfigLoader  # noqa: E402
+from conflex.config_dict import ConfigDict, merge_layers  # noqa: E402
+from conflex.config_loader import ConfigLoader  # noqa: E402
+from conflex.config_store import ConfigStore  # noqa: E402
+from conflex.path_trie import PathTrie  # noqa: E402
+from conflex.type_inference import TypeInferenceEngine  # noqa: E402
+
+FORMAT_VERSION = 1
+ENV_PREFIX = "CONFLEX_BENCHMARK__"
+
+# A benchmark takes the scale of the synthetic configurations and returns the function to time.
+# The setup of the benchmark (generating the configurations, warming up caches...) is not timed.
+Benchmark = Callable[[float], Callable[[], Any]]
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    """
+    Registers a benchmark.
+    """
+
+    def register(func: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+class DictConfigLoader(ConfigLoader):
+    def __init__(self, config: dict):
+        self.config = config
+
+    def load(self) -> ConfigDict:
+        return merge_layers((self.config,), dict_type=ConfigDict)
+
+
+def scaled(size: int, scale: float) -> int:
+    return max(1, int(size * scale))
+
+
+def leaf_value(rng: random.Random) -> Any:
+    return rng.choice([rng.randint(0, 10**6), rng.random(), rng.choice([True, False]), f"value-{rng.random()}"])
+
+
+def wide_config(n_sections: int, n_keys: int, seed: int = 0) -> dict:
+    """
+    Generates a configuration with many sections of many keys.
+    """
+    rng = random.Random(seed)
+    return {f"section_{i}": {f"KEY_{j}": leaf_value(rng) for j in range(n_keys)} for i in range(n_sections)}
+
+
+def deep_config(depth: int, fanout: int, seed: int = 0) -> dict:
+    """
+    Generates a configuration of `fanout ** depth` leaves.
+    """
+    rng = random.Random(seed)
+
+    def generate(level: int) -> dict:
+        if level == depth:
+            return {f"KEY_{i}": leaf_value(rng) for i in range(fanout)}
+        return {f"node_{i}": generate(level + 1) for i in range(fanout)}
+
+    return generate(1)
+
+
+def override_layers(base_config: dict, n_layers: int, override_ratio: float, seed: int = 0) -> List[dict]:
+    """
+    Generates layers that each override a random subset of the leaves of a two-level configuration.
+    """
+    rng = random.Random(seed)
+    layers = [base_config]
+    for _ in range(n_layers - 1):
+        layer: Dict[str, dict] = {}
+        for section, values in base_config.items():
+            for key in values:
+                if rng.random() < override_ratio:
+                    layer.setdefault(section, {})[key] = leaf_value(rng)
+        layers.append(layer)
+    return layers
+
+
+def services_config(n_services: int, seed: int = 0) -> dict:
+    """
+    Generates a configuration of services with the same structure and mostly the same values, like the
+    configurations of large deployments.
+    """
+    rng = random.Random(seed)
+    return {
+        f"service_{i}": {
+            "db": {"HOST": f"db-{i % 4}.internal", "PORT": 5432, "POOL_SIZE": 10, "TIMEOUT": 30.0},
+            "retry": {"MAX_ATTEMPTS": 3, "BACKOFF": 0.5, "STATUSES": [502, 503, 504]},
+            "features": {f"FLAG_{j}": rng.random() < 0.1 for j in range(20)},
+            "REPLICAS": rng.choice([1, 2, 3]),
+        }
+        for i in range(n_services)
+    }
+
+
+def loaded_store(layers: Iterable[dict]) -> ConfigStore:
+    config_store = ConfigStore()
+    for i, layer in enumerate(layers):
+        config_store.add(f"layer_{i}", DictConfigLoader(layer))
+    config_store._load_all_configs()
+    return config_store
+
+
+def temporary_directory() -> str:
+    tmp_dir = tempfile.mkdtemp(prefix="conflex-benchmark-")
+    atexit.register(shutil.rmtree, tmp_dir, ignore_errors=True)
+    return tmp_dir
+
+
+def write_yaml_file(config: dict) -> str:
+    fd, file_path = tempfile.mkstemp(dir=temporary_directory(), suffix=".yaml")
+    with os.fdopen(fd, "w") as f:
+        yaml.dump(config, f, Dumper=yaml.SafeDumper)
+    return file_path
+
+
+@benchmark("yaml.load.large")
+def bench_yaml_load(scale: float) -> Callable[[], Any]:
+    file_path = write_yaml_file(wide_config(scaled(200, scale), 50))
+    return YamlConfigLoader(file_path).load
+
+
+@benchmark("yaml.load.cached")
+def bench_yaml_load_cached(scale: float) -> Callable[[], Any]:
+    file_path = write_yaml_file(wide_config(scaled(200, scale), 50))
+    loader = YamlConfigLoader(file_path, cache_dir=temporary_directory())
+    loader.load()
+    return loader.load
+
+
+@benchmark("yaml.load.lazy")
+def bench_yaml_load_lazy(scale: float) -> Callable[[], Any]:
+    n_sections = scaled(200, scale)
+    file_path = write_yaml_file(wide_config(n_sections, 50))
+    loader = YamlConfigLoader(file_path, lazy=True)
+    section = f"section_{n_sections // 2}"
+
+    def load() -> Any:
+        config = loader.load()
+        config[section]
+        return config
+
+    return load
+
+
+@benchmark("env.load.large")
+def bench_env_load(scale: float) -> Callable[[], Any]:
+    rng = random.Random(0)
+    for i in range(scaled(5000, scale)):
+        os.environ[f"{ENV_PREFIX}SECTION_{i % 100}__KEY_{i}"] = str(leaf_value(rng))
+    # Warm up the environment index, which is shared by all the loaders
+    EnvConfigLoader(ENV_PREFIX, separator="__").load()
+    return lambda: EnvConfigLoader(ENV_PREFIX, separator="__").load()
+
+
+@benchmark("env.load.unchanged")
+def bench_env_load_unchanged(scale: float) -> Callable[[], Any]:
+    bench_env_load(scale)
+    loader = EnvConfigLoader(ENV_PREFIX, separator="__")
+    loader.load()
+    return loader.load
+
+
+@benchmark("cast.strings")
+def bench_cast_strings(scale: float) -> Callable[[], Any]:
+    rng = random.Random(0)
+    values = [str(leaf_value(rng)) for _ in range(scaled(10000, scale))]
+
+    def cast() -> None:
+        convert = TypeInferenceEngine().convert
+        for value in values:
+            convert(value)
+
+    return cast
+
+
+@benchmark("merge.wide")
+def bench_merge_wide(scale: float) -> Callable[[], Any]:
+    config = wide_config(scaled(1000, scale), 20)
+    return loaded_store(override_layers(config, 3, 0.1))._merge_configs
+
+
+@benchmark("merge.deep")
+def bench_merge_deep(scale: float) -> Callable[[], Any]:
+    depth = max(2, 12 + round(math.log2(scale)))
+    layers = [deep_config(depth, 2, seed=0), deep_config(depth, 2, seed=1), deep_config(depth, 2, seed=2)]
+    return loaded_store(layers)._merge_configs
+
+
+@benchmark("merge.many_layers")
+def bench_merge_many_layers(scale: float) -> Callable[[], Any]:
+    config = wide_config(scaled(100, scale), 20)
+    return loaded_store(override_layers(config, 50, 0.05))._merge_configs
+
+
+def bench_store_memory(scale: float, compact: bool) -> Callable[[], Any]:
+    base_config = services_config(scaled(1000, scale))
+    env_config = {f"service_{i}": {"db": {"HOST": f"db-{i % 4}.prod.internal"}} for i in range(scaled(1000, scale))}
+
+    def load() -> ConfigStore:
+        config_store = ConfigStore(compact=compact)
+        config_store.add("base", DictConfigLoader(base_config))
+        config_store.add("env", DictConfigLoader(env_config))
+        config_store.service_0
+        return config_store
+
+    return load
+
+
+@benchmark("store.memory.default")
+def bench_store_memory_default(scale: float) -> Callable[[], Any]:
+    return bench_store_memory(scale, compact=False)
+
+
+@benchmark("store.memory.compact")
+def bench_store_memory_compact(scale: float) -> Callable[[], Any]:
+    return bench_store_memory(scale, compact=True)
+
+
+@benchmark("store.derive")
+def bench_store_derive(scale: float) -> Callable[[], Any]:
+    config_store = ConfigStore()
+    config_store.add("base", DictConfigLoader(services_config(scaled(1000, scale))))
+    config_store.service_0
+    tenant_config = {"service_0": {"db": {"HOST": "tenant.internal"}}, "service_1": {"features": {"FLAG_0": False}}}
+
+    def derive() -> ConfigStore:
+        tenant_store = config_store.derive("tenant", DictConfigLoader(tenant_config), follow=False)
+        tenant_store.get("service_0.db.HOST")
+        return tenant_store
+
+    return derive
+
+
+@benchmark("lookup.attribute")
+def bench_lookup_attribute(scale: float) -> Callable[[], Any]:
+    config_store = loaded_store(override_layers(wide_config(100, 20), 3, 0.1))
+    config_store.section_0
+
+    def lookup() -> None:
+        for _ in range(1000):
+            config_store.section_42.KEY_7
+
+    return lookup
+
+
+@benchmark("lookup.path")
+def bench_lookup_path(scale: float) -> Callable[[], Any]:
+    config_store = loaded_store(override_layers(wide_config(100, 20), 3, 0.1))
+    config_store.section_0
+
+    def lookup() -> None:
+        for _ in range(1000):
+            config_store.get("section_42.KEY_7")
+
+    return lookup
+
+
+@benchmark("lookup.handle")
+def bench_lookup_handle(scale: float) -> Callable[[], Any]:
+    config_store = loaded_store(override_layers(wide_config(100, 20), 3, 0.1))
+    handle = config_store.bind("section_42.KEY_7")
+
+    def lookup() -> None:
+        for _ in range(1000):
+            handle.value
+
+    return lookup
+
+
+@benchmark("store.reload.handles")
+def bench_store_reload_handles(scale: float) -> Callable[[], Any]:
+    n_services = scaled(1000, scale)
+    env_loader = DictConfigLoader({"service_0": {"db": {"HOST": "remote"}}})
+    config_store = ConfigStore()
+    config_store.add("base", DictConfigLoader(services_config(n_services)))
+    config_store.add("env", env_loader)
+    handles = [config_store.bind(f"service_{i}.db.HOST") for i in range(n_services)]
+    hosts = iter(range(10**9))
+
+    def reload() -> List[Any]:
+        env_loader.config = {"service_0": {"db": {"HOST": f"remote-{next(hosts)}"}}}
+        config_store.reload(["env"])
+        return handles
+
+    return reload
+
+
+@benchmark("lookup.select")
+def bench_lookup_select(scale: float) -> Callable[[], Any]:
+    config = loaded_store(override_layers(wide_config(scaled(1000, scale), 20), 3, 0.1))._merge_configs()
+    path_trie = PathTrie(config, cache_size=0)
+
+    def select() -> None:
+        path_trie.select("section_*.KEY_7")
+        path_trie.select("**.KEY_7")
+
+    return select
+
+
+def time_benchmark(func: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, Any]:
+    """
+    Times a function and measures its memory usage.
+
+    :param func: Function to time.
+    :param repeat: Number of timing samples.
+    :param min_time: Minimum duration of each sample, in seconds. Fast functions are called several times per sample.
+    :return: The results of the benchmark. Times are in seconds per call, memory is in bytes. The retained memory is
+             the memory still allocated after the call while its result is alive, ex: a loaded config store.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+
+    tracemalloc.start()
+    try:
+        result = func()
+        retained_memory, peak_memory = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "number": number,
+        "repeat": repeat,
+        "peak_memory": peak_memory,
+        "retained_memory": retained_memory,
+    }
+
+
+def run_benchmarks(names: List[str], scale: float, repeat: int, min_time: float) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        results[name] = time_benchmark(BENCHMARKS[name](scale), repeat=repeat, min_time=min_time)
+        print(f"{name}: {format_time(results[name]['min'])} per call", file=sys.stderr)
+
+    return {
+        "format_version": FORMAT_VERSION,
+        "metadata": {
+            "conflex_version": __version__,
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "libyaml": BaseSafeLoader is getattr(yaml, "CSafeLoader", None),
+            "scale": scale,
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        },
+        "benchmarks": results,
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Any], results: Dict[str, Any], time_threshold: float, memory_threshold: float
+) -> List[str]:
+    """
+    Compares benchmark results with a baseline.
+
+    :param baseline: Baseline results.
+    :param results: New results.
+    :param time_threshold: Relative increase of the minimum time per call above which a benchmark regressed.
+    :param memory_threshold: Relative increase of the peak memory above which a benchmark regressed.
+    :return: The names of the benchmarks that regressed.
+    """
+    regressions = []
+    print(f"{'benchmark':<24}{'baseline':>12}{'current':>12}{'change':>10}{'memory':>10}")
+    for name, result in results["benchmarks"].items():
+        baseline_result = baseline["benchmarks"].get(name)
+        if baseline_result is None:
+            print(f"{name:<24}{'-':>12}{format_time(result['min']):>12}")
+            continue
+
+        time_change = result["min"] / baseline_result["min"] - 1
+        memory_change = result["peak_memory"] / max(baseline_result["peak_memory"], 1) - 1
+        regressed = time_change > time_threshold or memory_change > memory_threshold
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<24}{format_time(baseline_result['min']):>12}{format_time(result['min']):>12}"
+            f"{time_change:>+10.1%}{memory_change:>+10.1%}{'  REGRESSION' if regressed else ''}"
+        )
+
+    return regressions
+
+
+def format_time(seconds: float) -> str:
+    for unit, factor in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return f"{seconds / factor:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def load_results(file_path: str) -> Dict[str, Any]:
+    with open(file_path) as f:
+        results = json.load(f)
+    if results.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"'{file_path}' is not a benchmark result file of version {FORMAT_VERSION}.")
+    return results
+
+
+def get_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Return a namespace with all the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark suite of conflex.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and output the results as JSON.")
+    compare_parser = subparsers.add_parser("compare", help="Compare benchmark results with a baseline.")
+    compare_parser.add_argument("baseline", help="Baseline results, as output by the run command.")
+    compare_parser.add_argument(
+        "results", nargs="?", help="Results to compare. The benchmarks are run again if not given."
+    )
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative increase of the time per call above which a benchmark regressed. Defaults to 0.1.",
+    )
+    compare_parser.add_argument(
+        "--memory-threshold",
+        type=float,
+        default=0.1,
+        help="Relative increase of the peak memory above which a benchmark regressed. Defaults to 0.1.",
+    )
+
+    for subparser in (run_parser, compare_parser):
+        subparser.add_argument("--output", "-o", help="File where the results are written. Defaults to stdout.")
+        subparser.add_argument("--filter", "-k", help="Only run the benchmarks whose name matches this regex.")
+        subparser.add_argument("--scale", type=float, default=1.0, help="Scale of the synthetic configurations.")
+        subparser.add_argument("--repeat", type=int, default=5, help="Number of timing samples per benchmark.")
+        subparser.add_argument(
+            "--min-time", type=float, default=0.05, help="Minimum duration of each timing sample, in seconds."
+        )
+
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parsed_args = get_args(args)
+    names = [name for name in BENCHMARKS if parsed_args.filter is None or re.search(parsed_args.filter, name)]
+
+    if parsed_args.command == "compare" and parsed_args.results is not None:
+        results = load_results(parsed_args.results)
+    else:
+        results = run_benchmarks(
+            names, scale=parsed_args.scale, repeat=parsed_args.repeat, min_time=parsed_args.min_time
+        )
+        if parsed_args.output is not None:
+            with open(parsed_args.output, "w") as f:
+                json.dump(results, f, indent=2)
+        elif parsed_args.command == "run":
+            json.dump(results, sys.stdout, indent=2)
+            print()
+
+    if parsed_args.command == "compare":
+        baseline = load_results(parsed_args.baseline)
+        if baseline["metadata"]["scale"] != results["metadata"]["scale"]:
+            print("Warning: the baseline was run with a different scale.", file=sys.stderr)
+        regressions = compare_results(baseline, results, parsed_args.threshold, parsed_args.memory_threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
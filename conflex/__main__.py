@@ -0,0 +1,5 @@
+import sys
+
+from conflex.cli import main
+
+sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Configuration loaders for the supported configuration formats.
+"""
+
+import os
+from typing import Any, Callable, Dict
+
+from conflex.backends.env import EnvConfigLoader
+from conflex.backends.http import HttpConfigLoader
+from conflex.backends.json import JsonConfigLoader
+from conflex.backends.toml import TomlConfigLoader
+from conflex.backends.yaml import YamlConfigLoader
+from conflex.config_loader import ConfigLoader
+from conflex.exc import ConfigLoaderException
+
+# Loader classes (or factories) of configuration files, by file extension
+FILE_LOADERS: Dict[str, Callable[..., ConfigLoader]] = {
+    ".json": JsonConfigLoader,
+    ".toml": TomlConfigLoader,
+    ".yaml": YamlConfigLoader,
+    ".yml": YamlConfigLoader,
+}
+
+
+def register_file_loader(extension: str, loader_factory: Callable[..., ConfigLoader]) -> None:
+    """
+    Registers the loader of the configuration files with a given extension, see `load_file`.
+
+    :param extension: File extension, including the dot, ex: ".ini".
+    :param loader_factory: Loader class, or function that takes the file path and keyword arguments and returns
+                           a loader.
+    """
+    FILE_LOADERS[extension.lower()] = loader_factory
+
+
+def load_file(config_file_path: str, **kwargs: Any) -> ConfigLoader:
+    """
+    Creates the loader of a configuration file, depending on the extension of the file:
+    >>> config_store.add("base", load_file("config.json"))
+
+    :param config_file_path: Path to the configuration file.
+    :param kwargs: Additional arguments of the loader, ex: `help_msg`.
+    :return: The configuration loader.
+    :raise: A ConfigLoaderException if no loader is registered for the extension of the file.
+    """
+    extension = os.path.splitext(config_file_path)[1].lower()
+    loader_factory = FILE_LOADERS.get(extension)
+    if loader_factory is None:
+        raise ConfigLoaderException(
+            f"'{config_file_path}': unsupported configuration file extension '{extension}'. "
+            f"Supported extensions: {', '.join(sorted(FILE_LOADERS))}."
+        )
+
+    return loader_factory(config_file_path, **kwargs)
+
+
+__all__ = [
+    "EnvConfigLoader",
+    "FILE_LOADERS",
+    "HttpConfigLoader",
+    "JsonConfigLoader",
+    "TomlConfigLoader",
+    "YamlConfigLoader",
+    "load_file",
+    "register_file_loader",
+]
@@ -1,8 +1,85 @@
+import bisect
 import os
-from typing import Callable, Optional
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 
+from conflex.cache import content_digest
 from conflex.config_dict import ConfigDict
 from conflex.config_loader import ConfigLoader
+from conflex.type_inference import TypeInferenceEngine
+
+
+class EnvironmentIndex:
+    """
+    Index of the environment variables, shared by all the environment configuration loaders.
+
+    The names of the variables are sorted, so the variables that start with a given prefix form a contiguous range
+    that is found by binary search. The variables of a prefix are still returned in the order of the environment, so
+    that the last of several variables that map to the same key wins, as when scanning the environment.
+
+    The index is only rebuilt when the environment changes, which is detected by comparing the environment with a
+    copy of it at each call. This comparison costs time proportional to the size of the environment, but runs at C
+    speed on the encoded variables that `os.environ` keeps in its `_data` dict (tens of microseconds for thousands
+    of variables, against milliseconds through the `os.environ` mapping). Other environments are compared as mappings.
+    """
+
+    def __init__(self, environ: Mapping[str, str] = os.environ):
+        """
+        :param environ: Environment to index.
+        """
+        self._environ = environ
+        # os.environ stores the encoded variables in a private dict, which is faster to compare than os.environ
+        self._raw_environ = getattr(environ, "_data", environ)
+        self._lock = threading.Lock()
+        self._snapshot: Optional[dict] = None
+        # Variables in the order of the environment, and their positions sorted by variable name
+        self._variables: List[Tuple[str, str]] = []
+        self._positions: List[int] = []
+        self._names: List[str] = []
+        self._variables_by_prefix: Dict[str, List[Tuple[str, str]]] = {}
+        self.version = 0
+
+    def _refresh(self) -> None:
+        """
+        Rebuilds the index if the environment changed since the last call. Must be called with the lock held.
+        """
+        if self._raw_environ == self._snapshot:
+            return
+
+        self._snapshot = dict(self._raw_environ)
+        self._variables = list(self._environ.items())
+        self._positions = sorted(range(len(self._variables)), key=lambda position: self._variables[position][0])
+        self._names = [self._variables[position][0] for position in self._positions]
+        self._variables_by_prefix = {}
+        self.version += 1
+
+    def variables(self, prefix: str) -> Tuple[int, List[Tuple[str, str]]]:
+        """
+        Returns the environment variables whose name starts with a prefix.
+
+        :param prefix: Prefix of the variable names.
+        :return: The version of the index, which changes whenever the environment changes, and the list of
+                 (name, value) tuples of the variables, in the order of the environment.
+        """
+        with self._lock:
+            self._refresh()
+            variables = self._variables_by_prefix.get(prefix)
+            if variables is None:
+                start = bisect.bisect_left(self._names, prefix)
+                end = start
+                while end < len(self._names) and self._names[end].startswith(prefix):
+                    end += 1
+                variables = [self._variables[position] for position in sorted(self._positions[start:end])]
+                self._variables_by_prefix[prefix] = variables
+
+            return self.version, variables
+
+
+ENVIRONMENT_INDEX = EnvironmentIndex()
+
+# Maximum number of formatted path parts and keys cached by each loader
+FORMATTER_CACHE_SIZE = 1024
 
 
 class EnvConfigLoader(ConfigLoader):
@@ -17,6 +94,7 @@ class EnvConfigLoader(ConfigLoader):
         cast_values: bool = True,
         path_formatter: Callable[[str], str] = lambda s: s.lower(),
         key_formatter: Callable[[str], str] = lambda s: s.upper(),
+        type_inference: Optional[TypeInferenceEngine] = None,
     ):
         """
         Instantiates the environment configuration loader.
@@ -26,18 +104,25 @@ class EnvConfigLoader(ConfigLoader):
         :param separator: Optional separator. If specified, the loader will split variables names with this separator
                           and create a hierarchy. See the documentation of `load` for more information.
         :param cast_values: Whether the loader should attempt to cast values to the appropriate types. For example,
-                            cast 1 to int or "false" to the False boolean value. The only supported conversion types
-                            are boolean, floating-point numbers and integers.
+                            cast 1 to int or "false" to the False boolean value. By default, the only supported
+                            conversion types are boolean, integers and floating-point numbers.
         :param path_formatter: Formatting function to apply to "path" parts of the environment variable names.
                                The default is to set them to lowercase.
         :param key_formatter: Formatting function to apply to "path" parts of the environment variable names.
                               The default is to set them to uppercase.
+        :param type_inference: Type inference engine used to cast values if `cast_values` is set. Defaults to the
+                               default engine, see `conflex.type_inference` to support other types.
         """
         self.prefix = prefix
         self.separator = separator
         self.cast_values = cast_values
         self.path_formatter = path_formatter
         self.key_formatter = key_formatter
+        self.type_inference = type_inference
+        self._format_path = lru_cache(maxsize=FORMATTER_CACHE_SIZE)(path_formatter)
+        self._format_key = lru_cache(maxsize=FORMATTER_CACHE_SIZE)(key_formatter)
+        # Version of the environment index and configuration loaded from this version
+        self._cached_config: Optional[Tuple[int, ConfigDict]] = None
 
     def load(self) -> ConfigDict:
         """
@@ -54,29 +139,46 @@ class EnvConfigLoader(ConfigLoader):
         The conversion to upper/lower case can be controlled with the `path_formatter`/`key_formatter` arguments of
         the constructor.
 
+        The environment variables are looked up in an index shared by all the environment loaders. If the environment
+        did not change since the previous call, the same ConfigDict object is returned, so it must not be modified.
+
         :return: The environment configuration as a ConfigDict object.
         """
+        version, variables = ENVIRONMENT_INDEX.variables(self.prefix)
+        cached_config = self._cached_config
+        if cached_config is not None and cached_config[0] == version:
+            return cached_config[1]
+
         config_dict = ConfigDict()
+        prefix_length = len(self.prefix)
+        format_path, format_key = self._format_path, self._format_key
 
-        for k, v in os.environ.items():
-            if k.startswith(self.prefix):
-                k = k[len(self.prefix) :]
-                paths = k.split(self.separator) if self.separator else [k]
+        for k, v in variables:
+            k = k[prefix_length:]
+            paths = k.split(self.separator) if self.separator else [k]
 
-                d = config_dict
-                for path in paths[:-1]:
-                    formatted_path = self.path_formatter(path)
-                    if formatted_path not in d:
-                        d[formatted_path] = ConfigDict()
-                    d = d[formatted_path]
+            d = config_dict
+            for path in paths[:-1]:
+                formatted_path = format_path(path)
+                if formatted_path not in d:
+                    d[formatted_path] = ConfigDict()
+                d = d[formatted_path]
 
-                config_name = self.key_formatter(paths[-1])
-                d[config_name] = v
+            config_name = format_key(paths[-1])
+            d[config_name] = v
 
         if self.cast_values:
-            config_dict.cast_values()
+            config_dict.cast_values(self.type_inference)
 
+        self._cached_config = (version, config_dict)
         return config_dict
 
+    def fingerprint(self) -> Optional[str]:
+        """
+        Returns the digest of the environment variables of the loader, see `ConfigLoader.fingerprint`.
+        """
+        _, variables = ENVIRONMENT_INDEX.variables(self.prefix)
+        return content_digest(repr(variables).encode())
+
     def __repr__(self):
         return f"Environment config loader - prefix: '{self.prefix}' / separator '{self.separator}'"
@@ -0,0 +1,349 @@
+"""
+Loader of configurations served over HTTP, ex: by a configuration service.
+"""
+
+import http.client
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from conflex.backends.json import parse_json
+from conflex.backends.toml import parse_toml
+from conflex.backends.yaml import parse_yaml
+from conflex.config_dict import ConfigDict
+from conflex.config_loader import ConfigLoader
+from conflex.exc import ConfigLoaderException
+
+LOGGER = logging.getLogger(__name__)
+
+# Parsers of the supported formats, by name. The format of a response is deduced from its Content-Type header if
+# the loader does not specify one.
+PARSERS: Dict[str, Callable[[bytes], Any]] = {"json": parse_json, "toml": parse_toml, "yaml": parse_yaml}
+
+_RETRIED_STATUSES = {429, 502, 503, 504}
+
+ConnectionKey = Tuple[str, str, Optional[int]]
+
+
+class ConnectionPool:
+    """
+    Pool of persistent (keep-alive) HTTP connections, by scheme, host and port.
+
+    Connections are reused by successive requests, which saves a TCP (and TLS) handshake per request. The pool is
+    thread-safe: each connection is used by one request at a time.
+    """
+
+    def __init__(self, max_idle_connections: int = 4, timeout: float = 10.0):
+        """
+        :param max_idle_connections: Maximum number of idle connections kept open per host.
+        :param timeout: Timeout of the connections, in seconds.
+        """
+        self.max_idle_connections = max_idle_connections
+        self.timeout = timeout
+        self._idle_connections: Dict[ConnectionKey, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def request(self, url: str, headers: Mapping[str, str]) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        """
+        Sends a GET request on a pooled connection.
+
+        A request that fails on a reused connection is sent again once on a new connection, because the server may
+        have closed the idle connection in the meantime.
+
+        :param url: URL of the resource.
+        :param headers: Headers of the request.
+        :return: The status, the headers and the body of the response.
+        :raise: An OSError or an http.client.HTTPException if the request fails.
+        """
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: '{url}'.")
+        key = (parts.scheme, parts.hostname or "", parts.port)
+        target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+
+        while True:
+            connection, reused = self._acquire(key)
+            try:
+                connection.request("GET", target, headers=dict(headers))
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                if reused:
+                    continue
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection)
+            return response.status, response.headers, body
+
+    def _acquire(self, key: ConnectionKey) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle_connections = self._idle_connections.get(key)
+            if idle_connections:
+                return idle_connections.pop(), True
+
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+
+    def _release(self, key: ConnectionKey, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle_connections = self._idle_connections.setdefault(key, [])
+            if len(idle_connections) < self.max_idle_connections:
+                idle_connections.append(connection)
+                return
+        connection.close()
+
+    def close(self) -> None:
+        """
+        Closes the idle connections of the pool.
+        """
+        with self._lock:
+            connections = [connection for idle in self._idle_connections.values() for connection in idle]
+            self._idle_connections.clear()
+        for connection in connections:
+            connection.close()
+
+
+# Pool shared by the loaders that do not define their own
+DEFAULT_POOL = ConnectionPool()
+
+
+class _CacheEntry:
+    __slots__ = ("config", "etag", "last_modified", "fetched_at")
+
+    def __init__(
+        self, config: ConfigDict, etag: Optional[str], last_modified: Optional[str], fetched_at: Optional[float]
+    ):
+        self.config = config
+        self.etag = etag
+        self.last_modified = last_modified
+        # Monotonic time from which the entry is fresh for `ttl` seconds: the time of the last successful request, or
+        # of the last failed one if the server could not be reached. None if the entry was read from the fallback file
+        self.fetched_at = fetched_at
+
+
+class HttpConfigLoader(ConfigLoader):
+    """
+    HTTP configuration loader. Loads configuration from a JSON, YAML or TOML document served over HTTP(S).
+
+    * Requests are sent on pooled keep-alive connections, see `ConnectionPool`.
+    * The loaded configuration is cached for `ttl` seconds. Once expired, it is revalidated with a conditional
+      request (If-None-Match / If-Modified-Since): if the document did not change, the server answers with an empty
+      304 response and the loader returns the same ConfigDict object as before, so reloading the config store costs
+      neither parsing nor merging.
+    * For `stale_while_revalidate` seconds after its expiration, the cached configuration is returned immediately
+      while it is revalidated in a background thread.
+    * Failed requests (connection errors, 429 and 502-504 statuses) are retried up to `max_retries` times with an
+      exponential backoff. If the server cannot be reached, the last configuration is used, loaded from the
+      `fallback_path` file if needed (ex: after a restart), and the server is only contacted again once it expires,
+      `ttl` seconds later. Other error statuses, ex: 404 or 500, are raised.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        format: Optional[str] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        ttl: float = 60.0,
+        stale_while_revalidate: float = 0.0,
+        max_retries: int = 2,
+        retry_backoff: float = 0.2,
+        fallback_path: Optional[str] = None,
+        pool: Optional[ConnectionPool] = None,
+    ):
+        """
+        Instantiates the HTTP configuration loader.
+
+        :param url: URL of the configuration document.
+        :param format: Format of the document: "json", "yaml" or "toml". Defaults to the format of the Content-Type
+                       of the response, or JSON if the Content-Type is not recognized.
+        :param headers: Additional headers of the requests, ex: an Authorization header.
+        :param ttl: Duration during which the loaded configuration is used without contacting the server, in seconds.
+        :param stale_while_revalidate: Duration after the expiration of the configuration during which it is still
+                                       returned immediately while being revalidated in the background, in seconds.
+        :param max_retries: Maximum number of retries of a failed request.
+        :param retry_backoff: Delay before the first retry, in seconds. The delay doubles at each retry.
+        :param fallback_path: Optional path of a file where the last loaded configuration is saved. It is used if
+                              the server cannot be reached, and its validators are sent with the first request so
+                              that an unchanged document is not transferred again after a restart.
+        :param pool: Connection pool. Defaults to a pool shared by all the HTTP loaders.
+        """
+        if format is not None and format not in PARSERS:
+            raise ValueError(f"Unsupported format: '{format}'. Supported formats: {', '.join(sorted(PARSERS))}.")
+
+        self.url = url
+        self.format = format
+        self.headers = dict(headers or {})
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.fallback_path = fallback_path
+        self.pool = pool if pool is not None else DEFAULT_POOL
+
+        self._entry: Optional[_CacheEntry] = None
+        self._lock = threading.Lock()
+        self._revalidation: Optional[threading.Thread] = None
+
+    def load(self) -> ConfigDict:
+        """
+        Loads the configuration, from the cache if it is still fresh.
+
+        :return: The configuration as a ConfigDict object. The same object is returned as long as the document does
+                 not change.
+        :raise: A ConfigLoaderException if the server cannot be reached and no previous configuration is available,
+                if the server answers with an error status that is not retried, or if the document is invalid.
+        """
+        entry = self._entry
+        if entry is not None and entry.fetched_at is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                return entry.config
+            if age < self.ttl + self.stale_while_revalidate:
+                self._revalidate_in_background()
+                return entry.config
+
+        with self._lock:
+            return self._fetch().config
+
+    def _revalidate_in_background(self) -> None:
+        with self._lock:
+            if self._revalidation is not None and self._revalidation.is_alive():
+                return
+            self._revalidation = threading.Thread(
+                target=self._revalidate, name="conflex-http-revalidation", daemon=True
+            )
+            self._revalidation.start()
+
+    def _revalidate(self) -> None:
+        try:
+            with self._lock:
+                self._fetch()
+        except Exception:
+            LOGGER.warning("Failed to revalidate the configuration of '%s'.", self.url, exc_info=True)
+
+    def _fetch(self) -> _CacheEntry:
+        """
+        Fetches the document, or revalidates the cached one. Must be called with the loader lock held.
+        :return: The new cache entry.
+        """
+        entry = self._entry
+        if entry is None and self.fallback_path is not None:
+            entry = self._entry = self._read_fallback()
+
+        headers = dict(self.headers)
+        if entry is not None:
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        try:
+            status, response_headers, body = self._request(headers)
+        except ConfigLoaderException:
+            if entry is None:
+                raise
+            LOGGER.warning(
+                "Using the last configuration of '%s', the server cannot be reached.", self.url, exc_info=True
+            )
+            # Do not wait for the retries again at each load until the entry expires
+            entry.fetched_at = time.monotonic()
+            return entry
+
+        if status not in (200, 304):
+            raise ConfigLoaderException(f"'{self.url}': unexpected HTTP status {status}.")
+        if status == 304 and entry is not None:
+            entry.fetched_at = time.monotonic()
+            return entry
+
+        config = self._parse(body, response_headers.get("Content-Type", ""))
+        entry = _CacheEntry(
+            config, response_headers.get("ETag"), response_headers.get("Last-Modified"), time.monotonic()
+        )
+        self._entry = entry
+        if self.fallback_path is not None:
+            self._write_fallback(entry)
+        return entry
+
+    def _request(self, headers: Mapping[str, str]) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        """
+        Sends the request, with retries.
+        :return: The status, the headers and the body of the response. The status is not one of the retried statuses.
+        :raise: A ConfigLoaderException if the request fails after all the retries.
+        """
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(delay)
+                delay *= 2
+
+            try:
+                status, response_headers, body = self.pool.request(self.url, headers)
+            except (OSError, http.client.HTTPException) as e:
+                error: Exception = e
+                continue
+
+            if status not in _RETRIED_STATUSES:
+                return status, response_headers, body
+            error = ConfigLoaderException(f"'{self.url}': unexpected HTTP status {status}.")
+
+        raise ConfigLoaderException(
+            f"'{self.url}': failed to load the configuration after {self.max_retries + 1} attempts."
+        ) from error
+
+    def _parse(self, body: bytes, content_type: str) -> ConfigDict:
+        config_format = self.format
+        if config_format is None:
+            media_type = content_type.split(";")[0].strip().lower()
+            config_format = next((name for name in PARSERS if name in media_type), "json")
+
+        try:
+            config = PARSERS[config_format](body) or ConfigDict()
+        except Exception as e:
+            raise ConfigLoaderException(f"'{self.url}' is not a valid {config_format.upper()} document.") from e
+
+        if not isinstance(config, ConfigDict):
+            raise ConfigLoaderException(f"'{self.url}' does not define a mapping of configuration values.")
+        return config
+
+    def _read_fallback(self) -> Optional[_CacheEntry]:
+        try:
+            with open(self.fallback_path, "rb") as f:  # type: ignore
+                url, config, etag, last_modified = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            LOGGER.warning("Ignoring invalid fallback file '%s'.", self.fallback_path, exc_info=True)
+            return None
+
+        if url != self.url:
+            return None
+        return _CacheEntry(config, etag, last_modified, fetched_at=None)
+
+    def _write_fallback(self, entry: _CacheEntry) -> None:
+        fallback_path: str = self.fallback_path  # type: ignore
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fallback_path)), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(
+                        (self.url, entry.config, entry.etag, entry.last_modified), f, protocol=pickle.HIGHEST_PROTOCOL
+                    )
+                os.replace(tmp_path, fallback_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            LOGGER.warning("Cannot write the fallback file '%s'.", fallback_path, exc_info=True)
+
+    def __repr__(self):
+        return f"HTTP config loader - URL: '{self.url}'"
@@ -0,0 +1,64 @@
+import json
+from types import ModuleType
+from typing import Any, Optional
+
+from conflex.config_dict import ConfigDict, to_config_dict
+from conflex.config_loader import FileConfigLoader
+from conflex.exc import ConfigLoaderException
+
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:  # orjson is an optional dependency
+    orjson = None
+
+
+def parse_json(data: bytes) -> Any:
+    """
+    Parses a JSON document, with objects loaded as ConfigDict objects.
+    Uses orjson if available, and the standard library parser otherwise.
+    :param data: JSON document, as bytes.
+    :return: The parsed document.
+    :raise: A ValueError if the document is not valid JSON.
+    """
+    if orjson is not None:
+        document = orjson.loads(data)
+        return to_config_dict(document) if type(document) is dict else document
+
+    return json.loads(data, object_pairs_hook=ConfigDict)
+
+
+class JsonConfigLoader(FileConfigLoader):
+    """
+    JSON configuration loader. Loads configuration from a JSON file.
+    """
+
+    def __init__(self, config_file_path: str, help_msg: Optional[str] = None):
+        """
+        Instantiates the JSON configuration loader.
+
+        :param config_file_path: Path to the JSON file.
+        :param help_msg: Optional help message to display if the file is not found.
+        """
+        super().__init__(config_file_path, help_msg)
+
+    def load(self) -> ConfigDict:
+        """
+        Loads the configuration from the JSON file.
+
+        :return: The JSON file as a ConfigDict object.
+        :raise: A ConfigLoaderException if the file does not exist or is not a valid JSON object.
+        """
+        _, data = self._read_file()
+
+        try:
+            config = parse_json(data)
+        except ValueError as e:
+            raise ConfigLoaderException(f"'{self.config_file_path}' is not a valid JSON file.") from e
+
+        if not isinstance(config, ConfigDict):
+            raise ConfigLoaderException(f"'{self.config_file_path}' does not define a mapping of configuration values.")
+        return config
+
+    def __repr__(self):
+        return f"JSON config loader - config file: '{self.config_file_path}'"
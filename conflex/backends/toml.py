@@ -0,0 +1,59 @@
+import sys
+from typing import Any, Optional
+
+from conflex.config_dict import ConfigDict, to_config_dict
+from conflex.config_loader import FileConfigLoader
+from conflex.exc import ConfigLoaderException
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:  # pragma: no cover
+    try:
+        import tomli as tomllib
+    except ImportError:  # tomli is an optional dependency before Python 3.11
+        tomllib = None
+
+
+def parse_toml(data: bytes) -> ConfigDict:
+    """
+    Parses a TOML document, with tables loaded as ConfigDict objects.
+    :param data: TOML document, as UTF-8 encoded bytes.
+    :return: The parsed document.
+    :raise: A ValueError if the document is not valid TOML.
+    """
+    if tomllib is None:
+        raise ImportError("Parsing TOML files requires Python 3.11+ or the tomli package (pip install conflex[toml]).")
+
+    return to_config_dict(tomllib.loads(data.decode("utf-8")))
+
+
+class TomlConfigLoader(FileConfigLoader):
+    """
+    TOML configuration loader. Loads configuration from a TOML file.
+    """
+
+    def __init__(self, config_file_path: str, help_msg: Optional[str] = None):
+        """
+        Instantiates the TOML configuration loader.
+
+        :param config_file_path: Path to the TOML file.
+        :param help_msg: Optional help message to display if the file is not found.
+        """
+        super().__init__(config_file_path, help_msg)
+
+    def load(self) -> ConfigDict:
+        """
+        Loads the configuration from the TOML file.
+
+        :return: The TOML file as a ConfigDict object.
+        :raise: A ConfigLoaderException if the file does not exist or is not a valid TOML file.
+        """
+        _, data = self._read_file()
+
+        try:
+            return parse_toml(data)
+        except ValueError as e:
+            raise ConfigLoaderException(f"'{self.config_file_path}' is not a valid TOML file.") from e
+
+    def __repr__(self):
+        return f"TOML config loader - config file: '{self.config_file_path}'"
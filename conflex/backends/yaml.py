@@ -1,51 +1,403 @@
-from functools import reduce
-from typing import Optional, cast
+import mmap
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 import yaml
 
-from conflex.config_dict import ConfigDict, merge_configs
-from conflex.config_loader import ConfigLoader
+from conflex.cache import ParseCache, content_digest
+from conflex.config_dict import ConfigDict, merge_layers
+from conflex.config_loader import FileConfigLoader
 from conflex.exc import ConfigLoaderException
 
+try:
+    from yaml import CSafeLoader as BaseSafeLoader
+except ImportError:  # PyYAML was built without libyaml
+    from yaml import SafeLoader as BaseSafeLoader  # type: ignore
 
-class YamlConfigLoader(ConfigLoader):
+
+class ConfigDictSafeLoader(BaseSafeLoader):  # type: ignore
+    """
+    Safe YAML loader that builds ConfigDict objects instead of dicts.
+    Uses the libyaml parser if available.
+    """
+
+
+def _construct_config_dict(loader: ConfigDictSafeLoader, node: yaml.MappingNode):
+    config_dict = ConfigDict()
+    yield config_dict
+    config_dict.update(loader.construct_mapping(node))
+
+
+ConfigDictSafeLoader.add_constructor("tag:yaml.org,2002:map", _construct_config_dict)
+
+
+def parse_yaml(data: Any) -> Any:
+    """
+    Parses a YAML document, with mappings loaded as ConfigDict objects.
+    :param data: YAML document, as bytes or string.
+    :return: The parsed document.
+    """
+    return yaml.load(data, Loader=ConfigDictSafeLoader)
+
+
+def parse_yaml_documents(data: Any) -> List[Any]:
+    """
+    Parses all the documents of a YAML stream, with mappings loaded as ConfigDict objects.
+    :param data: YAML stream, as bytes or string.
+    :return: The parsed documents, without the empty ones.
+    """
+    return [document for document in yaml.load_all(data, Loader=ConfigDictSafeLoader) if document is not None]
+
+
+_STR_TAG = "tag:yaml.org,2002:str"
+_NULL_TAG = "tag:yaml.org,2002:null"
+_BOMS = (b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")
+
+# Spans of a top-level section in each document of a YAML stream, as (start, end) offsets
+SectionSpans = List[Tuple[int, int]]
+
+
+def _is_str_key(resolver: yaml.resolver.Resolver, event: yaml.ScalarEvent) -> bool:
+    if event.tag not in (None, "!"):
+        return event.tag == _STR_TAG
+    if not event.implicit[0]:  # Quoted scalar
+        return True
+    return resolver.resolve(yaml.ScalarNode, event.value, (True, False)) == _STR_TAG
+
+
+def _is_null(resolver: yaml.resolver.Resolver, event: yaml.Event) -> bool:
+    return (
+        isinstance(event, yaml.ScalarEvent)
+        and event.tag is None
+        and event.implicit[0]
+        and resolver.resolve(yaml.ScalarNode, event.value, (True, False)) == _NULL_TAG
+    )
+
+
+def index_yaml_sections(stream: Any) -> Optional[Dict[str, SectionSpans]]:
+    """
+    Indexes the top-level sections of the documents of a YAML stream in one pass over its events, without building
+    the values of the sections.
+
+    A section can only be parsed on its own if it is self-contained, so indexing fails if a document is not a block
+    mapping of string keys that starts at the first column, if it defines tag directives or merge keys (`<<`) at the
+    top level, or if a section refers to an anchor of another section.
+
+    :param stream: YAML stream, as bytes, string or file object.
+    :return: The spans of each top-level key and its value in each document, by key, in the order of the stream.
+             Offsets are in characters. None if the sections of the stream cannot be parsed separately.
+    :raise: A yaml.YAMLError if the stream is not valid YAML.
+    """
+    resolver = yaml.resolver.Resolver()
+    sections: Dict[str, SectionSpans] = {}
+    key: Optional[str] = None
+    start = 0
+    # Nesting depth inside the value of the current top-level key
+    depth = 0
+    in_mapping = expect_key = False
+    # Keys of the current document, duplicate keys replace the previous ones like when parsing the document
+    document_keys: set = set()
+    anchors: set = set()
+
+    for event in yaml.parse(stream, Loader=BaseSafeLoader):
+        if not in_mapping:
+            if isinstance(event, yaml.DocumentStartEvent):
+                if event.tags:
+                    return None
+            elif isinstance(event, yaml.MappingStartEvent):
+                if event.flow_style or event.anchor is not None or event.start_mark.column != 0:
+                    return None
+                in_mapping = expect_key = True
+                document_keys.clear()
+                key = None
+            elif isinstance(event, yaml.NodeEvent) and not _is_null(resolver, event):
+                return None  # Not a mapping
+            continue
+
+        if expect_key:
+            if key is not None:
+                sections[key][-1] = (start, event.start_mark.index)
+            if isinstance(event, yaml.MappingEndEvent):
+                in_mapping = False
+                continue
+            if (
+                not isinstance(event, yaml.ScalarEvent)
+                or event.anchor is not None
+                or event.start_mark.column != 0
+                or not _is_str_key(resolver, event)
+            ):
+                return None
+
+            key = event.value
+            start = event.start_mark.index
+            spans = sections.setdefault(key, [])
+            if key in document_keys:
+                spans.pop()
+            spans.append((start, start))
+            document_keys.add(key)
+            anchors.clear()
+            expect_key = False
+            continue
+
+        if isinstance(event, yaml.AliasEvent):
+            if event.anchor not in anchors:
+                return None
+        elif isinstance(event, yaml.NodeEvent) and event.anchor is not None:
+            anchors.add(event.anchor)
+
+        if isinstance(event, yaml.CollectionStartEvent):
+            depth += 1
+        elif isinstance(event, yaml.CollectionEndEvent):
+            depth -= 1
+        expect_key = depth == 0
+
+    return sections
+
+
+def _to_byte_offsets(data: Any, sections: Dict[str, SectionSpans]) -> Dict[str, SectionSpans]:
+    """
+    Converts the character offsets of the spans of the sections of a UTF-8 stream to byte offsets.
+    """
+    char_offsets = sorted({offset for spans in sections.values() for span in spans for offset in span})
+    byte_offsets = {}
+    char_position = byte_position = 0
+    for offset in char_offsets:
+        count = offset - char_position
+        chunk = data[byte_position : byte_position + count]
+        if chunk.isascii():
+            byte_position += count
+        else:
+            chunk = data[byte_position : byte_position + 4 * count]
+            byte_position += len(chunk.decode("utf-8", errors="ignore")[:count].encode("utf-8"))
+        char_position = offset
+        byte_offsets[offset] = byte_position
+
+    return {key: [(byte_offsets[start], byte_offsets[end]) for start, end in spans] for key, spans in sections.items()}
+
+
+def _merge_documents(config_file_path: str, documents: List[Any]) -> ConfigDict:
+    for document in documents:
+        if not isinstance(document, ConfigDict):
+            raise ConfigLoaderException(f"'{config_file_path}' does not define a mapping of configuration values.")
+
+    if len(documents) == 1:
+        return documents[0]
+    return merge_layers(documents, dict_type=ConfigDict)
+
+
+class LazyConfigDict(ConfigDict):
+    """
+    ConfigDict whose top-level sections are parsed from a memory-mapped YAML file the first time they are accessed,
+    see `YamlConfigLoader`.
+
+    Looking up a key only parses its section. Iterating over the dictionary, comparing it or modifying it parses all
+    the remaining sections, after which the file is unmapped.
+    """
+
+    def __init__(self, config_file_path: str, data: mmap.mmap, sections: Dict[str, SectionSpans]):
+        """
+        :param config_file_path: Path to the YAML file.
+        :param data: Memory-mapped YAML file.
+        :param sections: Byte spans of the sections of each document of the file, by key, see `index_yaml_sections`.
+        """
+        super().__init__()
+        self._config_file_path = config_file_path
+        self._data: Optional[mmap.mmap] = data
+        self._keys = list(sections)
+        self._pending = dict(sections)
+        self._lock = threading.Lock()
+
+    def _parse_section(self, key: str) -> Any:
+        data: mmap.mmap = self._data  # type: ignore
+        spans = self._pending[key]
+        # Reading beyond the end of a truncated file would crash the process
+        if data.size() < spans[-1][1]:
+            raise ConfigLoaderException(f"'{self._config_file_path}' was modified while being loaded.")
+
+        try:
+            documents = [parse_yaml(data[start:end]) for start, end in spans]
+        except yaml.YAMLError as e:
+            raise ConfigLoaderException(f"'{self._config_file_path}' is not a valid YAML file.") from e
+
+        for document in documents:
+            if not isinstance(document, ConfigDict) or list(document) != [key]:
+                raise ConfigLoaderException(f"'{self._config_file_path}' was modified while being loaded.")
+        return documents[0][key] if len(documents) == 1 else merge_layers(documents, dict_type=ConfigDict)[key]
+
+    def _load(self, key: str) -> None:
+        dict.__setitem__(self, key, self._parse_section(key))
+        del self._pending[key]
+        if not self._pending:
+            self._data.close()  # type: ignore
+            self._data = None
+
+    def __missing__(self, key: Any) -> Any:
+        with self._lock:
+            if key in self._pending:
+                self._load(key)
+            elif not dict.__contains__(self, key):
+                raise KeyError(key)
+        return dict.__getitem__(self, key)
+
+    def _load_all(self) -> None:
+        if not self._pending:
+            return
+
+        with self._lock:
+            for key in list(self._pending):
+                self._load(key)
+            # Restore the order of the keys in the file
+            items = [(key, dict.__getitem__(self, key)) for key in self._keys]
+            dict.clear(self)
+            dict.update(self, items)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key in self._pending:
+            return self[key]
+        return dict.get(self, key, default)
+
+    def __contains__(self, key: Any) -> bool:
+        return dict.__contains__(self, key) or key in self._pending
+
+    def __len__(self) -> int:
+        return dict.__len__(self) + len(self._pending)
+
+    def __eq__(self, other: Any) -> bool:
+        self._load_all()
+        if isinstance(other, LazyConfigDict):
+            other._load_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other: Any) -> bool:
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __reduce__(self):
+        return ConfigDict, (dict(self.items()),)
+
+
+def _loading_all(name: str) -> Any:
+    method = getattr(dict, name)
+
+    def wrapper(self: LazyConfigDict, *args: Any, **kwargs: Any) -> Any:
+        self._load_all()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in (
+    "__iter__",
+    "__reversed__",
+    "__repr__",
+    "__setitem__",
+    "__delitem__",
+    "__or__",
+    "__ror__",
+    "__ior__",
+    "keys",
+    "items",
+    "values",
+    "copy",
+    "pop",
+    "popitem",
+    "setdefault",
+    "update",
+    "clear",
+):
+    setattr(LazyConfigDict, _name, _loading_all(_name))
+
+
+class YamlConfigLoader(FileConfigLoader):
     """
     YAML configuration loader. Loads configuration from a YAML file.
+
+    Files made of several documents are loaded as layers: the values of the last documents take precedence.
     """
 
-    def __init__(self, config_file_path: str, help_msg: Optional[str] = None):
+    def __init__(
+        self,
+        config_file_path: str,
+        help_msg: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        lazy: bool = False,
+    ):
         """
         Instantiates the YAML configuration loader.
 
         :param config_file_path: Path to the YAML file.
         :param help_msg: Optional help message to display if the file is not found.
+        :param cache_dir: Optional directory where the parsed file is cached. If the file did not change since it
+                          was cached, the loader reads the cache instead of parsing the file. See `ParseCache`.
+        :param lazy: Whether the top-level sections of the file are only parsed when they are accessed. The file is
+                     memory-mapped and indexed in one pass over its YAML events, which is much cheaper than parsing
+                     it, see `LazyConfigDict`. Files whose sections cannot be parsed separately (ex: aliases to
+                     anchors of other sections) are parsed entirely. The file must not be modified in place while
+                     the configuration is in use: replace it instead (ex: with a rename). Cannot be combined with
+                     `cache_dir`.
         """
-        self.config_file_path = config_file_path
-        self.help_msg = help_msg
+        super().__init__(config_file_path, help_msg)
+        if lazy and cache_dir is not None:
+            raise ValueError("Lazy YAML loaders cannot use a cache directory.")
+        self.cache = ParseCache(cache_dir) if cache_dir is not None else None
+        self.lazy = lazy
 
     def load(self) -> ConfigDict:
         """
         Loads the configuration from the YAML file.
 
-        :return: The YAML file as a ConfigDict object.
+        :return: The YAML file as a ConfigDict object, or as a LazyConfigDict object if the loader is lazy.
         :raise: A ConfigLoaderException if the file does not exist.
         """
+        if self.lazy:
+            return self._load_lazy()
+
         config_file_path = self.config_file_path
+        stat, data = self._read_file()
+
+        cache = self.cache
+        if cache is None:
+            return self._parse(data)
 
+        digest = content_digest(data)
+        config = cache.get(config_file_path, stat, digest)
+        if config is None:
+            config = self._parse(data)
+            cache.put(config_file_path, stat, digest, config)
+        return config
+
+    def _parse(self, data: Any) -> ConfigDict:
         try:
-            with open(config_file_path) as f:
-                config = yaml.safe_load(f) or {}
+            documents = parse_yaml_documents(data)
+        except yaml.YAMLError as e:
+            raise ConfigLoaderException(f"'{self.config_file_path}' is not a valid YAML file.") from e
+
+        return _merge_documents(self.config_file_path, documents) if documents else ConfigDict()
 
-        except (FileNotFoundError, PermissionError) as e:
-            err_msg = f"'{config_file_path}': file not found."
-            if self.help_msg:
-                err_msg += "\n" + self.help_msg
-            raise ConfigLoaderException(err_msg) from e
+    def _load_lazy(self) -> ConfigDict:
+        with self._open_file() as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ConfigDict()
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
+        try:
+            sections = None
+            if not data[:3].startswith(_BOMS):
+                sections = index_yaml_sections(data)
         except yaml.YAMLError as e:
-            raise ConfigLoaderException(f"'{config_file_path}' is not a valid YAML file.") from e
+            data.close()
+            raise ConfigLoaderException(f"'{self.config_file_path}' is not a valid YAML file.") from e
+
+        if not sections:
+            try:
+                return self._parse(data[:]) if sections is None else ConfigDict()
+            finally:
+                data.close()
 
-        return cast(ConfigDict, reduce(merge_configs, (ConfigDict(), config)))
+        return LazyConfigDict(self.config_file_path, data, _to_byte_offsets(data, sections))
 
     def __repr__(self):
         return f"YAML config loader - config file: '{self.config_file_path}'"
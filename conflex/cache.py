@@ -0,0 +1,92 @@
+"""
+Persistent cache of parsed configuration files.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from typing import Any, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+def content_digest(data: bytes) -> str:
+    """
+    Computes the digest of the contents of a configuration file.
+    :param data: File contents.
+    :return: The hexadecimal digest of the contents.
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ParseCache:
+    """
+    Caches parsed configuration files on disk, so that unchanged files do not need to be parsed again by
+    other processes or after a restart.
+
+    Entries are keyed by the absolute path of the file and are only used if the modification time, the size and
+    the digest of the contents of the file match. Entries are serialized with pickle and written atomically,
+    so several processes can safely warm the cache at the same time.
+    As entries are unpickled, the cache directory must only be writable by trusted users.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir: str):
+        """
+        :param cache_dir: Directory where the cache entries are stored. Created on first write if needed.
+        """
+        self.cache_dir = cache_dir
+
+    def _entry_path(self, file_path: str) -> str:
+        key = hashlib.blake2b(os.path.abspath(file_path).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.pickle")
+
+    @classmethod
+    def _header(cls, file_path: str, stat: os.stat_result, digest: str) -> tuple:
+        return cls.FORMAT_VERSION, os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size, digest
+
+    def get(self, file_path: str, stat: os.stat_result, digest: str) -> Optional[Any]:
+        """
+        Returns the cached parse result of a file.
+
+        :param file_path: Path of the configuration file.
+        :param stat: Result of `os.stat` on the file.
+        :param digest: Digest of the contents of the file, see `content_digest`.
+        :return: The cached value, or None if there is no valid entry for this version of the file.
+        """
+        try:
+            with open(self._entry_path(file_path), "rb") as f:
+                # The header is stored separately to avoid unpickling stale values
+                if pickle.load(f) != self._header(file_path, stat, digest):
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            LOGGER.warning("Ignoring invalid cache entry for '%s'.", file_path, exc_info=True)
+            return None
+
+    def put(self, file_path: str, stat: os.stat_result, digest: str, value: Any) -> None:
+        """
+        Stores the parse result of a file. Errors are logged and ignored, as the cache is only an optimization.
+
+        :param file_path: Path of the configuration file.
+        :param stat: Result of `os.stat` on the file.
+        :param digest: Digest of the contents of the file, see `content_digest`.
+        :param value: Parse result. Must be picklable.
+        """
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-", suffix=".pickle")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(self._header(file_path, stat, digest), f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._entry_path(file_path))
+        except Exception:
+            LOGGER.warning("Failed to write cache entry for '%s'.", file_path, exc_info=True)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
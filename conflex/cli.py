@@ -0,0 +1,86 @@
+"""
+Command-line interface of conflex. Start with --help to see help.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from typing import List, Optional
+
+from conflex.config_store import ConfigStore
+from conflex.snapshot import write_snapshot
+
+
+def import_config_store(reference: str) -> ConfigStore:
+    """
+    Imports a config store from a reference of the form "module:attribute", ex: "my_app.config:config_store".
+    The attribute can also be a function that takes no argument and returns the config store.
+
+    :param reference: Reference of the config store.
+    :return: The config store.
+    :raise: A ValueError if the reference is invalid.
+    """
+    module_name, _, attribute = reference.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Invalid config store reference '{reference}', expected 'module:attribute'.")
+
+    config_store = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        config_store = getattr(config_store, name)
+    if callable(config_store) and not isinstance(config_store, ConfigStore):
+        config_store = config_store()
+
+    if not isinstance(config_store, ConfigStore):
+        raise ValueError(f"'{reference}' is not a ConfigStore object.")
+    return config_store
+
+
+def compile_command(args: argparse.Namespace) -> int:
+    config_store = import_config_store(args.config_store)
+
+    start = time.perf_counter()
+    write_snapshot(config_store, args.output)
+    duration = time.perf_counter() - start
+
+    print(
+        f"Compiled {len(config_store.loaders)} configurations to '{args.output}' "
+        f"({os.path.getsize(args.output)} bytes) in {duration * 1000:.1f}ms."
+    )
+    return 0
+
+
+def get_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Return a namespace with all the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(prog="conflex", description="Command-line tools of conflex.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = subparsers.add_parser(
+        "compile",
+        help="Load and merge the configurations of a config store and write them to a snapshot file.",
+        description="Load and merge the configurations of a config store and write them to a snapshot file, "
+        "which can be read at startup with ConfigStore.from_snapshot.",
+    )
+    compile_parser.add_argument(
+        "config_store", help="Config store to compile, as 'module:attribute', ex: 'my_app.config:config_store'."
+    )
+    compile_parser.add_argument(
+        "--output", "-o", default="config.snapshot", help="Path of the snapshot file. Defaults to config.snapshot."
+    )
+    compile_parser.set_defaults(func=compile_command)
+
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parsed_args = get_args(args)
+    # Allow importing config stores defined in the current directory, like `python -m` does
+    sys.path.insert(0, os.getcwd())
+    return parsed_args.func(parsed_args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
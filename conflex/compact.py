@@ -0,0 +1,251 @@
+"""
+Compact representation of large configurations.
+
+Configurations with many leaves repeat the same keys (ex: `ENABLED`, `TIMEOUT`) and often the same values and
+subtrees. Compacting a configuration:
+* interns keys and string values, and deduplicates the other immutable values (ex: large integers, tuples);
+* stores each node as a `CompactConfigDict`: a tuple of values and a reference to an index of the keys of the node.
+  The index is shared by all the nodes that have the same keys, so a node costs about half of a dictionary;
+* deduplicates identical subtrees, including across the configurations compacted with the same pool:
+>>> pool = CompactionPool()
+>>> layers = [pool.compact(layer) for layer in layers]
+>>> merged_config = pool.compact(merge_layers(layers))  # Shares its subtrees with the layers
+
+Compact configurations are immutable and hashable, like frozen configurations: lists are converted to tuples and
+sets to frozen sets.
+"""
+
+import sys
+import weakref
+from collections.abc import ItemsView, Mapping, ValuesView
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_MISSING = object()
+
+# Types of the most common leaves, checked first to skip the slower isinstance checks
+_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+class _KeyIndex(dict):
+    """
+    Position of each key of a node, shared by all the nodes with the same keys. A dict subclass so that it can be
+    referenced weakly.
+    """
+
+
+# Key indexes by tuple of keys. Indexes are kept as long as a node uses them.
+_KEY_INDEXES: "weakref.WeakValueDictionary[Tuple[Any, ...], _KeyIndex]" = weakref.WeakValueDictionary()
+
+
+def _key_index(keys: Tuple[Any, ...]) -> _KeyIndex:
+    key_index = _KEY_INDEXES.get(keys)
+    if key_index is None:
+        key_index = _KeyIndex((key, position) for position, key in enumerate(keys))
+        _KEY_INDEXES[keys] = key_index
+    return key_index
+
+
+class _CompactItemsView(ItemsView):
+    __slots__ = ()
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        return zip(self._mapping._key_index, self._mapping._values)  # type: ignore
+
+
+class _CompactValuesView(ValuesView):
+    __slots__ = ()
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._mapping._values)  # type: ignore
+
+
+class CompactConfigDict(Mapping):
+    """
+    Immutable and hashable configuration dictionary with a compact memory layout, see the module documentation.
+    Values can be accessed by key or by attribute, like with ConfigDict objects.
+    """
+
+    __slots__ = ("_key_index", "_values")
+
+    def __init__(self, data: Mapping[Any, Any] = ()):  # type: ignore
+        data = dict(data)
+        object.__setattr__(self, "_key_index", _key_index(tuple(data)))
+        object.__setattr__(self, "_values", tuple(data.values()))
+
+    @classmethod
+    def _from_values(cls, key_index: _KeyIndex, values: Tuple[Any, ...]) -> "CompactConfigDict":
+        node = cls.__new__(cls)
+        object.__setattr__(node, "_key_index", key_index)
+        object.__setattr__(node, "_values", values)
+        return node
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._values[self._key_index[key]]
+
+    def __getattr__(self, item: str) -> Any:
+        if item in CompactConfigDict.__slots__:
+            raise AttributeError(item)
+        position = self._key_index.get(item)
+        if position is None:
+            raise AttributeError(f"No such configuration variable or namespace: '{item}'")
+        return self._values[position]
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise TypeError("CompactConfigDict objects are immutable.")
+
+    def __delattr__(self, item: str) -> None:
+        raise TypeError("CompactConfigDict objects are immutable.")
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        position = self._key_index.get(key)
+        return default if position is None else self._values[position]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._key_index)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._key_index
+
+    def items(self) -> ItemsView:
+        return _CompactItemsView(self)
+
+    def values(self) -> ValuesView:
+        return _CompactValuesView(self)
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, CompactConfigDict) and other._key_index is self._key_index:
+            return self._values == other._values
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self):
+        return CompactConfigDict, (dict(self.items()),)
+
+    def __repr__(self) -> str:
+        return f"CompactConfigDict({dict(self.items())!r})"
+
+
+def _is_container(value: Any) -> bool:
+    if type(value) in _SCALAR_TYPES:
+        return False
+    return isinstance(value, (dict, list, tuple, set, frozenset, Mapping))
+
+
+class CompactionPool:
+    """
+    Pool of the values and subtrees of compacted configurations. Configurations compacted with the same pool share
+    their identical values and subtrees.
+
+    The pool keeps references to all the compacted objects, so it should only live as long as the configurations
+    that must share their values are being compacted, ex: the layers and the merged configuration of a config store.
+    """
+
+    def __init__(self) -> None:
+        self._leaves: Dict[Tuple[Any, ...], Any] = {}
+        # Nodes and tuples by key index and identity of their values
+        self._nodes: Dict[Tuple[Any, ...], Any] = {}
+
+    def _leaf(self, value: Any) -> Any:
+        value_type = type(value)
+        if value_type is str:
+            return sys.intern(value)
+        if value is None or value_type is bool:
+            return value
+
+        # 0.0 and -0.0 are equal, but must not be deduplicated
+        key = (value_type, value.hex()) if value_type is float else (value_type, value)
+        try:
+            return self._leaves.setdefault(key, value)
+        except TypeError:  # Unhashable value
+            return value
+
+    def compact(self, config: Any) -> Any:
+        """
+        Compacts a configuration.
+
+        :param config: Configuration dictionary, or any configuration value. It is not modified.
+        :return: The compacted configuration. Mappings are converted to CompactConfigDict objects, lists and tuples to
+                 tuples and sets to frozen sets. Nodes that are already compact are kept if their values are.
+        """
+        if not _is_container(config):
+            return self._leaf(config)
+
+        compacted: Dict[int, Any] = {}
+        stack: List[Tuple[Any, bool]] = [(config, False)]
+
+        while stack:
+            node, children_compacted = stack.pop()
+            if id(node) in compacted:
+                continue
+
+            children = node.values() if isinstance(node, Mapping) else node
+            if not children_compacted:
+                stack.append((node, True))
+                stack.extend(
+                    (child, False) for child in children if _is_container(child) and id(child) not in compacted
+                )
+                continue
+
+            values = tuple(compacted[id(child)] if _is_container(child) else self._leaf(child) for child in children)
+            if isinstance(node, Mapping):
+                if isinstance(node, CompactConfigDict):
+                    key_index = node._key_index
+                else:
+                    key_index = _key_index(tuple(sys.intern(k) if type(k) is str else k for k in node))
+                key: Tuple[Optional[int], ...] = (id(key_index), *map(id, values))
+                result = self._nodes.get(key)
+                if result is None:
+                    if isinstance(node, CompactConfigDict) and all(map(_is, node._values, values)):
+                        result = node
+                    else:
+                        result = CompactConfigDict._from_values(key_index, values)
+                    self._nodes[key] = result
+            elif isinstance(node, (set, frozenset)):
+                result = self._leaf(frozenset(values))
+            else:
+                key = (None, *map(id, values))
+                result = self._nodes.setdefault(key, values)
+
+            compacted[id(node)] = result
+
+        return compacted[id(config)]
+
+
+def _is(a: Any, b: Any) -> bool:
+    return a is b
+
+
+def compact_config(config: Any) -> Any:
+    """
+    Compacts a configuration with its own pool, see `CompactionPool.compact`.
+    """
+    return CompactionPool().compact(config)
+
+
+class CompactPathIndex:
+    """
+    Looks up values of a compact configuration by path, ex: "db.HOST". Used by `ConfigStore.get` instead of a flat
+    index of all the paths, which would take about as much memory as the configuration itself.
+    """
+
+    def __init__(self, config: Mapping[Any, Any], separator: str = "."):
+        self.config = config
+        self.separator = separator
+
+    def get(self, path: str, default: Any = None) -> Any:
+        value: Any = self.config
+        for key in path.split(self.separator):
+            if not isinstance(value, Mapping):
+                return default
+            value = value.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+
+        return value
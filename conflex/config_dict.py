@@ -1,54 +1,509 @@
-from copy import deepcopy
+import weakref
 from typing import Any
-from typing import Dict, Mapping, TypeVar, Union
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Type, TypeVar, Union
+
+from conflex.compact import CompactConfigDict
+from conflex.type_inference import DEFAULT_ENGINE, NO_MATCH, TypeInferenceEngine, bool_rule
 
 T = TypeVar("T", bound=Dict[str, Any])
+M = TypeVar("M", bound=Mapping[Any, Any])
+
+
+_MISSING = object()
+# Marks a missing value in path-based updates, see `replace_paths`
+DELETED = object()
+
+ConfigPath = Tuple[Any, ...]
+# Types of the nodes of the layers of a merge, see `merge_layers`
+NodeTypes = Union[Type[Mapping[str, Any]], Tuple[Type[Mapping[str, Any]], ...]]
+
+# Layers whose nodes are all of their own type or immutable, by id, see `_is_converted`
+_CONVERTED_LAYERS: "weakref.WeakValueDictionary[int, Any]" = weakref.WeakValueDictionary()
+
+
+def _merge_conflict(node_path: str, base_is_dict: bool) -> Exception:
+    if base_is_dict:
+        return Exception(
+            f"Invalid config merge at node {node_path}. Base layer is a dict, but was overwritten by a non-dictionary."
+        )
+    return Exception(
+        f"Invalid config merge at node {node_path}. Base layer is not a dict, but was overwritten by a dictionary."
+    )
+
+
+def _register_converted(layer: Mapping[Any, Any]) -> None:
+    try:
+        _CONVERTED_LAYERS[id(layer)] = layer
+    except TypeError:
+        pass  # Plain dicts cannot be weakly referenced, they are checked again at each merge
+
+
+def _is_converted(layer: Mapping[str, Any], dict_type: type, node_types: NodeTypes) -> bool:
+    """
+    Returns whether all the nodes of a layer are of type `dict_type` or immutable, in which case its subtrees can
+    be shared with a merged configuration. The result is memoized for the layers that can be weakly referenced.
+    """
+    layer_type = type(layer)
+    if layer_type is CompactConfigDict or layer_type is FrozenConfigDict:
+        return True
+    if layer_type is not dict_type:
+        return False
+    if _CONVERTED_LAYERS.get(id(layer)) is layer:
+        return True
+
+    stack = [layer]
+    while stack:
+        for value in stack.pop().values():
+            if isinstance(value, node_types):
+                value_type = type(value)
+                if value_type is dict_type:
+                    stack.append(value)
+                elif value_type is not CompactConfigDict and value_type is not FrozenConfigDict:
+                    return False
+
+    _register_converted(layer)
+    return True
+
+
+def merge_layers(
+    layers: Iterable[Mapping[Any, Any]],
+    dict_type: Type[T] = dict,  # type: ignore
+    path_from_root: str = "$.",
+    node_types: NodeTypes = dict,
+) -> T:
+    """
+    Merges an ordered sequence of configuration layers in a single pass.
+
+    Layers are merged from lowest to highest priority: in case of conflict, the values of the last layers take
+    precedence. The tree is walked iteratively, so there is no limit on the nesting depth of the configurations.
+
+    The merge is copy-on-write: a node of the result is only created if several layers contribute to it or if it
+    must be converted to `dict_type`. Subtrees that are immutable, or that only contain nodes of type `dict_type`,
+    and that are only defined by one layer are shared with this layer instead of being copied. The layers are never
+    modified, and must not be modified afterwards since they may share subtrees with the result.
+
+    :param layers: Configuration layers, from lowest to highest priority.
+    :param dict_type: Type of the nodes of the merged configuration.
+    :param path_from_root: Path of the layers inside the configuration. Used for logging of errors.
+    :param node_types: Types of the nodes of the layers, which are merged with the nodes of the other layers. Values
+                       of other types replace the values of the lower layers. Layers made of compact nodes are merged
+                       with `(dict, CompactConfigDict)`, see `conflex.compact`, and frozen layers with
+                       `(dict, FrozenConfigDict)`.
+    :return: The merged configuration. The root node is always a new object, even if there is only one layer.
+    :raise: An Exception if a dictionary and a non-dictionary value are defined at the same node in different layers.
+    """
+    root = dict_type()
+    # Each source is stored with whether all its nodes are converted, in which case its subtrees can be shared
+    sources: List[Tuple[Mapping[str, Any], bool]] = [
+        (layer, _is_converted(layer, dict_type, node_types)) for layer in layers
+    ]
+    stack = [(root, sources, path_from_root)]
+    immutable_types = (CompactConfigDict, FrozenConfigDict)
+
+    while stack:
+        node, sources, path = stack.pop()
+        # Subtrees that must be merged, by key. The first subtree is also stored in the node as a placeholder
+        # in order to preserve the order of the keys.
+        pending: Dict[Any, List[Tuple[Mapping[str, Any], bool]]] = {}
+
+        for source, converted in sources:
+            if not node and converted and type(source) is dict_type:
+                # Fast path: copy the node at C speed, the children are shared with the source layer.
+                node.update(source)
+                continue
+
+            for k, v in source.items():
+                if isinstance(v, node_types):
+                    subtrees = pending.get(k)
+                    if subtrees is not None:
+                        if v is not subtrees[-1][0]:
+                            subtrees.append((v, converted))
+                        continue
+
+                    current = node.get(k, _MISSING)
+                    if current is _MISSING:
+                        node[k] = v
+                        pending[k] = [(v, converted)]
+                    elif isinstance(current, node_types):
+                        # Copied by the fast path from a converted source
+                        pending[k] = [(current, True), (v, converted)] if v is not current else [(v, converted)]
+                    else:
+                        raise _merge_conflict(f"{path}{k}", base_is_dict=False)
+
+                else:
+                    if k in pending or isinstance(node.get(k), node_types):
+                        raise _merge_conflict(f"{path}{k}", base_is_dict=True)
+                    node[k] = v
+
+        for k, subtrees in pending.items():
+            subtree, converted = subtrees[0]
+            if len(subtrees) == 1 and ((converted and type(subtree) is dict_type) or type(subtree) in immutable_types):
+                node[k] = subtree
+            else:
+                child = dict_type()
+                node[k] = child
+                stack.append((child, subtrees, f"{path}{k}."))
+
+    _register_converted(root)
+    return root
 
 
 def merge_configs(
     base_config: T, new_config_layer: Mapping[str, Any], path_from_root: str = "$.", inplace: bool = False
 ) -> T:
     """
-    Merges two dictionaries recursively.
+    Merges two dictionaries.
 
     In case of conflict, updates the values in base_config by the ones provided in new_config_layer.
     The returned object is of the same type as base_config, allowing to use subclasses of dict for specific
     use cases.
     This function is based on a (very) similar function in the contracts codebase.
 
+    Note that the merge is performed by `merge_layers`: subtrees that are not modified by the merge are shared
+    between the merged configuration and the input dictionaries instead of being copied.
+
     :param base_config: Base config dictionary.
     :param new_config_layer: New config dictionary.
-    :param path_from_root: Current path inside the dictionary. Used for logging of errors as this function is recursive.
+    :param path_from_root: Current path inside the dictionary. Used for logging of errors.
     :param inplace: Whether the base_config dictionary should be updated in place.
     :return: The merged configuration dictionary. This object is of the same type as base_config and is actually
              the same object as base_config if the inplace flag is set to True.
     """
-    dict_type = type(base_config)
-    new_config = base_config if inplace else deepcopy(base_config)
-
-    for k, v in new_config_layer.items():
-        if isinstance(v, dict):
-            if k not in new_config:
-                new_config[k] = dict_type()
-            elif not isinstance(new_config[k], dict):
-                raise Exception(
-                    f"Invalid config merge at node {path_from_root}{k}. Base layer is not a dict, but "
-                    f"was overwritten by a dictionary."
-                )
-            new_config[k] = merge_configs(
-                dict_type(**new_config[k]), v, path_from_root=path_from_root + k + ".", inplace=True
-            )
+    merged_config = merge_layers(
+        (base_config, new_config_layer), dict_type=type(base_config), path_from_root=path_from_root
+    )
+    if not inplace:
+        return merged_config
 
+    base_config.update(merged_config)
+    return base_config
+
+
+def get_path(config: Mapping[Any, Any], path: ConfigPath, default: Any = None) -> Any:
+    """
+    Returns the value of a configuration at the specified path.
+
+    :param config: Configuration dictionary.
+    :param path: Path of the value, as a tuple of keys.
+    :param default: Value to return if the path does not exist.
+    :return: The value at the specified path, or `default`.
+    """
+    value: Any = config
+    for key in path:
+        if not isinstance(value, Mapping):
+            return default
+        value = value.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+
+    return value
+
+
+def _diff_nodes(
+    old_config: Mapping[Any, Any], new_config: Mapping[Any, Any], prefix: ConfigPath = ()
+) -> Iterator[Tuple[ConfigPath, Any, Any]]:
+    """
+    Yields the minimal paths at which two configurations differ, with the old and the new value at each path.
+    Missing values are `DELETED`. See `diff_paths`.
+    """
+    stack: List[Tuple[ConfigPath, Mapping[Any, Any], Mapping[Any, Any]]] = [(prefix, old_config, new_config)]
+
+    while stack:
+        path, old_node, new_node = stack.pop()
+        for k, new_value in new_node.items():
+            old_value = old_node.get(k, DELETED)
+            if old_value is new_value:
+                continue
+            if isinstance(old_value, Mapping) and isinstance(new_value, Mapping):
+                stack.append(((*path, k), old_value, new_value))
+            elif old_value is DELETED or type(old_value) is not type(new_value) or old_value != new_value:
+                yield (*path, k), old_value, new_value
+
+        for k, old_value in old_node.items():
+            if k not in new_node:
+                yield (*path, k), old_value, DELETED
+
+
+def diff_paths(old_config: Mapping[Any, Any], new_config: Mapping[Any, Any]) -> List[ConfigPath]:
+    """
+    Lists the paths at which two configurations differ.
+
+    Subtrees that are shared by both configurations are skipped without being walked, so comparing two versions
+    of a configuration that share their unchanged subtrees costs time proportional to the size of the changes.
+    The paths are minimal: if a subtree is added, removed or replaced by a value of another type, only the path of
+    the subtree is listed. All the ancestors of the listed paths are dictionaries in both configurations.
+
+    :param old_config: Old configuration.
+    :param new_config: New configuration.
+    :return: The list of paths, as tuples of keys, at which the configurations differ.
+    """
+    return [path for path, _, _ in _diff_nodes(old_config, new_config)]
+
+
+class ConfigDiff(NamedTuple):
+    """
+    Differences between two versions of a configuration, see `diff_configs`.
+    """
+
+    # Paths that only exist in the new configuration, that only exist in the old configuration, and that exist in
+    # both configurations with different values
+    added: List[ConfigPath]
+    removed: List[ConfigPath]
+    changed: List[ConfigPath]
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+def diff_configs(
+    old_config: Mapping[Any, Any], new_config: Mapping[Any, Any], paths: Optional[Iterable[ConfigPath]] = None
+) -> ConfigDiff:
+    """
+    Compares two versions of a configuration.
+
+    Like `diff_paths`, subtrees that are shared by both versions are skipped, so the cost grows with the size of the
+    changes rather than with the size of the configurations. A subtree that replaces a value of another type, or
+    the other way around, is reported as a changed path.
+
+    :param old_config: Old configuration.
+    :param new_config: New configuration.
+    :param paths: Paths of the subtrees that may differ, if known (ex: the paths returned by `remerge_paths`).
+                  The rest of the configurations is assumed to be identical and is not compared.
+    :return: The added, removed and changed paths, as tuples of keys. The paths are minimal, see `diff_paths`.
+    """
+    diff = ConfigDiff([], [], [])
+    if paths is None:
+        differences: Iterable[Tuple[ConfigPath, Any, Any]] = _diff_nodes(old_config, new_config)
+    else:
+        differences = []
+        for path in minimal_paths(paths):
+            old_value, new_value = get_path(old_config, path, DELETED), get_path(new_config, path, DELETED)
+            if isinstance(old_value, Mapping) and isinstance(new_value, Mapping):
+                differences.extend(_diff_nodes(old_value, new_value, path))
+            elif type(old_value) is not type(new_value) or old_value != new_value:
+                differences.append((path, old_value, new_value))
+
+    for path, old_value, new_value in differences:
+        if old_value is DELETED:
+            diff.added.append(path)
+        elif new_value is DELETED:
+            diff.removed.append(path)
         else:
-            if k in new_config and isinstance(new_config[k], dict):
-                raise Exception(
-                    f"Invalid config merge at node {path_from_root}{k}. Base layer is a dict, but "
-                    f"was overwritten by a non-dictionary."
-                )
-            else:
-                new_config[k] = new_config_layer[k]
+            diff.changed.append(path)
+
+    return diff
+
+
+def minimal_paths(paths: Iterable[ConfigPath]) -> List[ConfigPath]:
+    """
+    Removes duplicate paths and paths that are inside the subtree of another path.
+    :param paths: Paths, as tuples of keys.
+    :return: The remaining paths.
+    """
+    kept = set()
+    for path in sorted(set(paths), key=len):
+        if not any(path[:i] in kept for i in range(len(path))):
+            kept.add(path)
+
+    return [path for path in dict.fromkeys(paths) if path in kept]
+
+
+def replace_paths(config: M, values: Mapping[ConfigPath, Any]) -> M:
+    """
+    Returns a copy of a configuration where the values at the specified paths are replaced.
+
+    The copy is path-copying: only the ancestors of the replaced values are copied, all the other subtrees are
+    shared with the original configuration, which is never modified.
+    The ancestors of the paths must be dictionaries in the configuration.
 
-    return new_config
+    :param config: Configuration dictionary. Nodes can be of any mapping type that can be built from a dict.
+    :param values: New values, by path. Paths that map to `DELETED` are removed from the configuration.
+    :return: The updated configuration, or `config` itself if there is nothing to replace.
+    """
+    if not values:
+        return config
+
+    nodes: Dict[ConfigPath, Tuple[Any, Dict[Any, Any]]] = {(): (type(config), dict(config))}
+    for path, value in values.items():
+        for depth in range(1, len(path)):
+            prefix = path[:depth]
+            if prefix not in nodes:
+                original_node = nodes[prefix[:-1]][1][prefix[-1]]
+                nodes[prefix] = (type(original_node), dict(original_node))
+
+        parent = nodes[path[:-1]][1]
+        if value is DELETED:
+            parent.pop(path[-1], None)
+        else:
+            parent[path[-1]] = value
+
+    # Rebuild the copied nodes bottom-up so that immutable node types can be used
+    for path in sorted(nodes, key=len, reverse=True):
+        node_type, items = nodes[path]
+        node = node_type(items)
+        if not path:
+            return node
+        nodes[path[:-1]][1][path[-1]] = node
+
+    raise AssertionError("unreachable")
+
+
+def _merge_values(lower_value: Any, upper_value: Any, path: ConfigPath, dict_type: Type[T]) -> Any:
+    """
+    Merges the values of two layers at the same path. Missing values are represented by `DELETED`.
+    """
+    node_path = "$." + ".".join(str(key) for key in path)
+    if upper_value is DELETED:
+        return lower_value
+
+    if isinstance(upper_value, dict):
+        if lower_value is DELETED:
+            return merge_layers((upper_value,), dict_type=dict_type, path_from_root=node_path + ".")
+        if not isinstance(lower_value, dict):
+            raise _merge_conflict(node_path, base_is_dict=False)
+        return merge_layers((lower_value, upper_value), dict_type=dict_type, path_from_root=node_path + ".")
+
+    if isinstance(lower_value, dict):
+        raise _merge_conflict(node_path, base_is_dict=True)
+    return upper_value
+
+
+def remerge_paths(
+    merged_config: T, lower_config: Mapping[Any, Any], layer: Mapping[Any, Any], paths: Iterable[ConfigPath]
+) -> T:
+    """
+    Updates the merge of a layer on top of a lower configuration after some paths changed.
+
+    `merged_config` must be the result of a previous merge of `layer` on top of `lower_config`, where both inputs may
+    have changed since then, but only inside the subtrees listed in `paths`. Only these subtrees are merged again,
+    the rest of `merged_config` is shared with the result.
+
+    :param merged_config: Result of the previous merge.
+    :param lower_config: Current version of the lower configuration.
+    :param layer: Current version of the layer.
+    :param paths: Minimal paths (see `minimal_paths`) of the subtrees that changed in either input.
+    :return: The merge of `layer` on top of `lower_config`.
+    :raise: An Exception if a dictionary and a non-dictionary value are defined at the same node in both inputs.
+    """
+    dict_type = type(merged_config)
+    return replace_paths(
+        merged_config,
+        {
+            path: _merge_values(get_path(lower_config, path, DELETED), get_path(layer, path, DELETED), path, dict_type)
+            for path in paths
+        },
+    )
+
+
+def build_path_index(config: Mapping[Any, Any], separator: str = ".", prefix: str = "") -> Dict[str, Any]:
+    """
+    Builds a flat index of a configuration that maps the path of every node to its value.
+
+    For example, `{"db": {"HOST": "localhost"}}` is indexed as `{"db": {"HOST": "localhost"}, "db.HOST": "localhost"}`.
+    Intermediate dictionaries are indexed as well, and the values are not copied.
+
+    :param config: Configuration dictionary.
+    :param separator: Separator between the keys of a path.
+    :param prefix: Prefix of all the paths, used to index a subtree of a larger configuration.
+    :return: A dictionary that maps the path of each node of the configuration to its value.
+    """
+    path_index = {}
+    stack = [(prefix, config)]
+
+    while stack:
+        prefix, node = stack.pop()
+        for k, v in node.items():
+            path = f"{prefix}{k}"
+            path_index[path] = v
+            if isinstance(v, (dict, FrozenConfigDict)):
+                stack.append((path + separator, v))
+
+    return path_index
+
+
+def update_path_index(
+    path_index: Dict[str, Any],
+    old_config: Mapping[Any, Any],
+    new_config: Mapping[Any, Any],
+    paths: Iterable[ConfigPath],
+    separator: str = ".",
+) -> Dict[str, Any]:
+    """
+    Updates the path index of a configuration after some paths changed. See `build_path_index`.
+
+    :param path_index: Path index of `old_config`. It is not modified.
+    :param old_config: Previous version of the configuration.
+    :param new_config: New version of the configuration.
+    :param paths: Minimal paths of the subtrees that changed between both versions, see `diff_paths`.
+    :param separator: Separator between the keys of a path.
+    :return: The path index of `new_config`.
+    """
+    path_index = dict(path_index)
+
+    for path in paths:
+        # The ancestors of the changed subtrees are new objects
+        node = new_config
+        for depth in range(len(path) - 1):
+            node = node[path[depth]]
+            path_index[separator.join(str(key) for key in path[: depth + 1])] = node
+
+        node_path = separator.join(str(key) for key in path)
+        old_value = get_path(old_config, path, DELETED)
+        if old_value is not DELETED:
+            path_index.pop(node_path, None)
+            if isinstance(old_value, (dict, FrozenConfigDict)):
+                for sub_path in build_path_index(old_value, separator, prefix=node_path + separator):
+                    path_index.pop(sub_path, None)
+
+        new_value = get_path(new_config, path, DELETED)
+        if new_value is not DELETED:
+            path_index[node_path] = new_value
+            if isinstance(new_value, (dict, FrozenConfigDict)):
+                path_index.update(build_path_index(new_value, separator, prefix=node_path + separator))
+
+    return path_index
+
+
+class LayeredPathIndex:
+    """
+    Path index of a configuration that differs from a base configuration at a few paths, ex: a configuration merged
+    on top of another one. Only the paths that differ are indexed, the other lookups fall back to the index of the
+    base configuration, so the index costs time and memory proportional to the differences. See `build_path_index`.
+    """
+
+    def __init__(
+        self, base_index: Any, base_config: Mapping[Any, Any], config: Mapping[Any, Any], separator: str = "."
+    ):
+        """
+        :param base_index: Path index of the base configuration. It must not be modified afterwards.
+        :param base_config: Base configuration.
+        :param config: Configuration to index. It shares its unchanged subtrees with the base configuration.
+        :param separator: Separator between the keys of a path.
+        """
+        self.base_index = base_index
+        # Paths that differ from the base configuration. Removed paths are DELETED.
+        self.paths: Dict[str, Any] = {}
+
+        for path, old_value, new_value in _diff_nodes(base_config, config):
+            # The ancestors of the changed subtrees are new objects
+            node = config
+            for depth in range(len(path) - 1):
+                node = node[path[depth]]
+                self.paths[separator.join(str(key) for key in path[: depth + 1])] = node
+
+            node_path = separator.join(str(key) for key in path)
+            if isinstance(old_value, Mapping):
+                sub_paths = build_path_index(old_value, separator, prefix=node_path + separator)
+                self.paths.update(dict.fromkeys(sub_paths, DELETED))
+            self.paths[node_path] = new_value
+            if isinstance(new_value, Mapping):
+                self.paths.update(build_path_index(new_value, separator, prefix=node_path + separator))
+
+    def get(self, path: str, default: Any = None) -> Any:
+        value = self.paths.get(path, _MISSING)
+        if value is _MISSING:
+            return self.base_index.get(path, default)
+        return default if value is DELETED else value
 
 
 def convert_to_bool(value_str: str) -> bool:
@@ -58,36 +513,22 @@ def convert_to_bool(value_str: str) -> bool:
     :return: The boolean value represented by `value_str`, if any.
     :raise: A ValueError if it is not possible to convert the value string to bool.
     """
-    conversion_dict = {"true": True, "t": True, "y": True, "false": False, "f": False, "n": False}
-    try:
-        return conversion_dict[value_str.lower()]
-    except KeyError as e:
-        raise ValueError(f"Not a boolean value: {value_str}") from e
+    value = bool_rule(value_str)
+    if value is NO_MATCH:
+        raise ValueError(f"Not a boolean value: {value_str}")
+    return value
 
 
 def convert_str_value(value_str: str) -> Union[str, int, float, bool]:
     """
     Attempts to convert a string value to the most logical type.
 
-    Supported types are bool, float and int.
+    Supported types are bool, int and float. See `conflex.type_inference` for other types.
 
     :param value_str: Value to convert, in string format.
     :return: The value in its real type, or as a string if no conversion is possible.
     """
-    try:
-        return convert_to_bool(value_str)
-    except ValueError:
-        pass
-
-    try:
-        return float(value_str)
-    except ValueError:
-        pass
-
-    try:
-        return int(value_str)
-    except ValueError:
-        return value_str
+    return DEFAULT_ENGINE.convert(value_str)
 
 
 class ConfigDict(dict):
@@ -101,12 +542,131 @@ class ConfigDict(dict):
         except KeyError as e:
             raise AttributeError(f"No such configuration variable or namespace: '{item}'") from e
 
-    def cast_values(self) -> None:
+    def cast_values(self, type_inference: Optional[TypeInferenceEngine] = None) -> None:
         """
         Attempts to convert the leaf values of the dictionary to their real type.
+        :param type_inference: Type inference engine used to convert the values. Defaults to the default engine,
+                               which supports bool, int and float.
         """
-        for k, v in self.items():
-            if isinstance(v, ConfigDict):
-                v.cast_values()
-            elif isinstance(v, str):
-                self[k] = convert_str_value(v)
+        (type_inference or DEFAULT_ENGINE).cast_values(self)
+
+
+class FrozenConfigDict(Mapping):
+    """
+    Immutable and hashable version of ConfigDict. Values can be accessed by key or by attribute.
+
+    Frozen configurations can be shared between threads without locking or defensive copies.
+    Use `freeze_config` to convert a configuration tree to frozen configuration dictionaries.
+    """
+
+    __slots__ = ("_data", "_hash")
+
+    def __init__(self, data: Mapping[Any, Any] = ()):  # type: ignore
+        object.__setattr__(self, "_data", dict(data))
+        object.__setattr__(self, "_hash", None)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._data[key]
+
+    def __getattr__(self, item: str) -> Any:
+        if item in FrozenConfigDict.__slots__:
+            raise AttributeError(item)
+        try:
+            return self._data[item]
+        except KeyError as e:
+            raise AttributeError(f"No such configuration variable or namespace: '{item}'") from e
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise TypeError("FrozenConfigDict objects are immutable.")
+
+    def __delattr__(self, item: str) -> None:
+        raise TypeError("FrozenConfigDict objects are immutable.")
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._data
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(frozenset(self._data.items())))
+        return self._hash  # type: ignore
+
+    def __reduce__(self):
+        return FrozenConfigDict, (self._data,)
+
+    def __repr__(self) -> str:
+        return f"FrozenConfigDict({self._data!r})"
+
+
+def to_config_dict(data: Mapping[Any, Any]) -> ConfigDict:
+    """
+    Converts the dictionaries of a parsed document to ConfigDict objects, for parsers that can only build dicts.
+
+    The conversion is a single iterative pass. Lists of the document are converted in place, so the document must
+    not be shared.
+
+    :param data: Parsed document, made of dictionaries and lists.
+    :return: The document as a ConfigDict object.
+    """
+    config = ConfigDict(data)
+    stack: List[Any] = [config]
+    while stack:
+        node = stack.pop()
+        for k, v in node.items() if isinstance(node, dict) else enumerate(node):
+            if type(v) is dict:
+                node[k] = v = ConfigDict(v)
+                stack.append(v)
+            elif type(v) is list:
+                stack.append(v)
+
+    _register_converted(config)
+    return config
+
+
+def freeze_config(config: Any) -> Any:
+    """
+    Converts a configuration tree to an immutable and hashable tree.
+
+    Dictionaries are converted to FrozenConfigDict objects, lists and tuples to tuples and sets to frozen sets.
+    Subtrees that are shared between several nodes of the configuration are only frozen once and remain shared in
+    the frozen tree.
+
+    :param config: Configuration dictionary, or any configuration value.
+    :return: The frozen configuration. A configuration dictionary is converted to a FrozenConfigDict object.
+    """
+    if not _is_mutable_node(config):
+        return config
+
+    frozen: Dict[int, Any] = {}
+    stack: List[Tuple[Any, bool]] = [(config, False)]
+
+    while stack:
+        node, children_frozen = stack.pop()
+        if id(node) in frozen:
+            continue
+
+        children = node.values() if isinstance(node, Mapping) else node
+        if not children_frozen:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children if _is_mutable_node(child) and id(child) not in frozen)
+            continue
+
+        if isinstance(node, Mapping):
+            frozen[id(node)] = FrozenConfigDict({k: frozen.get(id(v), v) for k, v in node.items()})
+        elif isinstance(node, (set, frozenset)):
+            frozen[id(node)] = frozenset(frozen.get(id(v), v) for v in node)
+        else:
+            frozen[id(node)] = tuple(frozen.get(id(v), v) for v in node)
+
+    return frozen[id(config)]
+
+
+def _is_mutable_node(value: Any) -> bool:
+    return isinstance(value, (dict, list, tuple, set, frozenset)) or (
+        isinstance(value, Mapping) and not isinstance(value, FrozenConfigDict)
+    )
@@ -1,5 +1,10 @@
 import abc
+import asyncio
+import os
+from typing import BinaryIO, List, Optional, Tuple
+
 from conflex.config_dict import ConfigDict
+from conflex.exc import ConfigLoaderException
 
 
 class ConfigLoader(abc.ABC):
@@ -15,3 +20,99 @@ class ConfigLoader(abc.ABC):
         :return: A ConfigDict object that represents the configuration.
         """
         ...
+
+    def sources(self) -> List[str]:
+        """
+        Returns the paths of the files from which the configuration is loaded, if any.
+        Used to detect changes of the configuration, see `conflex.reload.ConfigReloader`.
+        :return: The list of source file paths. Empty by default.
+        """
+        return []
+
+    def fingerprint(self) -> Optional[str]:
+        """
+        Returns a fingerprint of the sources of the configuration, which changes when the configuration changes.
+        Used to check whether a snapshot of the configuration is still valid, see `ConfigStore.from_snapshot`.
+
+        The default fingerprint is made of the modification time, size and inode of the source files.
+        :return: The fingerprint, or None if the configuration cannot be fingerprinted, in which case snapshots
+                 of the configuration are never used.
+        """
+        sources = self.sources()
+        if not sources:
+            return None
+
+        signatures = []
+        for source in sources:
+            try:
+                st = os.stat(source)
+            except OSError:
+                return None
+            signatures.append(f"{source}:{st.st_mtime_ns}:{st.st_size}:{st.st_ino}")
+        return "|".join(signatures)
+
+
+class AsyncConfigLoader(ConfigLoader):
+    """
+    Base class for asynchronous configuration loaders. Asynchronous loaders are awaited concurrently by
+    `ConfigStore.aload`, which makes them suitable for network sources in asyncio applications.
+
+    Asynchronous loaders can also be used synchronously, in which case `aload` runs in a new event loop.
+    """
+
+    @abc.abstractmethod
+    async def aload(self) -> ConfigDict:
+        """
+        Loads the configuration asynchronously and returns it as a ConfigDict object.
+        :return: A ConfigDict object that represents the configuration.
+        """
+        ...
+
+    def load(self) -> ConfigDict:
+        """
+        Loads the configuration synchronously by running `aload` in a new event loop.
+        This method cannot be called from a running event loop, use `ConfigStore.aload` instead.
+        :return: A ConfigDict object that represents the configuration.
+        """
+        return asyncio.run(self.aload())
+
+
+class FileConfigLoader(ConfigLoader):
+    """
+    Base class for loaders that load a configuration from a file.
+    """
+
+    def __init__(self, config_file_path: str, help_msg: Optional[str] = None):
+        """
+        :param config_file_path: Path to the configuration file.
+        :param help_msg: Optional help message to display if the file is not found.
+        """
+        self.config_file_path = config_file_path
+        self.help_msg = help_msg
+
+    def _open_file(self) -> BinaryIO:
+        """
+        Opens the configuration file in binary mode.
+        :return: The file object.
+        :raise: A ConfigLoaderException if the file does not exist.
+        """
+        try:
+            return open(self.config_file_path, "rb")
+
+        except (FileNotFoundError, PermissionError) as e:
+            err_msg = f"'{self.config_file_path}': file not found."
+            if self.help_msg:
+                err_msg += "\n" + self.help_msg
+            raise ConfigLoaderException(err_msg) from e
+
+    def _read_file(self) -> Tuple[os.stat_result, bytes]:
+        """
+        Reads the configuration file.
+        :return: The result of `os.stat` on the file and its contents.
+        :raise: A ConfigLoaderException if the file does not exist.
+        """
+        with self._open_file() as f:
+            return os.fstat(f.fileno()), f.read()
+
+    def sources(self) -> List[str]:
+        return [self.config_file_path]
@@ -2,12 +2,46 @@
 Configuration management system.
 """
 
-from functools import reduce
-from typing import Any
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
-from conflex.config_dict import ConfigDict, merge_configs
-from conflex.config_loader import ConfigLoader
-from conflex.exc import ConfigStoreException
+from conflex.compact import CompactConfigDict, CompactionPool, CompactPathIndex
+from conflex.config_dict import (
+    DELETED,
+    ConfigDict,
+    ConfigPath,
+    FrozenConfigDict,
+    LayeredPathIndex,
+    build_path_index,
+    diff_configs,
+    diff_paths,
+    freeze_config,
+    get_path,
+    merge_layers,
+    minimal_paths,
+    remerge_paths,
+    replace_paths,
+    update_path_index,
+)
+from conflex.config_dict import merge_configs  # noqa: F401 (re-exported for backwards compatibility)
+from conflex.config_loader import AsyncConfigLoader, ConfigLoader
+from conflex.exc import ConfigLoadErrors, ConfigStoreException
+from conflex.handles import ConfigHandle, ConfigHandles
+from conflex.instrumentation import Instrumentation
+from conflex.interpolation import Interpolator
+from conflex.overlay import OverlayConfig
+from conflex.path_trie import PathTrie
+from conflex.schema import compile_config
+from conflex.shared import SharedPathIndex, open_shared_config, write_shared_config
+from conflex.snapshot import read_snapshot
+from conflex.subscriptions import SubscriberCallback, Subscription, Subscriptions
+
+LOGGER = logging.getLogger(__name__)
 
 
 class ConfigStore:
@@ -24,58 +58,839 @@ class ConfigStore:
 
     The merged configuration is accessible by attributes:
     >>> my_config = config_store.db.host
+
+    Or by path, which only costs one lookup in a flat index of the merged configuration:
+    >>> my_config = config_store.get("db.host")
+
+    The config store is thread-safe: each configuration is loaded once and the configurations are merged once,
+    even if several threads access the store concurrently.
     """
 
-    def __init__(self):
-        self.merged_config = None
-        self.loaders = {}
-        self.configs = {}
+    def __init__(
+        self,
+        freeze: bool = False,
+        parallel_load: bool = False,
+        max_load_workers: Optional[int] = None,
+        schema: Optional[type] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        shared_path: Optional[str] = None,
+        interpolate: bool = False,
+        compact: bool = False,
+    ):
+        """
+        Instantiates the config store.
+
+        :param freeze: Whether the merged configuration should be frozen. If set, the merged configuration is an
+                       immutable and hashable FrozenConfigDict object where lists are converted to tuples. Frozen
+                       configurations can be shared between threads without locking or defensive copies.
+        :param parallel_load: Whether the configurations should be loaded concurrently in a thread pool when
+                              accessing the merged configuration. Useful when loaders are I/O-bound.
+                              The configurations are always merged in the order in which they were added.
+        :param max_load_workers: Maximum number of threads used to load configurations if `parallel_load` is set.
+                                 Defaults to the default of `concurrent.futures.ThreadPoolExecutor`.
+        :param schema: Optional schema of the merged configuration, defined as a dataclass or a TypedDict class.
+                       If set, the merged configuration is validated against the schema and compiled into a typed
+                       configuration each time it is merged, see `typed`.
+        :param instrumentation: Optional instrumentation that records the loads, the merges and the accesses to
+                                configuration values, see `conflex.instrumentation` and `stats`.
+        :param shared_path: Optional path of a file where the merged configuration is written each time it is
+                            merged, preferably on a memory file system (ex: /dev/shm). If set, the merged configuration
+                            is a read-only SharedConfigDict object that decodes values from the memory-mapped file
+                            on demand, so processes forked after the merge share a single copy of the configuration.
+                            The loaded configurations are still kept by the store, see `configs`: processes that
+                            never read them share their pages with the parent process if it calls `gc.freeze()`
+                            before forking. Reloads merge all the configurations again. See `conflex.shared`.
+                            Takes precedence over `freeze`.
+        :param interpolate: Whether references to other values of the merged configuration, ex: "${db.HOST}", should
+                            be resolved in the merged configuration. See `conflex.interpolation`.
+        :param compact: Whether the configurations should be stored in a compact form, for very large configurations.
+                        If set, the configurations and the merged configuration are converted to CompactConfigDict
+                        objects when they are merged: keys and values are interned, and identical values and subtrees
+                        are shared between all the configurations. Compact configurations are immutable, like
+                        frozen ones. Reloads merge all the configurations again. See `conflex.compact`.
+        """
+        self.merged_config: Optional[Mapping[str, Any]] = None
+        self.loaders: Dict[str, ConfigLoader] = {}
+        self.configs: Dict[str, Optional[Mapping[str, Any]]] = {}
+        self.schemas: Dict[str, Optional[type]] = {}
+        self.schema = schema
+        self._typed_config: Any = None
+        # Typed configuration of each namespace, along with the configuration it was compiled from
+        self._typed_configs: Dict[str, Tuple[Mapping[str, Any], Any]] = {}
+        self._freeze = freeze
+        self._compact = compact
+        self._shared_path = shared_path
+        self._interpolator = Interpolator() if interpolate else None
+        self._instrumentation = instrumentation
+        self._on_access = (
+            instrumentation.on_access if instrumentation is not None and instrumentation.track_access else None
+        )
+        self._parallel_load = parallel_load
+        self._max_load_workers = max_load_workers
+        # Flat index of the merged configuration by path, or SharedPathIndex object for shared configurations
+        self._path_index: Any = {}
+        # Index of the paths of the merged configuration for wildcard queries, built on first use
+        self._path_trie: Optional[PathTrie] = None
+        # Result of the merge of the configurations up to each layer, in the order of the layers.
+        # Used to merge again only the layers above a configuration that changed.
+        self._layer_merges: List[ConfigDict] = []
+        self._overlay: Optional[OverlayConfig] = None
+        self._subscriptions = Subscriptions()
+        self._handles = ConfigHandles()
+        # Store from which the store is derived, see `derive`, with its merged configuration and path index as of
+        # the last merge
+        self._parent: Optional[ConfigStore] = None
+        self._follow_parent = False
+        self._base_config: Optional[Mapping[str, Any]] = None
+        self._base_path_index: Any = None
+        self._derived_stores: "weakref.WeakSet[ConfigStore]" = weakref.WeakSet()
+        # Whether stores were derived from this store, which locks its namespaces
+        self._derived = False
+        # Protects the merged configuration. Each namespace also has its own lock to load its configuration.
+        # To avoid deadlocks, this lock must never be acquired while holding a namespace lock.
+        self._lock = threading.RLock()
+        self._namespace_locks: Dict[str, threading.Lock] = {}
 
-    def add(self, namespace: str, loader: ConfigLoader) -> None:
+    def add(self, namespace: str, loader: ConfigLoader, schema: Optional[type] = None) -> None:
         """
         Adds a configuration source to the store.
 
-        Configurations can be added as long as the config store is not in use.
+        Configurations can be added as long as the config store is not in use and no store was derived from it.
 
         :param namespace: Configuration namespace.
         :param loader: Configuration loader. Used to load the configuration at runtime.
+        :param schema: Optional schema of the configuration, defined as a dataclass or a TypedDict class.
+                       See `typed`.
+        :raise: A ConfigStoreException if the config store is already in use, if a store was derived from it or if the
+                namespace is already used.
+        """
+        with self._lock:
+            if self.merged_config is not None or self._overlay is not None:
+                raise ConfigStoreException("Cannot add new configurations after the first access to the config store.")
+            if self._derived:
+                # The namespace could clash with the namespaces of the derived stores
+                raise ConfigStoreException("Cannot add new configurations after a store was derived from the store.")
+            if namespace in self._all_namespaces():
+                raise ConfigStoreException(
+                    f"A loader for configuration namespace '{namespace}' is already registered ({loader})."
+                )
+
+            self._namespace_locks[namespace] = threading.Lock()
+            self.loaders[namespace] = loader
+            self.configs[namespace] = None
+            self.schemas[namespace] = schema
+
+    def from_snapshot(self, snapshot_path: str) -> "ConfigStore":
+        """
+        Initializes the store from a snapshot of its configurations, see `conflex.snapshot`.
+
+        The configurations whose sources did not change since the snapshot was written are read from the snapshot
+        instead of being loaded. If all of them are still valid, the merged configuration is also read from the
+        snapshot, so the store is ready without loading or merging anything:
+        >>> config_store = ConfigStore()
+        >>> config_store.add("base", YamlConfigLoader("config.yaml"))
+        >>> config_store.from_snapshot("config.snapshot")
+
+        Otherwise, the outdated configurations are loaded and merged on first access, as usual. Missing or invalid
+        snapshots are ignored. Snapshots are unpickled, so they must only be writable by trusted users.
+
+        :param snapshot_path: Path of the snapshot file, as written by `conflex.snapshot.write_snapshot` or by the
+                              `conflex compile` command.
+        :return: The config store itself.
         :raise: A ConfigStoreException if the config store is already in use.
         """
-        if self.merged_config is not None:
-            raise ConfigStoreException("Cannot add new configurations after the first access to the config store.")
-        if namespace in self.loaders:
-            raise ConfigStoreException(
-                f"A loader for configuration namespace '{namespace}' is already registered ({loader})."
-            )
+        with self._lock:
+            if self.merged_config is not None or self._overlay is not None:
+                raise ConfigStoreException("Cannot read a snapshot after the first access to the config store.")
+            if self._parent is not None:
+                raise ConfigStoreException("Derived config stores cannot read snapshots.")
+
+            snapshot = read_snapshot(self, snapshot_path)
+            if snapshot is None:
+                return self
+
+            configs = snapshot["configs"]
+            for namespace, config in configs.items():
+                with self._namespace_locks[namespace]:
+                    if self.configs[namespace] is None:
+                        self.configs[namespace] = config
+
+            # The merged configuration of the snapshot can only be used if no configuration was loaded before
+            if (
+                snapshot.get("layer_merges")
+                and not self._compact
+                and all(self.configs[namespace] is configs[namespace] for namespace in configs)
+            ):
+                if (
+                    snapshot["freeze"] != self._freeze
+                    or self._shared_path is not None
+                    or self._interpolator is not None
+                    or not isinstance(snapshot["path_index"], dict)
+                ):
+                    self._publish(snapshot["layer_merges"][-1])
+                else:
+                    if self.schema is not None:
+                        self._typed_config = compile_config(self.schema, snapshot["merged_config"])
+                    self._path_index = snapshot["path_index"]
+                    self.merged_config = snapshot["merged_config"]
+                if self._shared_path is None:
+                    self._layer_merges = snapshot["layer_merges"]
+
+        return self
+
+    def _load_config(self, namespace: str) -> Mapping[str, Any]:
+        """
+        Loads the configuration of a namespace if it was not yet loaded.
 
-        self.loaders[namespace] = loader
-        self.configs[namespace] = None
+        The loader of each namespace is called at most once, even if several threads request the configuration
+        at the same time.
+
+        :param namespace: Configuration namespace.
+        :return: The configuration of the namespace.
+        """
+        config = self.configs[namespace]
+        if config is None:
+            with self._namespace_locks[namespace]:
+                config = self.configs[namespace]
+                if config is None:
+                    config = self._call_loader(namespace)
+                    self.configs[namespace] = config
+
+        return config
+
+    def _call_loader(self, namespace: str) -> ConfigDict:
+        """
+        Calls the loader of a namespace and reports the load to the instrumentation of the store, if any.
+        :param namespace: Configuration namespace.
+        :return: The loaded configuration.
+        """
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            return self.loaders[namespace].load()
+
+        start = time.perf_counter()
+        config = self.loaders[namespace].load()
+        instrumentation.on_load(namespace, time.perf_counter() - start, config)
+        return config
+
+    def _loaded_configs(
+        self, configs: Optional[Dict[str, Optional[Mapping[str, Any]]]] = None
+    ) -> Dict[str, Mapping[str, Any]]:
+        """
+        Returns the configurations that are loaded, by namespace, in the order of the layers.
+        :param configs: Configurations, by namespace. Defaults to the configurations of the store.
+        """
+        if configs is None:
+            configs = self.configs
+        return {namespace: config for namespace, config in configs.items() if config is not None}
 
     def _load_all_configs(self) -> None:
         """
-        Loads all configurations that were not yet loaded.
+        Loads all configurations that were not yet loaded, concurrently if the `parallel_load` option is set.
+
+        :raise: The exception raised by the loader if one loader fails, or a ConfigLoadErrors exception that
+                contains all the errors if several loaders fail.
+        """
+        namespaces = [namespace for namespace, config in self.configs.items() if config is None]
+        if not self._parallel_load or len(namespaces) < 2:
+            for namespace in namespaces:
+                self._load_config(namespace)
+            return
+
+        with ThreadPoolExecutor(max_workers=self._max_load_workers, thread_name_prefix="conflex-loader") as executor:
+            futures = {namespace: executor.submit(self._load_config, namespace) for namespace in namespaces}
+
+        _raise_load_errors({namespace: future.exception() for namespace, future in futures.items()})
+
+    async def _aload_config(self, namespace: str) -> None:
         """
-        for namespace, config in self.configs.items():
-            if config is None:
-                self.configs[namespace] = self.loaders[namespace].load()
+        Loads the configuration of a namespace without blocking the event loop.
+        Asynchronous loaders are awaited, synchronous loaders run in the default executor of the event loop.
+        :param namespace: Configuration namespace.
+        """
+        loader = self.loaders[namespace]
+        start = time.perf_counter()
+        if isinstance(loader, AsyncConfigLoader):
+            config = await loader.aload()
+        else:
+            config = await asyncio.get_running_loop().run_in_executor(None, loader.load)
+        if self._instrumentation is not None:
+            self._instrumentation.on_load(namespace, time.perf_counter() - start, config)
+
+        with self._namespace_locks[namespace]:
+            if self.configs[namespace] is None:
+                self.configs[namespace] = config
 
-    def _merge_configs(self) -> ConfigDict:
+    async def aload(self) -> None:
+        """
+        Loads all the configurations concurrently and merges them, without blocking the event loop.
+
+        Once this coroutine completes, accessing the config store does not perform any I/O:
+        >>> await config_store.aload()
+        >>> db_host = config_store.db.HOST
+
+        :raise: The exception raised by the loader if one loader fails, or a ConfigLoadErrors exception that
+                contains all the errors if several loaders fail.
+        """
+        namespaces = [namespace for namespace, config in self.configs.items() if config is None]
+        results = await asyncio.gather(
+            *(self._aload_config(namespace) for namespace in namespaces), return_exceptions=True
+        )
+        _raise_load_errors(dict(zip(namespaces, results)))
+
+        if self.merged_config is None:
+            await asyncio.get_running_loop().run_in_executor(None, self._get_merged_config)
+
+    def _merge_configs(self) -> Mapping[str, Any]:
         """
         Merges all the configurations in a single ConfigDict object. In case of conflict, the configurations that
         were added last take precedence.
-        :return: The merged ConfigDict object.
+        :return: The merged ConfigDict object, or a CompactConfigDict object if the store is compact.
         """
         self._load_all_configs()
-        return reduce(merge_configs, (ConfigDict(), *self.configs.values()))
 
-    def __getattr__(self, item: str) -> Any:
+        if self._parent is not None:
+            merged_config = self._merge_derived_configs(self._loaded_configs().values())
+            self._layer_merges = [merged_config]
+            return merged_config
+
+        if self._compact:
+            compact_configs, compact_merged_config = self._merge_compact_configs(self._loaded_configs())
+            for namespace, config in compact_configs.items():
+                with self._namespace_locks[namespace]:
+                    self.configs[namespace] = config
+            self._layer_merges = []
+            return compact_merged_config
+
+        if self._shared_path is not None:
+            # Only the shared file is kept, the intermediate merges would be copied in each process
+            self._layer_merges = []
+            return merge_layers(self._loaded_configs().values(), dict_type=ConfigDict)
+
+        layer_merges = []
+        merged_config = ConfigDict()
+        for layer in self._loaded_configs().values():
+            merged_config = merge_layers((merged_config, layer), dict_type=ConfigDict)
+            layer_merges.append(merged_config)
+
+        self._layer_merges = layer_merges
+        return merged_config
+
+    def _merge_compact_configs(
+        self, configs: Dict[str, Mapping[str, Any]]
+    ) -> Tuple[Dict[str, CompactConfigDict], CompactConfigDict]:
+        """
+        Compacts configurations and merges them. The configurations and the merged configuration share their
+        identical values and subtrees.
+        :param configs: Configurations, by namespace, in the order of the layers.
+        :return: The compact configurations and the compact merged configuration.
+        """
+        pool = CompactionPool()
+        compact_configs = {namespace: pool.compact(config) for namespace, config in configs.items()}
+        merged_config = merge_layers(
+            compact_configs.values(), dict_type=ConfigDict, node_types=(dict, CompactConfigDict)
+        )
+        return compact_configs, pool.compact(merged_config)
+
+    def _merge_derived_configs(self, configs: Iterable[Mapping[str, Any]]) -> ConfigDict:
+        """
+        Merges the configurations of a derived store on top of the merged configuration of its parent store. Only the
+        nodes on the paths of the configurations are copied, all the other subtrees are shared with the parent.
+        :param configs: Configurations of the derived store, in the order of the layers.
+        :return: The merged configuration.
+        """
+        parent = self._parent
+        if self._follow_parent or self._base_config is None:
+            # The merged configuration and the path index of the parent must match
+            with parent._lock:  # type: ignore
+                self._base_config = parent._get_merged_config()  # type: ignore
+                self._base_path_index = parent._path_index  # type: ignore
+
+        return merge_layers(
+            (self._base_config, *configs), dict_type=ConfigDict, node_types=(dict, FrozenConfigDict)  # type: ignore
+        )
+
+    def _remerge_configs(self, new_configs: Dict[str, Mapping[str, Any]]) -> Tuple[List[ConfigDict], List[ConfigPath]]:
+        """
+        Merges the configurations again after some of them changed.
+
+        Only the layers at or above the lowest changed configuration are merged again, and only at the paths that
+        changed in the configurations. All the other subtrees are shared with the previous merges.
+
+        :param new_configs: New configurations, by namespace.
+        :return: The merges of the configurations up to each layer, and the paths that may have changed in the
+                 merged configuration.
+        """
+        namespaces = list(self.configs)
+        first_index = min(namespaces.index(namespace) for namespace in new_configs)
+
+        layer_merges = self._layer_merges[:first_index]
+        lower_config = layer_merges[-1] if layer_merges else ConfigDict()
+        changed_paths: List[ConfigPath] = []
+
+        for index in range(first_index, len(namespaces)):
+            old_config = self.configs[namespaces[index]]
+            # A namespace that was never loaded did not contribute to the previous merges
+            previous_layer = old_config if old_config is not None else ConfigDict()
+            config = new_configs.get(namespaces[index], previous_layer)
+            if config is not previous_layer:
+                changed_paths = minimal_paths([*changed_paths, *diff_paths(previous_layer, config)])
+
+            lower_config = remerge_paths(self._layer_merges[index], lower_config, config, changed_paths)
+            layer_merges.append(lower_config)
+
+        return layer_merges, changed_paths
+
+    def _publish(
+        self, merged_config: Mapping[str, Any], changed_paths: Optional[List[ConfigPath]] = None
+    ) -> Optional[List[ConfigPath]]:
+        """
+        Sets the merged configuration of the store and rebuilds the path index accordingly.
+        Must be called with the store lock held.
+        :param merged_config: The new merged configuration.
+        :param changed_paths: Paths of the subtrees that may differ from the current merged configuration, if known.
+                              Used to update the path index and the frozen configuration incrementally.
+        :return: The paths of the subtrees that may differ from the previous merged configuration, if known.
+        """
+        if self._interpolator is not None:
+            merged_config, changed_paths = self._interpolator.interpolate(merged_config, changed_paths)
+
+        if self._shared_path is not None:
+            if self.schema is not None:
+                self._typed_config = compile_config(self.schema, merged_config)
+            write_shared_config(merged_config, self._shared_path)
+            shared_config = open_shared_config(self._shared_path)
+            self._path_index = SharedPathIndex(shared_config)
+            self._handles.refresh(self._path_index, changed_paths if self.merged_config is not None else None)
+            self.merged_config = shared_config
+            return changed_paths
+
+        previous_config = self.merged_config
+        # Changes are only applied incrementally to a previous merged configuration
+        if previous_config is None:
+            changed_paths = None
+
+        if self._freeze and not self._compact:
+            if previous_config is not None and changed_paths is not None:
+                merged_config = replace_paths(
+                    previous_config,
+                    {path: freeze_config(get_path(merged_config, path, DELETED)) for path in changed_paths},
+                )
+            else:
+                merged_config = freeze_config(merged_config)
+
+        if self.schema is not None:
+            self._typed_config = compile_config(self.schema, merged_config)
+
+        if self._compact:
+            self._path_index = CompactPathIndex(merged_config)
+        elif self._base_config is not None:
+            # Derived store, see `_merge_derived_configs`
+            self._path_index = LayeredPathIndex(self._base_path_index, self._base_config, merged_config)
+        elif previous_config is not None and changed_paths is not None:
+            self._path_index = update_path_index(self._path_index, previous_config, merged_config, changed_paths)
+        else:
+            self._path_index = build_path_index(merged_config)
+        self._path_trie = None
+        self._handles.refresh(self._path_index, changed_paths)
+        self.merged_config = merged_config
+        return changed_paths
+
+    def _get_merged_config(self) -> Mapping[str, Any]:
+        """
+        Returns the merged configuration, loading and merging the configurations on first access.
+        :return: The merged configuration. This is a FrozenConfigDict object if the store is frozen, a
+                 CompactConfigDict object if the store is compact, a SharedConfigDict object if the store is shared
+                 and a ConfigDict object otherwise.
+        """
+        merged_config = self.merged_config
+        if merged_config is None:
+            with self._lock:
+                if self.merged_config is None:
+                    if self._instrumentation is None:
+                        self._publish(self._merge_configs())
+                    else:
+                        self._load_all_configs()
+                        start = time.perf_counter()
+                        self._publish(self._merge_configs())
+                        self._instrumentation.on_merge(time.perf_counter() - start, incremental=False)
+                merged_config = self.merged_config
+
+        return merged_config  # type: ignore  # Set by _publish
+
+    def overlay(self) -> OverlayConfig:
+        """
+        Returns a lazy view of the merged configuration.
+
+        Unlike the merged configuration, the view does not load and merge all the configurations on first access.
+        Values are looked up in the configurations from the last added to the first one, and configurations are
+        only loaded when a lookup reaches them. Subtrees are merged when they are accessed and then memoized.
+        This is useful for short-lived processes that only read a few values:
+        >>> log_level = config_store.overlay().get("log.LEVEL")
+
+        :return: The lazy view of the merged configuration. The view is shared by all the callers.
+        :raise: A ConfigStoreException if the store interpolates values, since the view does not resolve references.
+        """
+        if self._interpolator is not None:
+            raise ConfigStoreException("Config stores that interpolate values do not support lazy views.")
+
+        overlay = self._overlay
+        if overlay is None:
+            with self._lock:
+                if self._overlay is None:
+                    self._overlay = OverlayConfig(self._all_namespaces(), self._load_any_config, freeze=self._freeze)
+                overlay = self._overlay
+
+        return overlay
+
+    def typed(self, namespace: Optional[str] = None) -> Any:
+        """
+        Returns a typed configuration, validated and compiled from a schema.
+
+        Typed configurations are objects with one slot per field of the schema, so reading a value costs the same
+        as any attribute access:
+        >>> config_store = ConfigStore(schema=AppConfig)
+        >>> db_port = config_store.typed().db.PORT
+
+        :param namespace: Namespace of the configuration. Defaults to the merged configuration.
+        :return: The typed configuration. It is compiled again when the configuration is reloaded.
+        :raise: A ConfigStoreException if no schema is defined for the configuration, a ConfigSchemaException if the
+                configuration does not match the schema.
+        """
+        if namespace is None:
+            if self.schema is None:
+                raise ConfigStoreException("No schema is defined for the merged configuration.")
+            self._get_merged_config()
+            return self._typed_config
+
+        schema = self.schemas[namespace]
+        if schema is None:
+            raise ConfigStoreException(f"No schema is defined for configuration namespace '{namespace}'.")
+
+        config = self._load_config(namespace)
+        typed_config = self._typed_configs.get(namespace)
+        if typed_config is None or typed_config[0] is not config:
+            typed_config = (config, compile_config(schema, config, path_from_root=f"$.{namespace}."))
+            self._typed_configs[namespace] = typed_config
+        return typed_config[1]
+
+    def reload(self, namespaces: Optional[Iterable[str]] = None) -> None:
+        """
+        Reloads configurations and publishes the new merged configuration.
+
+        The new merged configuration replaces the previous one atomically: the previous configuration objects are
+        never modified, so readers see either the whole old configuration or the whole new one.
+        If a loader fails, the error is raised and the configurations of the store are left untouched.
+
+        Once the new configuration is published, the subscribers to the paths that changed are notified, see
+        `subscribe`.
+
+        :param namespaces: Namespaces to reload. Defaults to all the namespaces that are already loaded.
+                           Namespaces that are not loaded yet are ignored, they will be loaded on first access.
+        """
+        previous_config = None
+        with self._lock:
+            if namespaces is None:
+                namespaces = self.configs
+            new_configs: Dict[str, Mapping[str, Any]] = {
+                namespace: self._call_loader(namespace)
+                for namespace in namespaces
+                if self.configs[namespace] is not None
+            }
+            if not new_configs:
+                return
+
+            # Merge before updating the store so that it is left untouched if the merge fails
+            if self.merged_config is not None:
+                start = time.perf_counter()
+                configs = self._loaded_configs({**self.configs, **new_configs})
+                merged_config: Mapping[str, Any]
+                layer_merges: List[ConfigDict]
+                changed_paths: Optional[List[ConfigPath]]
+                if self._compact:
+                    compact_configs, merged_config = self._merge_compact_configs(configs)
+                    # All the configurations are compacted again with the new pool
+                    new_configs = dict(compact_configs)
+                    layer_merges, changed_paths = [], None
+                elif self._parent is not None:
+                    merged_config = self._merge_derived_configs(configs.values())
+                    layer_merges, changed_paths = [merged_config], None
+                elif self._shared_path is not None:
+                    merged_config = merge_layers(configs.values(), dict_type=ConfigDict)
+                    layer_merges, changed_paths = [], None
+                else:
+                    layer_merges, changed_paths = self._remerge_configs(new_configs)
+                    merged_config = layer_merges[-1]
+                previous_config = self.merged_config
+                # Publish first, the new configuration may not match the schema of the store
+                try:
+                    published_paths = self._publish(merged_config, changed_paths)
+                except BaseException:
+                    if self._interpolator is not None:
+                        # The interpolator already moved to the new configuration
+                        self._interpolator.reset()
+                    raise
+                self._layer_merges = layer_merges
+                # The published configuration may be frozen or interpolated
+                merged_config = self._get_merged_config()
+                if self._instrumentation is not None:
+                    self._instrumentation.on_merge(time.perf_counter() - start, incremental=changed_paths is not None)
+
+            for namespace, config in new_configs.items():
+                with self._namespace_locks[namespace]:
+                    self.configs[namespace] = config
+            if self._overlay is not None:
+                self._overlay.invalidate()
+
+        # Subscribers are notified without holding the lock, so that they can safely read the store
+        if previous_config is not None:
+            self._notify(previous_config, merged_config, published_paths)
+
+    def _notify(
+        self,
+        previous_config: Mapping[str, Any],
+        merged_config: Mapping[str, Any],
+        changed_paths: Optional[List[ConfigPath]],
+    ) -> None:
+        """
+        Notifies the subscribers and merges the derived stores again after a new merged configuration was published.
+        Must be called without holding the store lock.
+        :param previous_config: Previous merged configuration.
+        :param merged_config: New merged configuration.
+        :param changed_paths: Paths of the subtrees that may differ between both configurations, if known.
+        """
+        if len(self._subscriptions):
+            diff = diff_configs(previous_config, merged_config, changed_paths)
+            if not diff.is_empty():
+                self._subscriptions.notify(diff)
+
+        with self._lock:
+            derived_stores = list(self._derived_stores)
+        for derived_store in derived_stores:
+            try:
+                derived_store._rebase()
+            except Exception:
+                LOGGER.exception(
+                    "Cannot merge the derived config store %r again, it keeps its configuration.", derived_store
+                )
+
+    def _rebase(self) -> None:
+        """
+        Merges the configurations of a derived store again after its parent published a new merged configuration.
+        """
+        with self._lock:
+            if self._overlay is not None:
+                self._overlay.invalidate()
+            previous_config = self.merged_config
+            if previous_config is None:
+                return  # Merged on first access
+
+            self._publish(self._merge_configs())
+            merged_config = self._get_merged_config()
+
+        self._notify(previous_config, merged_config, None)
+
+    def derive(
+        self,
+        namespace: str,
+        loader: ConfigLoader,
+        schema: Optional[type] = None,
+        follow: bool = True,
+        inherit_schema: bool = False,
+    ) -> "ConfigStore":
+        """
+        Creates a store whose configuration is the merged configuration of this store, overridden by one more layer.
+        For example, the configuration of a tenant:
+        >>> tenant_store = config_store.derive("tenant", YamlConfigLoader(f"tenants/{tenant}.yaml"))
+        >>> db_host = tenant_store.db.HOST
+
+        The configurations of this store are loaded and merged once for all the derived stores. The merged
+        configuration of a derived store only copies the nodes on the paths of its own layers and shares all the other
+        subtrees with the merged configuration of this store, and its path index only indexes these paths. Memory and
+        merge time per derived store grow with the size of its layers, not with the size of the configuration.
+
+        Derived stores have the `freeze` option of this store, and more layers can be added to them with `add`. The
+        configurations of this store are accessible by namespace, ex: `tenant_store["base"]`. Once a store is derived,
+        no configuration can be added to it. Stores that are shared, compact or that interpolate values cannot be
+        derived.
+
+        :param namespace: Namespace of the configuration of the derived store.
+        :param loader: Loader of the configuration.
+        :param schema: Optional schema of the configuration, see `add`.
+        :param follow: Whether the derived store is merged again each time this store publishes a new merged
+                       configuration, ex: after a reload. Its subscribers are notified of the changes, see `subscribe`.
+                       This store only keeps weak references to its derived stores.
+        :param inherit_schema: Whether the derived store has the schema of this store, see `typed`. Compiling the
+                               schema converts the whole merged configuration of the derived store, so its merge time
+                               then grows with the size of the configuration.
+        :return: The derived store.
+        :raise: A ConfigStoreException if this store cannot be derived or if the namespace is already used.
+        """
+        if self._shared_path is not None or self._compact or self._interpolator is not None:
+            raise ConfigStoreException("Config stores that are shared, compact or that interpolate cannot be derived.")
+
+        derived_store = ConfigStore(freeze=self._freeze, schema=self.schema if inherit_schema else None)
+        derived_store._parent = self
+        derived_store._follow_parent = follow
+        with self._lock:
+            self._derived = True
+        derived_store.add(namespace, loader, schema)
+        if follow:
+            with self._lock:
+                self._derived_stores.add(derived_store)
+        return derived_store
+
+    def _all_namespaces(self) -> List[str]:
+        """
+        :return: The namespaces of the store, including the namespaces of the store it is derived from, in the order
+                 of the layers.
+        """
+        namespaces = self._parent._all_namespaces() if self._parent is not None else []
+        return [*namespaces, *self.loaders]
+
+    def _load_any_config(self, namespace: str) -> Mapping[str, Any]:
+        """
+        Loads the configuration of a namespace of the store or of the store it is derived from. See `_load_config`.
+        """
+        if namespace in self.loaders or self._parent is None:
+            return self._load_config(namespace)
+        return self._parent._load_any_config(namespace)
+
+    def subscribe(self, pattern: str, callback: SubscriberCallback) -> Subscription:
+        """
+        Subscribes to the changes of the merged configuration at the paths that match a pattern, ex: to rebuild a
+        connection pool when its settings change:
+        >>> config_store.subscribe("db.*", lambda diff: db_pool.rebuild(config_store.db))
+
+        The callback is called after each reload that changes a matching path, with the added, removed and changed
+        paths (as tuples of keys) that concern the subscriber. See `conflex.subscriptions.Subscriptions.subscribe`
+        for the matching rules.
+
+        :param pattern: Path pattern, where `*` matches any key.
+        :param callback: Function called with a `ConfigDiff` object.
+        :return: The subscription, which can be cancelled with `Subscription.unsubscribe`.
+        """
+        return self._subscriptions.subscribe(pattern, callback)
+
+    def bind(self, path: str, default: Any = None) -> ConfigHandle:
+        """
+        Returns a handle on the value of the merged configuration at a path, for code that reads it repeatedly:
+        >>> db_host = config_store.bind("db.HOST", default="localhost")
+        >>> connect(db_host.value)
+
+        Reading `value` costs one attribute read. The store refreshes its handles each time it publishes a new merged
+        configuration, ex: after a reload, and only the handles of the changed paths, of their ancestors and of their
+        descendants are refreshed. The store keeps weak references to its handles and the handles keep a weak
+        reference to the store. See `conflex.handles`.
+
+        :param path: Path of the configuration variable or namespace, ex: "db.HOST".
+        :param default: Value of the handle while the path does not exist.
+        :return: The handle, which can be unbound with `ConfigHandle.unbind`.
+        :raise: A ValueError if the path is empty.
+        """
+        if not path:
+            raise ValueError("Empty configuration path.")
+        if self.merged_config is None:
+            self._get_merged_config()
+        if self._on_access is not None:
+            self._on_access(path)
+
+        handle = ConfigHandle(self, path, default)
+        # Set the value and register the handle atomically with regard to the publication of merged configurations
+        with self._lock:
+            handle.value = self._path_index.get(path, default)
+            self._handles.add(handle)
+        return handle
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """
+        Returns the value of the merged configuration at the specified path.
+
+        Paths are made of keys separated by dots, ex: `config_store.get("db.HOST")` returns the same value as
+        `config_store.db.HOST`. The lookup is served by a flat index of the merged configuration.
+
+        :param path: Path of the configuration variable or namespace.
+        :param default: Value to return if the path does not exist.
+        :return: The value at the specified path, or `default`.
+        """
+        if self.merged_config is None:
+            self._get_merged_config()
+        if self._on_access is not None:
+            self._on_access(path)
+
+        return self._path_index.get(path, default)
+
+    def get_many(self, paths: Iterable[str], default: Any = None) -> List[Any]:
+        """
+        Returns the values of the merged configuration at the specified paths. See `get`.
+
+        :param paths: Paths of the configuration variables or namespaces.
+        :param default: Value to return for paths that do not exist.
+        :return: The list of values, in the same order as `paths`.
+        """
         if self.merged_config is None:
-            self.merged_config = self._merge_configs()
+            self._get_merged_config()
+        if self._on_access is not None:
+            paths = list(paths)
+            for path in paths:
+                self._on_access(path)
+
+        path_index = self._path_index
+        return [path_index.get(path, default) for path in paths]
+
+    def select(self, pattern: str) -> Dict[str, Any]:
+        """
+        Returns the values of the merged configuration whose path matches a pattern, ex:
+        >>> config_store.select("services.*.TIMEOUT")
+        {"services.api.TIMEOUT": 10, "services.worker.TIMEOUT": 60}
+
+        `*` matches any key and `**` any number of keys, including none. Queries are served by an index of the paths
+        of the merged configuration, built on the first query after each change of the configuration, and the
+        results of repeated patterns are cached. See `conflex.path_trie.PathTrie`.
+
+        :param pattern: Path pattern, ex: "services.*.TIMEOUT" or "tenants.**.HOST".
+        :return: The matching values by path, in the order of the merged configuration.
+        :raise: A ValueError if the pattern is empty.
+        """
+        merged_config = self._get_merged_config()
+        if self._on_access is not None:
+            self._on_access(pattern)
+
+        path_trie = self._path_trie
+        # The trie is replaced when the merged configuration changes, even by a concurrent reload
+        if path_trie is None or path_trie.config is not merged_config:
+            path_trie = self._path_trie = PathTrie(merged_config)
+        return path_trie.select(pattern)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the statistics recorded by the instrumentation of the store, ex: the load time of each configuration.
+        See `conflex.instrumentation.StatsInstrumentation.stats` for the format of the statistics.
+        :return: The statistics, or an empty dictionary if the store is not instrumented.
+        """
+        if self._instrumentation is None:
+            return {}
+        return self._instrumentation.stats()
 
-        return getattr(self.merged_config, item)
+    def __getattr__(self, item: str) -> Any:
+        if self._on_access is not None:
+            # Only the top-level key is recorded, nested attributes are read from the merged configuration
+            self._on_access(item)
+        return getattr(self._get_merged_config(), item)
+
+    def __getitem__(self, namespace) -> Mapping[str, Any]:
+        return self._load_any_config(namespace)
 
-    def __getitem__(self, namespace) -> ConfigDict:
-        if self.configs[namespace] is None:
-            self.configs[namespace] = self.loaders[namespace].load()
 
-        return self.configs[namespace]
+def _raise_load_errors(errors: Dict[str, Optional[BaseException]]) -> None:
+    """
+    Raises the errors that occurred while loading configurations, if any.
+
+    :param errors: Errors by namespace. None values indicate that the configuration was loaded successfully.
+    :raise: The error itself if only one namespace failed, or a ConfigLoadErrors exception if several failed.
+    """
+    failures: Dict[str, BaseException] = {namespace: error for namespace, error in errors.items() if error is not None}
+    if len(failures) == 1:
+        raise next(iter(failures.values()))
+    if failures:
+        raise ConfigLoadErrors(failures) from next(iter(failures.values()))
@@ -4,3 +4,26 @@ class ConfigLoaderException(Exception):
 
 class ConfigStoreException(Exception):
     ...
+
+
+class ConfigLoadErrors(ConfigStoreException):
+    """
+    Raised when the loaders of several namespaces fail. The individual errors are available in the `errors`
+    attribute, by namespace.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        details = "\n".join(f"* {namespace}: {error!r}" for namespace, error in errors.items())
+        super().__init__(f"Failed to load {len(errors)} configurations:\n{details}")
+
+
+class ConfigSchemaException(Exception):
+    ...
+
+
+class ConfigInterpolationException(ConfigStoreException):
+    """
+    Raised when a reference of the merged configuration cannot be resolved, ex: a reference to a missing value or
+    a circular reference.
+    """
@@ -0,0 +1,147 @@
+"""
+Handles on values of the merged configuration that stay current across reloads.
+
+A handle caches the value at a path, so that reading it costs one attribute read, and the config store refreshes
+it each time it publishes a new merged configuration:
+>>> db_host = config_store.bind("db.HOST", default="localhost")
+>>> connect(db_host.value)
+
+Handles are indexed in a trie of their paths, so a reload only refreshes the handles whose path is a changed path,
+one of its ancestors or one of its descendants. The store only keeps weak references to its handles and the handles
+only keep a weak reference to their store: unused handles are dropped from the store and handles do not keep the
+store alive.
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+from conflex.config_dict import ConfigPath
+
+
+class _TrieNode:
+    __slots__ = ("children", "handles")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.handles: "weakref.WeakSet[ConfigHandle]" = weakref.WeakSet()
+
+    def walk(self) -> Iterator["_TrieNode"]:
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+
+class ConfigHandle:
+    """
+    Value of the merged configuration at a path, refreshed by the config store after each change, see
+    `ConfigStore.bind`. Reads of `value` are not recorded by the instrumentation of the store.
+    """
+
+    __slots__ = ("value", "path", "default", "_store", "__weakref__")
+
+    def __init__(self, store: Any, path: str, default: Any = None):
+        """
+        :param store: Config store of the value.
+        :param path: Path of the configuration variable or namespace, ex: "db.HOST".
+        :param default: Value of the handle when the path does not exist.
+        """
+        self.value = default
+        self.path = path
+        self.default = default
+        self._store = weakref.ref(store)
+
+    @property
+    def store(self) -> Any:
+        """
+        :return: The config store of the value, or None if it was garbage collected.
+        """
+        return self._store()
+
+    def unbind(self) -> None:
+        """
+        Stops refreshing the handle, which keeps its current value. Does nothing if the handle is already unbound.
+        """
+        store = self._store()
+        if store is not None:
+            store._handles.remove(self)
+
+    def __repr__(self) -> str:
+        return f"ConfigHandle({self.path!r}, {self.value!r})"
+
+
+class ConfigHandles:
+    """
+    Registry of the handles of a config store, indexed in a trie of their paths.
+    """
+
+    def __init__(self, separator: str = "."):
+        """
+        :param separator: Separator between the keys of the paths.
+        """
+        self.separator = separator
+        self._root = _TrieNode()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(node.handles) for node in self._root.walk())
+
+    def add(self, handle: ConfigHandle) -> None:
+        """
+        Registers a handle, which is dropped from the registry when it is garbage collected.
+        """
+        with self._lock:
+            node = self._root
+            for key in handle.path.split(self.separator):
+                node = node.children.setdefault(key, _TrieNode())
+            node.handles.add(handle)
+
+    def remove(self, handle: ConfigHandle) -> None:
+        """
+        Unregisters a handle. Does nothing if the handle is not registered.
+        """
+        with self._lock:
+            node: Optional[_TrieNode] = self._root
+            for key in handle.path.split(self.separator):
+                node = node.children.get(key)  # type: ignore
+                if node is None:
+                    return
+            node.handles.discard(handle)  # type: ignore
+
+    def _match(self, changed_paths: Optional[Iterable[ConfigPath]]) -> Set[ConfigHandle]:
+        """
+        Returns the handles concerned by changes at paths: the handles of the changed paths, of their ancestors, whose
+        values are new nodes, and of their descendants. All the handles are concerned if the paths are unknown.
+        """
+        if changed_paths is None:
+            return {handle for node in self._root.walk() for handle in node.handles}
+
+        handles: Set[ConfigHandle] = set()
+        for path in changed_paths:
+            node: Optional[_TrieNode] = self._root
+            for key in path:
+                node = node.children.get(str(key))  # type: ignore
+                if node is None:
+                    break
+                handles.update(node.handles)
+            else:
+                for descendant in node.walk():  # type: ignore
+                    handles.update(descendant.handles)
+
+        return handles
+
+    def refresh(self, path_index: Any, changed_paths: Optional[Iterable[ConfigPath]] = None) -> None:
+        """
+        Updates the values of the handles concerned by changes of the merged configuration.
+
+        :param path_index: Path index of the new merged configuration, see `build_path_index`.
+        :param changed_paths: Paths of the subtrees that may differ from the previous merged configuration, or None
+                              to refresh all the handles.
+        """
+        with self._lock:
+            handles = self._match(changed_paths)
+            for handle in handles:
+                handle.value = path_index.get(handle.path, handle.default)
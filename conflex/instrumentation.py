@@ -0,0 +1,175 @@
+"""
+Instrumentation of the config store.
+
+An Instrumentation object receives the events of a config store: the load of each configuration, the merges and,
+optionally, the accesses to configuration values. `StatsInstrumentation` aggregates them in statistics and forwards
+them as metrics to callbacks:
+>>> instrumentation = StatsInstrumentation(track_access=True, callbacks=[statsd_callback])
+>>> config_store = ConfigStore(instrumentation=instrumentation)
+>>> config_store.stats()["loads"]["secrets"]["last_time"]
+0.0123
+
+When a config store is not instrumented, the hooks cost one attribute check each.
+"""
+
+import itertools
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Mapping
+
+# Callbacks take the name of the metric, its value and tags that describe it, ex: {"namespace": "secrets"}
+MetricCallback = Callable[[str, float, Dict[str, str]], None]
+
+
+def count_values(config: Any) -> int:
+    """
+    Counts the leaf values of a configuration.
+    :param config: Configuration dictionary.
+    :return: The number of values that are not dictionaries.
+    """
+    count = 0
+    stack = [config]
+    while stack:
+        node = stack.pop()
+        for value in node.values():
+            if isinstance(value, Mapping):
+                stack.append(value)
+            else:
+                count += 1
+
+    return count
+
+
+class Instrumentation:
+    """
+    Base class of the instrumentations of the config store. Hooks do nothing by default.
+    """
+
+    # Whether the config store should report accesses to configuration values, see `on_access`
+    track_access = False
+
+    def on_load(self, namespace: str, duration: float, config: Mapping[Any, Any]) -> None:
+        """
+        Called after a configuration is loaded.
+
+        :param namespace: Configuration namespace.
+        :param duration: Wall time of the call to the loader, in seconds.
+        :param config: Loaded configuration.
+        """
+
+    def on_merge(self, duration: float, incremental: bool) -> None:
+        """
+        Called after the configurations are merged and the merged configuration is published.
+
+        :param duration: Wall time of the merge, in seconds. Does not include the loads.
+        :param incremental: Whether the merge was an incremental merge after a reload.
+        """
+
+    def on_access(self, path: str) -> None:
+        """
+        Called when a value of the merged configuration is accessed, if `track_access` is set.
+        Called in the hot path of the config store, so it must be as fast as possible.
+
+        Accesses through `ConfigStore.get`, `get_many` and `bind` report the full path of the value, and `select`
+        reports its pattern. Attribute accesses, ex: `config_store.db.HOST`, only report the top-level key ("db"):
+        the nested attributes are read from the merged configuration itself, without going through the store.
+
+        :param path: Path of the value, ex: "db.HOST".
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the statistics recorded by the instrumentation.
+        """
+        return {}
+
+
+class StatsInstrumentation(Instrumentation):
+    """
+    Instrumentation that records statistics and forwards metrics to callbacks.
+
+    Metrics sent to the callbacks:
+    * conflex.load.duration / conflex.load.size (number of values), tagged with the namespace;
+    * conflex.merge.duration, tagged with "incremental": "true" or "false";
+    * conflex.access.count, tagged with the path, if `track_access` is set. Only sampled accesses are sent,
+      with the number of accesses they represent as value.
+    """
+
+    def __init__(
+        self,
+        track_access: bool = False,
+        access_sample_interval: int = 100,
+        callbacks: Iterable[MetricCallback] = (),
+    ):
+        """
+        :param track_access: Whether accesses to configuration values should be counted.
+        :param access_sample_interval: Only one access out of `access_sample_interval` is recorded, to keep the
+                                       overhead low in hot paths. Access counts are estimated accordingly.
+        :param callbacks: Functions called with each metric, see the class documentation.
+        """
+        self.track_access = track_access
+        self.access_sample_interval = access_sample_interval
+        self.callbacks = list(callbacks)
+        self._lock = threading.Lock()
+        self._loads: Dict[str, Dict[str, Any]] = {}
+        self._merges: Dict[str, Any] = {"count": 0, "incremental_count": 0, "total_time": 0.0, "last_time": None}
+        self._access_counter = itertools.count()
+        self._access_counts: Counter = Counter()
+
+    def _emit(self, metric: str, value: float, tags: Dict[str, str]) -> None:
+        for callback in self.callbacks:
+            callback(metric, value, tags)
+
+    def on_load(self, namespace: str, duration: float, config: Mapping[Any, Any]) -> None:
+        size = count_values(config)
+        with self._lock:
+            load_stats = self._loads.setdefault(namespace, {"count": 0, "total_time": 0.0})
+            load_stats["count"] += 1
+            load_stats["total_time"] += duration
+            load_stats["last_time"] = duration
+            load_stats["size"] = size
+
+        tags = {"namespace": namespace}
+        self._emit("conflex.load.duration", duration, tags)
+        self._emit("conflex.load.size", size, tags)
+
+    def on_merge(self, duration: float, incremental: bool) -> None:
+        with self._lock:
+            self._merges["count"] += 1
+            self._merges["incremental_count"] += incremental
+            self._merges["total_time"] += duration
+            self._merges["last_time"] = duration
+
+        self._emit("conflex.merge.duration", duration, {"incremental": "true" if incremental else "false"})
+
+    def on_access(self, path: str) -> None:
+        if next(self._access_counter) % self.access_sample_interval:
+            return
+
+        with self._lock:
+            self._access_counts[path] += self.access_sample_interval
+        self._emit("conflex.access.count", self.access_sample_interval, {"path": path})
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the recorded statistics:
+        * loads: statistics of the loads by namespace: number of loads, total and last wall time in seconds and
+          number of values of the last loaded configuration;
+        * merges: number of merges (and incremental merges), total and last wall time in seconds;
+        * accesses: estimated number of accesses by path, from the most accessed to the least accessed.
+        """
+        with self._lock:
+            return {
+                "loads": {namespace: dict(load_stats) for namespace, load_stats in self._loads.items()},
+                "merges": dict(self._merges),
+                "accesses": dict(self._access_counts.most_common()),
+            }
+
+    def reset(self) -> None:
+        """
+        Clears the recorded statistics.
+        """
+        with self._lock:
+            self._loads = {}
+            self._merges = {"count": 0, "incremental_count": 0, "total_time": 0.0, "last_time": None}
+            self._access_counts = Counter()
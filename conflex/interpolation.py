@@ -0,0 +1,237 @@
+"""
+Interpolation of references in the merged configuration.
+
+String values can reference other values of the merged configuration by path, whatever the layer that defines them:
+>>> interpolator = Interpolator()
+>>> config, _ = interpolator.interpolate({"db": {"HOST": "localhost", "URL": "postgres://${db.HOST}/app"}})
+>>> config["db"]["URL"]
+'postgres://localhost/app'
+
+A value that only contains a reference is replaced by the referenced value itself, so `"${db.PORT}"` is resolved to
+an integer if `db.PORT` is an integer. Items of lists are interpolated as well. In values that contain
+references, `$$` is an escaped `$`, ex: `"$${HOME}"` is resolved to `"${HOME}"`.
+
+The interpolator keeps a dependency graph of the values that contain references (the templates) and memoizes their
+resolved values. When the configuration changes, only the templates that depend on the changed paths, directly or
+through other templates, are resolved again.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from conflex.config_dict import DELETED, ConfigPath, get_path, minimal_paths, replace_paths
+from conflex.exc import ConfigInterpolationException
+
+_MISSING = object()
+
+_REFERENCE = re.compile(r"\$\$|\$\{([^{}]*)\}")
+
+
+def _is_template(value: Any) -> bool:
+    if isinstance(value, str):
+        return "${" in value
+    if isinstance(value, (list, tuple)):
+        return any(isinstance(item, str) and "${" in item for item in value)
+    return False
+
+
+def _find_templates(config: Any, prefix: ConfigPath, templates: Dict[ConfigPath, Any]) -> None:
+    """
+    Adds the templates of a configuration subtree to `templates`, by path.
+    """
+    if not isinstance(config, Mapping):
+        if _is_template(config):
+            templates[prefix] = config
+        return
+
+    stack = [(prefix, config)]
+    while stack:
+        prefix, node = stack.pop()
+        for k, v in node.items():
+            if isinstance(v, Mapping):
+                stack.append(((*prefix, k), v))
+            elif _is_template(v):
+                templates[(*prefix, k)] = v
+
+
+class Interpolator:
+    """
+    Resolves the references of successive versions of a configuration, see the module documentation.
+    """
+
+    def __init__(self, separator: str = "."):
+        """
+        :param separator: Separator between the keys of the paths of references.
+        """
+        self.separator = separator
+        self._config: Any = None
+        # Template values by path, and the paths referenced by each template
+        self._templates: Dict[ConfigPath, Any] = {}
+        self._references: Dict[ConfigPath, List[ConfigPath]] = {}
+        # Templates that reference a path, and templates that reference a path inside a subtree
+        self._dependents: Dict[ConfigPath, Set[ConfigPath]] = {}
+        self._subtree_dependents: Dict[ConfigPath, Set[ConfigPath]] = {}
+        self._resolved: Dict[ConfigPath, Any] = {}
+
+    def _format_path(self, path: ConfigPath) -> str:
+        return self.separator.join(str(key) for key in path)
+
+    def _add_template(self, path: ConfigPath, template: Any) -> None:
+        items = [template] if isinstance(template, str) else template
+        references = [
+            tuple(match.group(1).split(self.separator))
+            for item in items
+            if isinstance(item, str)
+            for match in _REFERENCE.finditer(item)
+            if match.group(1) is not None
+        ]
+        self._templates[path] = template
+        self._references[path] = references
+        for reference in references:
+            self._dependents.setdefault(reference, set()).add(path)
+            for depth in range(1, len(reference)):
+                self._subtree_dependents.setdefault(reference[:depth], set()).add(path)
+
+    def _remove_template(self, path: ConfigPath) -> None:
+        del self._templates[path]
+        self._resolved.pop(path, None)
+        for reference in self._references.pop(path):
+            self._dependents[reference].discard(path)
+            for depth in range(1, len(reference)):
+                self._subtree_dependents[reference[:depth]].discard(path)
+
+    def reset(self) -> None:
+        """
+        Forgets the previous configuration, so that the next call to `interpolate` resolves all the templates again.
+        """
+        self._config = None
+        self._templates, self._references, self._resolved = {}, {}, {}
+        self._dependents, self._subtree_dependents = {}, {}
+
+    def _affected_templates(self, changed_paths: Iterable[ConfigPath]) -> Set[ConfigPath]:
+        """
+        Lists the templates that depend on changed paths, directly or through other templates.
+        """
+        affected: Set[ConfigPath] = set()
+        stack = list(changed_paths)
+        while stack:
+            path = stack.pop()
+            dependents = set(self._dependents.get(path, ()))
+            dependents.update(self._subtree_dependents.get(path, ()))
+            for depth in range(1, len(path)):
+                dependents.update(self._dependents.get(path[:depth], ()))
+
+            for template_path in dependents - affected:
+                affected.add(template_path)
+                stack.append(template_path)
+
+        return affected
+
+    def _resolve(self, path: ConfigPath, config: Mapping[Any, Any], resolving: List[ConfigPath]) -> Any:
+        """
+        Resolves a template, resolving first the templates it references.
+        :param path: Path of the template.
+        :param config: Configuration that contains the template.
+        :param resolving: Templates that are being resolved, used to detect circular references.
+        :return: The resolved value.
+        """
+        value = self._resolved.get(path, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        if path in resolving:
+            cycle = " -> ".join(self._format_path(p) for p in [*resolving[resolving.index(path) :], path])
+            raise ConfigInterpolationException(f"Circular reference at '{self._format_path(path)}': {cycle}.")
+
+        resolving.append(path)
+        template = self._templates[path]
+        if isinstance(template, str):
+            value = self._render(template, path, config, resolving)
+        else:
+            value = type(template)(
+                self._render(item, path, config, resolving) if isinstance(item, str) else item for item in template
+            )
+        resolving.pop()
+
+        self._resolved[path] = value
+        return value
+
+    def _render(self, template: str, path: ConfigPath, config: Mapping[Any, Any], resolving: List[ConfigPath]) -> Any:
+        def lookup(reference: str) -> Any:
+            reference_path = tuple(reference.split(self.separator))
+            if reference_path in self._templates:
+                return self._resolve(reference_path, config, resolving)
+
+            value = get_path(config, reference_path, _MISSING)
+            if value is _MISSING or isinstance(value, Mapping):
+                reason = "no such value" if value is _MISSING else "cannot reference a namespace"
+                raise ConfigInterpolationException(
+                    f"Invalid reference '${{{reference}}}' at '{self._format_path(path)}': {reason}."
+                )
+            return value
+
+        match = _REFERENCE.fullmatch(template)
+        if match is not None and match.group(1) is not None:
+            return lookup(match.group(1))
+
+        return _REFERENCE.sub(lambda m: "$" if m.group(1) is None else str(lookup(m.group(1))), template)
+
+    def interpolate(
+        self, config: Mapping[Any, Any], changed_paths: Optional[List[ConfigPath]] = None
+    ) -> Tuple[Mapping[Any, Any], Optional[List[ConfigPath]]]:
+        """
+        Resolves the references of a configuration.
+
+        :param config: Configuration dictionary. It is not modified.
+        :param changed_paths: Paths of the subtrees that changed since the previous call, see `diff_paths`.
+                              If set, only the templates in these subtrees and the templates that depend on them are
+                              resolved again. Otherwise, all the templates are resolved.
+        :return: The interpolated configuration, which shares all the subtrees without references with `config`
+                 (or with the previous interpolated configuration, if `changed_paths` is set), and the paths that may
+                 have changed in the interpolated configuration. The paths are None if all the templates were
+                 resolved again.
+        :raise: A ConfigInterpolationException if a reference is invalid or circular.
+        """
+        try:
+            if changed_paths is None or self._config is None:
+                self.reset()
+                templates: Dict[ConfigPath, Any] = {}
+                _find_templates(config, (), templates)
+                for path, template in templates.items():
+                    self._add_template(path, template)
+
+                resolving: List[ConfigPath] = []
+                interpolated = replace_paths(
+                    config, {path: self._resolve(path, config, resolving) for path in self._templates}
+                )
+                self._config = interpolated
+                return interpolated, None
+
+            changed = set(changed_paths)
+            for path in [path for path in self._templates if any(path[:i] in changed for i in range(1, len(path) + 1))]:
+                self._remove_template(path)
+            new_templates: Dict[ConfigPath, Any] = {}
+            for path in changed_paths:
+                _find_templates(get_path(config, path, DELETED), path, new_templates)
+            for path, template in new_templates.items():
+                self._add_template(path, template)
+
+            affected = self._affected_templates(changed_paths)
+            affected.update(new_templates)
+            affected.intersection_update(self._templates)
+            for path in affected:
+                self._resolved.pop(path, None)
+
+            values = {path: get_path(config, path, DELETED) for path in changed_paths}
+            resolving = []
+            for path in affected:
+                values[path] = self._resolve(path, config, resolving)
+
+            interpolated = replace_paths(self._config, values)
+            self._config = interpolated
+            return interpolated, minimal_paths([*changed_paths, *affected])
+
+        except BaseException:
+            # The graph may be partially updated, the next call resolves all the templates again
+            self.reset()
+            raise
@@ -0,0 +1,152 @@
+"""
+Lazy view of the merged configuration.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Sequence
+
+from conflex.config_dict import (
+    ConfigDict,
+    ConfigPath,
+    _is_mutable_node,
+    _merge_conflict,
+    freeze_config,
+    merge_layers,
+)
+
+_MISSING = object()
+# A lower priority layer cannot define a path if a value of a higher priority layer is not a dict on this path
+_SHADOWED = object()
+
+
+def _lookup(config: Mapping[Any, Any], path: ConfigPath) -> Any:
+    value: Any = config
+    for key in path:
+        if not isinstance(value, Mapping):
+            return _SHADOWED
+        value = value.get(key, _MISSING)
+        if value is _MISSING:
+            return _MISSING
+
+    return value
+
+
+class OverlayConfig(Mapping):
+    """
+    Read-only view of the merge of several configuration layers, in the style of `collections.ChainMap`.
+
+    Values are resolved by looking up their path in the layers, from the highest priority layer to the lowest one.
+    Layers are loaded on demand, so reading a value defined in the highest priority layer only loads that layer:
+    >>> overlay = OverlayConfig(["base", "env"], config_store._load_config)
+    >>> log_level = overlay.get("log.LEVEL")
+
+    When the value is a dictionary, the subtree is merged from all the layers that define it, exactly as
+    `merge_layers` would, and the result is memoized.
+    Unlike a full merge, conflicts between a value and the lower priority layers are only detected in the
+    subtrees that are merged.
+    """
+
+    def __init__(self, layers: Sequence[str], load_layer: Callable[[str], Mapping[Any, Any]], freeze: bool = False):
+        """
+        :param layers: Names of the layers, by increasing order of priority.
+        :param load_layer: Function that returns the configuration of a layer, loading it if necessary.
+        :param freeze: Whether the merged subtrees and the other mutable values (ex: lists) should be frozen, see
+                       `freeze_config`.
+        """
+        self._layers = list(reversed(layers))
+        self._load_layer = load_layer
+        self._freeze = freeze
+        self._subtrees: Dict[ConfigPath, Any] = {}
+        self._lock = threading.Lock()
+
+    def _resolve(self, path: ConfigPath) -> Any:
+        """
+        Resolves the value at a path of the merged configuration.
+        :param path: Path of the value, as a tuple of keys.
+        :return: The value, or _MISSING if no layer defines it.
+        """
+        subtree = self._subtrees.get(path, _MISSING)
+        if subtree is not _MISSING:
+            return subtree
+
+        for layer in self._layers:
+            value = _lookup(self._load_layer(layer), path)
+            if value is _SHADOWED:
+                return _MISSING
+            if value is not _MISSING:
+                if isinstance(value, Mapping):
+                    return self._merge_subtree(path)
+                if self._freeze and _is_mutable_node(value):
+                    # Values of the layers must not be modified through a frozen view
+                    with self._lock:
+                        return self._subtrees.setdefault(path, freeze_config(value))
+                return value
+
+        return _MISSING
+
+    def _merge_subtree(self, path: ConfigPath) -> Any:
+        """
+        Merges the subtree at a path from all the layers that define it and memoizes the result.
+        :param path: Path of the subtree, as a tuple of keys.
+        :return: The merged subtree.
+        """
+        nodes: List[Mapping[Any, Any]] = []
+        node_path = "".join(f"{key}." for key in ("$", *path))
+        for layer in self._layers:
+            node = _lookup(self._load_layer(layer), path)
+            if node is _MISSING:
+                continue
+            if node is _SHADOWED or not isinstance(node, Mapping):
+                raise _merge_conflict(node_path.rstrip("."), base_is_dict=False)
+            nodes.append(node)
+
+        subtree = merge_layers(reversed(nodes), dict_type=ConfigDict, path_from_root=node_path, node_types=Mapping)
+        if self._freeze:
+            subtree = freeze_config(subtree)
+
+        with self._lock:
+            return self._subtrees.setdefault(path, subtree)
+
+    def invalidate(self) -> None:
+        """
+        Clears the memoized subtrees. Must be called when the configuration of a layer changes.
+        """
+        with self._lock:
+            self._subtrees = {}
+
+    def get(self, path: str, default: Any = None) -> Any:  # type: ignore
+        """
+        Returns the value at the specified path, ex: "db.HOST".
+
+        :param path: Path of the value, as keys separated by dots.
+        :param default: Value to return if the path does not exist.
+        :return: The value at the specified path, or `default`.
+        """
+        value = self._resolve(tuple(path.split(".")))
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self._resolve((key,))
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __getattr__(self, item: str) -> Any:
+        if item.startswith("__"):
+            raise AttributeError(item)
+        value = self._resolve((item,))
+        if value is _MISSING:
+            raise AttributeError(f"No such configuration variable or namespace: '{item}'")
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        return any(key in self._load_layer(layer) for layer in self._layers)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._merge_subtree(()))
+
+    def __len__(self) -> int:
+        return len(self._merge_subtree(()))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(reversed(self._layers))})"
@@ -0,0 +1,169 @@
+"""
+Wildcard queries on the paths of a configuration.
+
+A PathTrie indexes all the paths of a configuration once, then serves queries made of keys and wildcards:
+>>> path_trie = PathTrie(config)
+>>> path_trie.select("services.*.TIMEOUT")
+{"services.api.TIMEOUT": 10, "services.worker.TIMEOUT": 60}
+
+`*` matches one key and `**` matches any number of keys, including none. The nodes of the configuration are
+numbered in depth-first order, so the descendants of a node are a contiguous range of numbers: `**` followed by a
+key is answered with a binary search in the sorted numbers of the nodes with this key, and the cost of a query grows
+with the number of nodes it matches instead of the size of the configuration.
+"""
+
+import bisect
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+WILDCARD = "*"
+RECURSIVE_WILDCARD = "**"
+
+
+class PathTrie:
+    """
+    Index of the paths of a configuration, for wildcard queries. The configuration must not be modified afterwards.
+
+    The results of the last queries are cached, so repeated patterns are only matched once.
+    """
+
+    def __init__(self, config: Mapping[Any, Any], separator: str = ".", cache_size: int = 128):
+        """
+        :param config: Configuration dictionary.
+        :param separator: Separator between the keys of the paths and patterns.
+        :param cache_size: Maximum number of patterns whose results are cached.
+        """
+        self.config = config
+        self.separator = separator
+        self.cache_size = cache_size
+
+        # Path, value and children of each node, by number. The root node is number 0.
+        self._paths: List[str] = []
+        self._values: List[Any] = []
+        self._children: List[Optional[Dict[str, int]]] = []
+        # Number following the last descendant of each node
+        self._ends: List[int] = []
+        # Numbers of the nodes with each key, in increasing order
+        self._nodes_by_key: Dict[str, List[int]] = {}
+        self._build(config)
+
+        self._cache: Dict[str, Tuple[int, ...]] = {}
+        self._cache_lock = threading.Lock()
+
+    def _build(self, config: Mapping[Any, Any]) -> None:
+        separator = self.separator
+        depths = []
+        stack: List[Tuple[Optional[int], Any, Any, int]] = [(None, None, config, 0)]
+
+        while stack:
+            parent, key, value, depth = stack.pop()
+            number = len(self._values)
+            if parent is None:
+                path = ""
+            else:
+                key = str(key)
+                path = key if parent == 0 else f"{self._paths[parent]}{separator}{key}"
+                self._children[parent][key] = number  # type: ignore
+                self._nodes_by_key.setdefault(key, []).append(number)
+
+            self._paths.append(path)
+            self._values.append(value)
+            depths.append(depth)
+            if isinstance(value, Mapping):
+                self._children.append({})
+                # Reversed so that the children are numbered in the order of the configuration
+                stack.extend((number, k, v, depth + 1) for k, v in reversed(list(value.items())))
+            else:
+                self._children.append(None)
+
+        # The subtree of a node ends at the next node that is not deeper
+        self._ends = [len(depths)] * len(depths)
+        open_nodes: List[int] = []
+        for number, depth in enumerate(depths):
+            while open_nodes and depths[open_nodes[-1]] >= depth:
+                self._ends[open_nodes.pop()] = number
+            open_nodes.append(number)
+
+    def __len__(self) -> int:
+        """
+        :return: The number of paths of the configuration.
+        """
+        return len(self._values) - 1
+
+    def select(self, pattern: str) -> Dict[str, Any]:
+        """
+        Returns the values whose path matches a pattern.
+
+        :param pattern: Keys separated by the separator, where `*` matches any key and `**` any number of keys,
+                        ex: "services.*.TIMEOUT" or "tenants.**.HOST".
+        :return: The matching values by path, in the order of the configuration.
+        :raise: A ValueError if the pattern is empty.
+        """
+        numbers = self._cache.get(pattern)
+        if numbers is None:
+            if not pattern:
+                raise ValueError("Empty path pattern.")
+            numbers = self._match(pattern.split(self.separator))
+            if self.cache_size > 0:
+                with self._cache_lock:
+                    if len(self._cache) >= self.cache_size:
+                        del self._cache[next(iter(self._cache))]
+                    self._cache[pattern] = numbers
+
+        paths, values = self._paths, self._values
+        return {paths[number]: values[number] for number in numbers}
+
+    def _match(self, keys: List[str]) -> Tuple[int, ...]:
+        nodes = [0]
+        position = 0
+        while position < len(keys) and nodes:
+            key = keys[position]
+            position += 1
+
+            if key == RECURSIVE_WILDCARD:
+                while position < len(keys) and keys[position] == RECURSIVE_WILDCARD:
+                    position += 1
+                nodes = self._outermost(nodes)
+                if position == len(keys):
+                    nodes = [number for node in nodes for number in range(node, self._ends[node])]
+                elif keys[position] == WILDCARD:
+                    nodes = [number for node in nodes for number in range(node + 1, self._ends[node])]
+                    position += 1
+                else:
+                    nodes = list(self._descendants_with_key(nodes, keys[position]))
+                    position += 1
+
+            elif key == WILDCARD:
+                nodes = [child for node in nodes for child in (self._children[node] or {}).values()]
+
+            else:
+                children_of_nodes = (self._children[node] for node in nodes)
+                nodes = [
+                    child
+                    for child in (children.get(key) for children in children_of_nodes if children is not None)
+                    if child is not None
+                ]
+
+        # The root node can only be matched by `**`, it does not have a path
+        return tuple(number for number in sorted(set(nodes)) if number != 0)
+
+    def _outermost(self, nodes: List[int]) -> List[int]:
+        """
+        Returns the nodes that are not descendants of other nodes of a list, in increasing order.
+        """
+        outermost: List[int] = []
+        for node in sorted(set(nodes)):
+            if not outermost or node >= self._ends[outermost[-1]]:
+                outermost.append(node)
+        return outermost
+
+    def _descendants_with_key(self, nodes: Iterable[int], key: str) -> Iterable[int]:
+        """
+        Yields the descendants of nodes that have a key, for nodes that are not descendants of each other.
+        """
+        numbers = self._nodes_by_key.get(key, [])
+        for node in nodes:
+            start = bisect.bisect_right(numbers, node)
+            end = bisect.bisect_left(numbers, self._ends[node], lo=start)
+            yield from numbers[start:end]
@@ -0,0 +1,266 @@
+"""
+Hot reload of configurations.
+
+The ConfigReloader watches the source files of the loaders of a config store (see `ConfigLoader.sources`) and
+reloads the namespaces whose files changed:
+>>> reloader = ConfigReloader(config_store, interval=1.0)
+>>> reloader.start()
+
+Changes are detected by comparing the stat signature (modification time, size, inode) of the files, which costs
+one `stat` call per file and per check. On Linux, an inotify backend avoids even these calls when nothing changed
+in the directories of the watched files.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+StatSignature = Optional[Tuple[int, int, int, int]]
+
+
+def _stat_signature(path: str) -> StatSignature:
+    """
+    Returns a signature of the file that changes when the file is modified or replaced.
+    :param path: File path.
+    :return: The signature of the file, or None if the file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino, st.st_dev
+
+
+class PollingFileWatcher:
+    """
+    Detects file changes by comparing the stat signature of the files at each check.
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        self._signatures: Dict[str, StatSignature] = {path: _stat_signature(path) for path in paths}
+        # Files reported again at the next check, see `retry`
+        self._retry_paths: Dict[str, None] = {}
+
+    def _check_files(self, paths: Iterable[str]) -> List[str]:
+        changed_paths = []
+        retry_paths, self._retry_paths = self._retry_paths, {}
+        for path in {**dict.fromkeys(paths), **retry_paths}:
+            signature = _stat_signature(path)
+            if signature != self._signatures[path] or path in retry_paths:
+                self._signatures[path] = signature
+                changed_paths.append(path)
+
+        return changed_paths
+
+    def changed_files(self) -> List[str]:
+        """
+        Returns the files that changed since the previous check (or since the creation of the watcher).
+        :return: The list of modified, created or deleted files.
+        """
+        return self._check_files(self._signatures)
+
+    def retry(self, paths: Iterable[str]) -> None:
+        """
+        Reports files as changed again at the next check, ex: when their changes could not be processed.
+        :param paths: Files returned by `changed_files`.
+        """
+        self._retry_paths.update(dict.fromkeys(paths))
+
+    def close(self) -> None:
+        """
+        Releases the resources of the watcher.
+        """
+        pass
+
+
+class InotifyFileWatcher(PollingFileWatcher):
+    """
+    Detects file changes with inotify (Linux only).
+
+    The watcher monitors the directories of the files, which also catches files that are replaced atomically by
+    editors or by deployment tools. Files are only stat'ed when an event occurs in their directory.
+    """
+
+    # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    # | IN_DELETE_SELF | IN_MOVE_SELF
+    WATCH_MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200 | 0x400 | 0x800
+    IN_Q_OVERFLOW = 0x4000
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, paths: Iterable[str]):
+        super().__init__(paths)
+
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError("inotify is not available on this platform.")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._paths_by_watch: Dict[int, List[str]] = {}
+        paths_by_dir: Dict[str, List[str]] = {}
+        for path in self._signatures:
+            paths_by_dir.setdefault(os.path.dirname(os.path.abspath(path)), []).append(path)
+
+        for directory, dir_paths in paths_by_dir.items():
+            watch = libc.inotify_add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+            if watch < 0:
+                errno = ctypes.get_errno()
+                self.close()
+                raise OSError(errno, f"Cannot watch directory '{directory}'")
+            self._paths_by_watch.setdefault(watch, []).extend(dir_paths)
+
+    def _read_events(self) -> Optional[List[int]]:
+        """
+        Reads the pending inotify events.
+        :return: The watch descriptors for which an event occurred, or None if the event queue overflowed.
+        """
+        watches: List[int] = []
+        while True:
+            try:
+                buffer = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return watches
+
+            offset = 0
+            while offset < len(buffer):
+                watch, mask, _, name_length = self.EVENT_HEADER.unpack_from(buffer, offset)
+                if mask & self.IN_Q_OVERFLOW:
+                    return None
+                watches.append(watch)
+                offset += self.EVENT_HEADER.size + name_length
+
+    def changed_files(self) -> List[str]:
+        watches = self._read_events()
+        if watches is None:
+            return super().changed_files()
+
+        paths: Dict[str, None] = {}
+        for watch in watches:
+            paths.update(dict.fromkeys(self._paths_by_watch.get(watch, ())))
+        return self._check_files(paths)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_file_watcher(paths: Iterable[str], backend: str = "auto") -> PollingFileWatcher:
+    """
+    Creates a file watcher.
+
+    :param paths: Paths of the files to watch.
+    :param backend: "poll", "inotify" or "auto". The "auto" backend uses inotify if it is available and falls back
+                    to polling otherwise.
+    :return: The file watcher.
+    :raise: A ValueError if the backend is unknown, an OSError if the inotify backend is requested but unavailable.
+    """
+    paths = list(paths)
+    if backend == "poll":
+        return PollingFileWatcher(paths)
+    if backend == "inotify":
+        return InotifyFileWatcher(paths)
+    if backend != "auto":
+        raise ValueError(f"Unknown file watcher backend: '{backend}'.")
+
+    try:
+        return InotifyFileWatcher(paths)
+    except (OSError, AttributeError):
+        return PollingFileWatcher(paths)
+
+
+class ConfigReloader:
+    """
+    Reloads the configurations of a config store when their source files change.
+
+    Only the namespaces whose source files changed are reloaded, and the new merged configuration is published
+    atomically by `ConfigStore.reload`.
+    """
+
+    def __init__(self, config_store, interval: float = 1.0, backend: str = "auto"):
+        """
+        Instantiates the reloader. The stat signatures of the files are recorded at this point: changes that
+        occur before the creation of the reloader are not detected.
+
+        :param config_store: Config store to reload.
+        :param interval: Interval between two checks, in seconds, when running in the background (see `start`).
+        :param backend: File watcher backend, see `create_file_watcher`.
+        """
+        self.config_store = config_store
+        self.interval = interval
+
+        self._namespaces_by_path: Dict[str, List[str]] = {}
+        for namespace, loader in config_store.loaders.items():
+            for path in loader.sources():
+                self._namespaces_by_path.setdefault(path, []).append(namespace)
+
+        self._watcher = create_file_watcher(self._namespaces_by_path, backend=backend)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> List[str]:
+        """
+        Checks the source files once and reloads the namespaces whose files changed. If the reload fails, ex: on a
+        file that is being written, the changes are reloaded again at the next check.
+        :return: The namespaces whose files changed, in the order in which they were added to the config store.
+        :raise: The exception raised by `ConfigStore.reload`, if the reload fails.
+        """
+        changed_files = self._watcher.changed_files()
+        changed_namespaces = set()
+        for path in changed_files:
+            changed_namespaces.update(self._namespaces_by_path[path])
+
+        namespaces = [namespace for namespace in self.config_store.loaders if namespace in changed_namespaces]
+        if namespaces:
+            try:
+                self.config_store.reload(namespaces)
+            except Exception:
+                self._watcher.retry(changed_files)
+                raise
+        return namespaces
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                LOGGER.exception("Failed to reload configurations.")
+
+    def start(self) -> None:
+        """
+        Starts checking the source files periodically in a background daemon thread.
+        """
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="conflex-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background thread, if running.
+        """
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def close(self) -> None:
+        """
+        Stops the background thread and releases the resources of the file watcher.
+        """
+        self.stop()
+        self._watcher.close()
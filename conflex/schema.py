@@ -0,0 +1,329 @@
+"""
+Typed configuration objects.
+
+A schema describes the expected structure and types of a configuration with dataclasses or TypedDict classes:
+>>> @dataclass
+... class DbConfig:
+...     HOST: str
+...     PORT: int = 5432
+>>> @dataclass
+... class AppConfig:
+...     db: DbConfig
+>>> config = compile_config(AppConfig, {"db": {"HOST": "localhost", "PORT": "5433"}})
+>>> config.db.PORT
+5433
+
+The configuration is validated and cast once, and compiled into objects of classes generated from the schema,
+which store their attributes in `__slots__`: reading a value is a plain attribute access.
+"""
+
+import dataclasses
+import datetime
+import enum
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Mapping, Tuple, Type, Union, get_type_hints
+
+from conflex.exc import ConfigSchemaException
+from conflex.type_inference import NO_MATCH, bool_rule, duration_rule, float_rule, int_rule
+
+if sys.version_info >= (3, 8):
+    from typing import Literal, get_args, get_origin
+else:  # pragma: no cover
+    Literal = object()  # Literal types require Python 3.8+
+
+    def get_origin(tp: Any) -> Any:
+        return getattr(tp, "__origin__", None)
+
+    def get_args(tp: Any) -> Tuple[Any, ...]:
+        return getattr(tp, "__args__", ())
+
+
+# Converters take the value and its path followed by a dot, ex: "$.db.PORT.", to build the paths of nested values
+Converter = Callable[[Any, str], Any]
+
+_MISSING = object()
+
+
+class TypedConfig:
+    """
+    Base class of the classes generated from schemas. Typed configurations are read-only.
+    """
+
+    __slots__: Tuple[str, ...] = ()
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise TypeError(f"{type(self).__name__} objects are read-only.")
+
+    def __delattr__(self, item: str) -> None:
+        raise TypeError(f"{type(self).__name__} objects are read-only.")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Returns the values of the configuration as a dictionary. Nested typed configurations are not converted.
+        :return: The dictionary of the configuration values, by field name.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __hash__(self) -> int:
+        return hash(tuple((name, _hashable(value)) for name, value in self.as_dict().items()))
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={value!r}" for name, value in self.as_dict().items())
+        return f"{type(self).__name__}({values})"
+
+
+def _hashable(value: Any) -> Any:
+    """
+    Converts the lists, sets and dictionaries of a configuration value to tuples and frozensets, to hash it.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_hashable(item) for item in value)
+    if isinstance(value, Mapping):
+        return frozenset((key, _hashable(item)) for key, item in value.items())
+    return value
+
+
+def is_schema(tp: Any) -> bool:
+    """
+    Returns whether a type is a schema, i.e. a dataclass or a TypedDict class.
+    """
+    return isinstance(tp, type) and (dataclasses.is_dataclass(tp) or _is_typed_dict(tp))
+
+
+def _is_typed_dict(tp: type) -> bool:
+    return issubclass(tp, dict) and hasattr(tp, "__total__")
+
+
+def _fields(schema: type) -> List[Tuple[str, Any, Any]]:
+    """
+    Lists the fields of a schema.
+    :return: The list of (name, type, default factory) tuples. The default factory is _MISSING for required fields.
+    """
+    type_hints = get_type_hints(schema)
+
+    if dataclasses.is_dataclass(schema):
+        fields = []
+        for field in dataclasses.fields(schema):
+            if field.default is not dataclasses.MISSING:
+                default_factory: Any = lambda default=field.default: default  # noqa: E731
+            elif field.default_factory is not dataclasses.MISSING:  # type: ignore
+                default_factory = field.default_factory  # type: ignore
+            else:
+                default_factory = _MISSING
+            fields.append((field.name, type_hints[field.name], default_factory))
+        return fields
+
+    required_keys = getattr(schema, "__required_keys__", type_hints if schema.__total__ else ())  # type: ignore
+    return [(name, tp, _MISSING if name in required_keys else None) for name, tp in type_hints.items()]
+
+
+def _type_name(tp: Any) -> str:
+    if get_origin(tp) is Literal:
+        return str(tp)
+    return getattr(tp, "__name__", None) or str(tp)
+
+
+def _invalid_value(path: str, tp: Any, value: Any) -> ConfigSchemaException:
+    return ConfigSchemaException(
+        f"Invalid configuration value at node {path}: expected {_type_name(tp)}, got {type(value).__name__} {value!r}."
+    )
+
+
+class _ConverterBuilder:
+    """
+    Builds the functions that validate and cast configuration values to a type. Converters are built once per type.
+    """
+
+    def __init__(self) -> None:
+        self._converters: Dict[Any, Converter] = {}
+        self._lock = threading.RLock()
+
+    def get(self, tp: Any) -> Converter:
+        with self._lock:
+            converter = self._converters.get(tp)
+            if converter is None:
+                # Register a forwarding converter first to support recursive schemas
+                converters: List[Converter] = []
+                self._converters[tp] = lambda value, path: converters[0](value, path)
+                converter = self._build(tp)
+                converters.append(converter)
+                self._converters[tp] = converter
+
+            return converter
+
+    def _build(self, tp: Any) -> Converter:
+        if tp is Any:
+            return lambda value, path: value
+        if is_schema(tp):
+            return self._build_schema(tp)
+
+        origin = get_origin(tp)
+        if origin is Union:
+            return self._build_union(tp, get_args(tp))
+        if origin is Literal:
+            return self._build_literal(tp, get_args(tp))
+        if origin in (list, tuple, set, frozenset) or tp in (list, tuple, set, frozenset):
+            return self._build_collection(origin or tp, get_args(tp))
+        if origin in (dict, Mapping) or tp in (dict, Mapping):
+            return self._build_mapping(get_args(tp))
+        if origin is not None:
+            # Other generic aliases, ex: typing.Sequence[int]
+            return self._build_collection(list, get_args(tp))
+
+        return self._build_scalar(tp)
+
+    def _build_schema(self, schema: type) -> Converter:
+        fields = [(name, self.get(tp), default_factory) for name, tp, default_factory in _fields(schema)]
+        field_names = tuple(name for name, _, default_factory in fields)
+        typed_config_class: Type[TypedConfig] = type(
+            schema.__name__, (TypedConfig,), {"__slots__": field_names, "__qualname__": schema.__qualname__}
+        )
+        set_attribute = object.__setattr__
+
+        def convert_schema(value: Any, path: str) -> Any:
+            if not isinstance(value, Mapping):
+                raise _invalid_value(path.rstrip("."), schema, value)
+
+            typed_config = typed_config_class.__new__(typed_config_class)
+            for name, converter, default_factory in fields:
+                field_value = value.get(name, _MISSING)
+                if field_value is _MISSING:
+                    if default_factory is _MISSING:
+                        raise ConfigSchemaException(f"Missing configuration value at node {path}{name}.")
+                    field_value = default_factory() if default_factory is not None else None
+                else:
+                    field_value = converter(field_value, f"{path}{name}.")
+                set_attribute(typed_config, name, field_value)
+
+            return typed_config
+
+        return convert_schema
+
+    def _build_union(self, tp: Any, args: Tuple[Any, ...]) -> Converter:
+        optional = type(None) in args
+        converters = [self.get(arg) for arg in args if arg is not type(None)]
+
+        def convert_union(value: Any, path: str) -> Any:
+            if value is None and optional:
+                return None
+            for converter in converters:
+                try:
+                    return converter(value, path)
+                except ConfigSchemaException:
+                    pass
+            raise _invalid_value(path.rstrip("."), tp, value)
+
+        return convert_union
+
+    def _build_literal(self, tp: Any, args: Tuple[Any, ...]) -> Converter:
+        # Values are cast to the type of each allowed value, ex: "8080" matches Literal[8080]
+        converters = [(arg, self.get(type(arg))) for arg in args]
+
+        def convert_literal(value: Any, path: str) -> Any:
+            for arg, converter in converters:
+                try:
+                    if converter(value, path) == arg:
+                        return arg
+                except ConfigSchemaException:
+                    pass
+            raise _invalid_value(path.rstrip("."), tp, value)
+
+        return convert_literal
+
+    def _build_collection(self, collection_type: type, args: Tuple[Any, ...]) -> Converter:
+        if collection_type is tuple and len(args) == 2 and args[1] is Ellipsis:
+            args = args[:1]
+        elif collection_type is tuple and args:
+            item_converters = [self.get(arg) for arg in args]
+
+            def convert_tuple(value: Any, path: str) -> Any:
+                if not isinstance(value, (list, tuple)) or len(value) != len(item_converters):
+                    raise _invalid_value(path.rstrip("."), Tuple[args], value)  # type: ignore
+                return tuple(
+                    converter(item, f"{path}{i}.") for i, (converter, item) in enumerate(zip(item_converters, value))
+                )
+
+            return convert_tuple
+
+        item_converter = self.get(args[0]) if args else self.get(Any)
+
+        def convert_collection(value: Any, path: str) -> Any:
+            if not isinstance(value, (list, tuple, set, frozenset)):
+                raise _invalid_value(path.rstrip("."), collection_type, value)
+            return collection_type(item_converter(item, f"{path}{i}.") for i, item in enumerate(value))
+
+        return convert_collection
+
+    def _build_mapping(self, args: Tuple[Any, ...]) -> Converter:
+        value_converter = self.get(args[1]) if args else self.get(Any)
+
+        def convert_mapping(value: Any, path: str) -> Any:
+            if not isinstance(value, Mapping):
+                raise _invalid_value(path.rstrip("."), dict, value)
+            return {k: value_converter(v, f"{path}{k}.") for k, v in value.items()}
+
+        return convert_mapping
+
+    def _build_scalar(self, tp: Any) -> Converter:
+        string_rule: Callable[[str], Any] = lambda value_str: NO_MATCH  # noqa: E731
+        accepted_types: Tuple[type, ...] = (tp,)
+        cast: Callable[[Any], Any] = lambda value: value  # noqa: E731
+
+        if tp is bool:
+            string_rule = bool_rule
+        elif tp is int:
+            string_rule = int_rule
+        elif tp is float:
+            string_rule = float_rule
+            accepted_types = (int, float)
+            cast = float
+        elif tp is str:
+            accepted_types = (str, int, float)
+            cast = str
+        elif tp is datetime.timedelta:
+            string_rule = duration_rule
+        elif isinstance(tp, type) and issubclass(tp, enum.Enum):
+            members = {member.value: member for member in tp}
+            members.update({member.name: member for member in tp})
+            string_rule = lambda value_str: members.get(value_str, NO_MATCH)  # noqa: E731
+
+        def convert_scalar(value: Any, path: str) -> Any:
+            if isinstance(value, accepted_types) and (tp is bool or not isinstance(value, bool)):
+                return cast(value)
+            if isinstance(value, str):
+                converted_value = string_rule(value)
+                if converted_value is not NO_MATCH:
+                    return cast(converted_value)
+            raise _invalid_value(path.rstrip("."), tp, value)
+
+        return convert_scalar
+
+
+_CONVERTER_BUILDER = _ConverterBuilder()
+
+
+def compile_config(schema: Type[Any], config: Mapping[str, Any], path_from_root: str = "$.") -> Any:
+    """
+    Validates a configuration against a schema, casts its values and compiles it into a typed configuration.
+
+    Scalar values are cast to the types of the schema when possible, ex: "5432" for an int or "true" for a bool.
+    Configuration values that are not part of the schema are ignored.
+
+    :param schema: Schema, defined as a dataclass or a TypedDict class.
+    :param config: Configuration dictionary.
+    :param path_from_root: Path of the configuration from the root of the config. Used for error messages.
+    :return: The typed configuration, an object with one slot per field of the schema.
+    :raise: A ConfigSchemaException if the configuration does not match the schema. The message contains the path
+            of the invalid value, ex: `$.db.PORT`.
+    """
+    if not is_schema(schema):
+        raise TypeError(f"{_type_name(schema)} is not a dataclass or a TypedDict class.")
+    return _CONVERTER_BUILDER.get(schema)(config, path_from_root)
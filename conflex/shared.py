@@ -0,0 +1,320 @@
+"""
+Configurations shared between processes through memory-mapped files.
+
+The merged configuration is serialized once in a compact binary file, which every process maps in memory.
+Values are decoded on demand when they are accessed, so the configuration tree is never copied in the memory of the
+processes: the pages of the file are shared by all the processes that map it, whatever their number.
+This is useful for pre-fork servers (gunicorn, multiprocessing pools...) where the reference counting of a regular
+configuration tree breaks the copy-on-write sharing of memory between the workers:
+>>> write_shared_config(config, "/dev/shm/my-app.config")
+>>> config = open_shared_config("/dev/shm/my-app.config")
+>>> config.db.HOST
+'localhost'
+
+Binary format (little-endian):
+* header: magic bytes, offset of the root mapping (uint64);
+* mappings: b"M", number of entries (uint32), number of slots of the hash table (uint32, a power of two), entries
+  in insertion order as (key offset (uint64), key length (uint32), value offset (uint64)), then the hash table:
+  slots (uint32) that contain 0 if empty or the index of an entry plus one. Keys are hashed with CRC-32, which
+  unlike `hash` is stable across processes, and collisions are resolved by linear probing;
+* lists and tuples: b"L", number of items (uint32), item offsets (uint64). Decoded as tuples;
+* scalars: b"N" (None), b"T" (True), b"F" (False), b"i" + int64, b"f" + float64, b"s" + length (uint32) + UTF-8 bytes,
+  b"P" + length (uint32) + pickle bytes for any other type.
+Identical scalars and shared subtrees are only written once.
+"""
+
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+MAGIC = b"CFLXSHM1"
+
+_HEADER = struct.Struct("<8sQ")
+_MAPPING_HEADER = struct.Struct("<II")
+_COUNT = struct.Struct("<I")
+_ENTRY = struct.Struct("<QIQ")
+_SLOT = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+
+_INT_MIN, _INT_MAX = -(2**63), 2**63 - 1
+
+
+def _encode_scalar(value: Any) -> bytes:
+    """
+    Encodes a scalar value. Keys of mappings are encoded the same way.
+    """
+    if value is None:
+        return b"N"
+    if value is True:
+        return b"T"
+    if value is False:
+        return b"F"
+    value_type = type(value)
+    if value_type is str:
+        data = value.encode("utf-8", "surrogatepass")
+        return b"s" + _COUNT.pack(len(data)) + data
+    if value_type is int and _INT_MIN <= value <= _INT_MAX:
+        return b"i" + _INT.pack(value)
+    if value_type is float:
+        return b"f" + _FLOAT.pack(value)
+
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return b"P" + _COUNT.pack(len(data)) + data
+
+
+def _is_container(value: Any) -> bool:
+    return isinstance(value, (Mapping, list, tuple))
+
+
+def encode_config(config: Mapping[Any, Any]) -> bytes:
+    """
+    Serializes a configuration in the shared configuration format, see the module documentation.
+
+    :param config: Configuration dictionary.
+    :return: The serialized configuration.
+    """
+    buffer = bytearray(_HEADER.size)
+    scalar_offsets: Dict[bytes, int] = {}
+    node_offsets: Dict[int, int] = {}
+
+    def write_scalar(value: Any) -> Tuple[int, int]:
+        data = _encode_scalar(value)
+        offset = scalar_offsets.get(data)
+        if offset is None:
+            offset = scalar_offsets[data] = len(buffer)
+            buffer.extend(data)
+        return offset, len(data)
+
+    def value_offset(value: Any) -> int:
+        return node_offsets[id(value)] if _is_container(value) else write_scalar(value)[0]
+
+    # Nodes are written after their children, so that the offsets of the children are known
+    stack: List[Tuple[Any, bool]] = [(config, False)]
+    while stack:
+        node, children_written = stack.pop()
+        if id(node) in node_offsets:
+            continue
+
+        children = node.values() if isinstance(node, Mapping) else node
+        if not children_written:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children if _is_container(child) and id(child) not in node_offsets)
+            continue
+
+        if isinstance(node, Mapping):
+            entries = []
+            for key, value in node.items():
+                key_offset, key_length = write_scalar(key)
+                entries.append((bytes(buffer[key_offset : key_offset + key_length]), key_offset, value_offset(value)))
+
+            slot_count = 2
+            while slot_count < 2 * len(entries):
+                slot_count *= 2
+            slots = [0] * slot_count
+            for index, (key_data, _, _) in enumerate(entries):
+                slot = zlib.crc32(key_data) & (slot_count - 1)
+                while slots[slot]:
+                    slot = (slot + 1) & (slot_count - 1)
+                slots[slot] = index + 1
+
+            node_data = bytearray(b"M" + _MAPPING_HEADER.pack(len(entries), slot_count))
+            for key_data, key_offset, offset in entries:
+                node_data += _ENTRY.pack(key_offset, len(key_data), offset)
+            node_data += struct.pack(f"<{slot_count}I", *slots)
+        else:
+            node_data = bytearray(b"L" + _COUNT.pack(len(node)))
+            for item in node:
+                node_data += _OFFSET.pack(value_offset(item))
+
+        node_offsets[id(node)] = len(buffer)
+        buffer.extend(node_data)
+
+    _HEADER.pack_into(buffer, 0, MAGIC, node_offsets[id(config)])
+    return bytes(buffer)
+
+
+def _decode(buffer: Any, offset: int) -> Any:
+    """
+    Decodes the value at an offset of a shared configuration. Mappings are decoded lazily.
+    """
+    tag = buffer[offset]
+    if tag == 0x4D:  # M
+        return SharedConfigDict(buffer, offset)
+    if tag == 0x73:  # s
+        (length,) = _COUNT.unpack_from(buffer, offset + 1)
+        return str(buffer[offset + 5 : offset + 5 + length], "utf-8", "surrogatepass")
+    if tag == 0x69:  # i
+        return _INT.unpack_from(buffer, offset + 1)[0]
+    if tag == 0x66:  # f
+        return _FLOAT.unpack_from(buffer, offset + 1)[0]
+    if tag == 0x54:  # T
+        return True
+    if tag == 0x46:  # F
+        return False
+    if tag == 0x4E:  # N
+        return None
+    if tag == 0x4C:  # L
+        (count,) = _COUNT.unpack_from(buffer, offset + 1)
+        return tuple(
+            _decode(buffer, _OFFSET.unpack_from(buffer, offset + 5 + i * _OFFSET.size)[0]) for i in range(count)
+        )
+    if tag == 0x50:  # P
+        (length,) = _COUNT.unpack_from(buffer, offset + 1)
+        return pickle.loads(buffer[offset + 5 : offset + 5 + length])
+
+    raise ValueError(f"Invalid shared configuration: unknown tag {tag!r} at offset {offset}.")
+
+
+class SharedConfigDict(Mapping):
+    """
+    Read-only view of a mapping of a shared configuration. Values are decoded when they are accessed, and can be
+    accessed by key or by attribute like with ConfigDict objects. Lists are decoded as tuples.
+    """
+
+    __slots__ = ("_buffer", "_offset", "_count", "_slot_count")
+
+    def __init__(self, buffer: Any, offset: int):
+        """
+        :param buffer: Buffer of the shared configuration, usually a memory map.
+        :param offset: Offset of the mapping in the buffer.
+        """
+        self._buffer = buffer
+        self._offset = offset
+        self._count, self._slot_count = _MAPPING_HEADER.unpack_from(buffer, offset + 1)
+
+    def _entry(self, index: int) -> Tuple[int, int, int]:
+        """
+        Returns the (key offset, key length, value offset) entry at an index, in insertion order.
+        """
+        return _ENTRY.unpack_from(self._buffer, self._offset + 9 + index * _ENTRY.size)
+
+    def _find(self, key: Any) -> Optional[int]:
+        """
+        Finds the value of a key in the hash table of the mapping.
+        :return: The offset of the value, or None if the key is not in the mapping.
+        """
+        try:
+            key_data = _encode_scalar(key)
+        except Exception:
+            return None
+
+        buffer = self._buffer
+        entries_offset = self._offset + 9
+        slots_offset = entries_offset + self._count * _ENTRY.size
+        mask = self._slot_count - 1
+        slot = zlib.crc32(key_data) & mask
+        while True:
+            (index,) = _SLOT.unpack_from(buffer, slots_offset + slot * 4)
+            if not index:
+                return None
+            key_offset, key_length, value_offset = _ENTRY.unpack_from(
+                buffer, entries_offset + (index - 1) * _ENTRY.size
+            )
+            if buffer[key_offset : key_offset + key_length] == key_data:
+                return value_offset
+            slot = (slot + 1) & mask
+
+    def __getitem__(self, key: Any) -> Any:
+        value_offset = self._find(key)
+        if value_offset is None:
+            raise KeyError(key)
+        return _decode(self._buffer, value_offset)
+
+    def __getattr__(self, item: str) -> Any:
+        if item.startswith("__"):
+            raise AttributeError(item)
+        value_offset = self._find(item)
+        if value_offset is None:
+            raise AttributeError(f"No such configuration variable or namespace: '{item}'")
+        return _decode(self._buffer, value_offset)
+
+    def __contains__(self, key: Any) -> bool:
+        return self._find(key) is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        buffer = self._buffer
+        for position in range(self._count):
+            yield _decode(buffer, self._entry(position)[0])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _items(self) -> List[Tuple[Any, Any]]:
+        buffer = self._buffer
+        return [
+            (_decode(buffer, key_offset), _decode(buffer, value_offset))
+            for key_offset, _, value_offset in map(self._entry, range(self._count))
+        ]
+
+    def __reduce__(self):
+        # Shared configurations are copied when pickled, ex: to be sent to another process
+        return dict, (self._items(),)
+
+    def __repr__(self) -> str:
+        return f"SharedConfigDict({dict(self._items())!r})"
+
+
+class SharedPathIndex:
+    """
+    Looks up values of a shared configuration by path, ex: "db.HOST". Used by `ConfigStore.get` instead of a flat
+    index, which would copy the configuration in the memory of each process.
+    """
+
+    def __init__(self, config: SharedConfigDict, separator: str = "."):
+        self.config = config
+        self.separator = separator
+
+    def get(self, path: str, default: Any = None) -> Any:
+        value: Any = self.config
+        for key in path.split(self.separator):
+            if not isinstance(value, SharedConfigDict):
+                return default
+            value_offset = value._find(key)
+            if value_offset is None:
+                return default
+            value = _decode(value._buffer, value_offset)
+
+        return value
+
+
+def write_shared_config(config: Mapping[Any, Any], file_path: str) -> None:
+    """
+    Writes a configuration to a shared configuration file. The file is replaced atomically, so processes that
+    mapped the previous version of the file keep reading it safely.
+
+    :param config: Configuration dictionary.
+    :param file_path: Path of the file. Preferably on a memory file system, ex: /dev/shm.
+    """
+    data = encode_config(config)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def open_shared_config(file_path: str) -> SharedConfigDict:
+    """
+    Maps a shared configuration file in memory.
+
+    :param file_path: Path of the file, as written by `write_shared_config`.
+    :return: The root mapping of the configuration.
+    :raise: A ValueError if the file is not a shared configuration file.
+    """
+    with open(file_path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, root_offset = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        buffer.close()
+        raise ValueError(f"'{file_path}' is not a shared configuration file.")
+    return SharedConfigDict(buffer, root_offset)
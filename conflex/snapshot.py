@@ -0,0 +1,126 @@
+"""
+Snapshots of config stores.
+
+A snapshot contains the configurations of a config store and their merge, along with a fingerprint of the sources of
+each configuration. Processes that start often can read the snapshot instead of loading and merging the
+configurations, see `ConfigStore.from_snapshot`. Snapshots are created with `write_snapshot` or with the
+`conflex compile` command.
+"""
+
+import logging
+import os
+import pickle
+import tempfile
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from conflex.config_store import ConfigStore
+
+LOGGER = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MAGIC = b"CONFLEX-SNAPSHOT\n"
+
+# Description of each configuration of the store: (namespace, repr of the loader, fingerprint of the sources)
+SourceInfo = Tuple[str, str, Optional[str]]
+
+
+def _sources_info(config_store: "ConfigStore") -> List[SourceInfo]:
+    return [(namespace, repr(loader), loader.fingerprint()) for namespace, loader in config_store.loaders.items()]
+
+
+def write_snapshot(config_store: "ConfigStore", snapshot_path: str) -> None:
+    """
+    Loads and merges the configurations of a config store and writes them to a snapshot file.
+
+    The fingerprints of the sources are computed before loading the configurations, so a change of a source
+    during the compilation invalidates the snapshot. The file is written atomically.
+
+    :param config_store: Config store.
+    :param snapshot_path: Path of the snapshot file.
+    """
+    sources_info = _sources_info(config_store)
+    config_store._get_merged_config()
+
+    with config_store._lock:
+        payload = {
+            "configs": dict(config_store.configs),
+            "layer_merges": list(config_store._layer_merges),
+            "freeze": config_store._freeze,
+            "compact": config_store._compact,
+            "merged_config": config_store.merged_config,
+            "path_index": config_store._path_index,
+        }
+
+    snapshot_dir = os.path.dirname(os.path.abspath(snapshot_path))
+    fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, prefix=".tmp-", suffix=".snapshot")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            pickle.dump((FORMAT_VERSION, sources_info), f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(config_store: "ConfigStore", snapshot_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads the configurations of a snapshot that are still valid for a config store.
+
+    A configuration is valid if the store has the same loader at the same position, and if the fingerprint of its
+    sources did not change since the snapshot was written.
+
+    :param config_store: Config store.
+    :param snapshot_path: Path of the snapshot file.
+    :return: The valid configurations by namespace ("configs") and, if all the configurations are valid, the merges
+             of the configurations up to each layer ("layer_merges"), the merged configuration ("merged_config")
+             and its path index ("path_index"), frozen or not depending on the "freeze" flag.
+             None if the snapshot cannot be used.
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                LOGGER.warning("'%s' is not a conflex snapshot.", snapshot_path)
+                return None
+
+            format_version, snapshot_sources_info = pickle.load(f)
+            if format_version != FORMAT_VERSION:
+                LOGGER.info("Ignoring snapshot '%s' of format version %s.", snapshot_path, format_version)
+                return None
+
+            sources_info = _sources_info(config_store)
+            valid_namespaces = [
+                namespace
+                for (namespace, loader, fingerprint), snapshot_info in zip(sources_info, snapshot_sources_info)
+                if fingerprint is not None and (namespace, loader, fingerprint) == snapshot_info
+            ]
+            if not valid_namespaces:
+                LOGGER.info("Ignoring outdated snapshot '%s'.", snapshot_path)
+                return None
+
+            payload = pickle.load(f)
+
+    except FileNotFoundError:
+        LOGGER.info("Snapshot '%s' not found.", snapshot_path)
+        return None
+    except Exception:
+        LOGGER.warning("Ignoring invalid snapshot '%s'.", snapshot_path, exc_info=True)
+        return None
+
+    # Compact configurations cannot be merged with other configurations, and vice versa
+    if payload.get("compact", False) != config_store._compact:
+        LOGGER.info("Ignoring snapshot '%s' of a store with a different compact mode.", snapshot_path)
+        return None
+
+    configs = payload["configs"]
+    if len(valid_namespaces) < len(sources_info) or len(sources_info) != len(snapshot_sources_info):
+        LOGGER.info(
+            "Snapshot '%s' is outdated for configurations: %s.",
+            snapshot_path,
+            ", ".join(namespace for namespace, _, _ in sources_info if namespace not in valid_namespaces),
+        )
+        return {"configs": {namespace: configs[namespace] for namespace in valid_namespaces}}
+
+    return payload
@@ -0,0 +1,173 @@
+"""
+Subscriptions to changes of the merged configuration.
+
+Subscribers register a callback for a path pattern, where `*` matches any key, and are notified with the changes
+that concern them each time the merged configuration changes:
+>>> subscriptions = Subscriptions()
+>>> subscriptions.subscribe("db.*", lambda diff: rebuild_db_pool())
+>>> subscriptions.notify(diff_configs(old_config, new_config))
+
+Patterns are stored in a trie indexed by key, so notifying a change only visits the subscribers whose pattern
+shares a prefix with the changed path instead of matching every pattern against every change.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from conflex.config_dict import ConfigDiff, ConfigPath
+
+LOGGER = logging.getLogger(__name__)
+
+WILDCARD = "*"
+
+SubscriberCallback = Callable[[ConfigDiff], Any]
+
+
+class _TrieNode:
+    __slots__ = ("children", "subscriptions")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.subscriptions: List["Subscription"] = []
+
+    def walk(self) -> Iterator["_TrieNode"]:
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+
+class Subscription:
+    """
+    Subscription of a callback to the changes of the paths that match a pattern, see `Subscriptions.subscribe`.
+    """
+
+    def __init__(self, subscriptions: "Subscriptions", pattern: str, callback: SubscriberCallback):
+        self.pattern = pattern
+        self.callback = callback
+        self._subscriptions = subscriptions
+
+    def unsubscribe(self) -> None:
+        """
+        Cancels the subscription. Does nothing if the subscription is already cancelled.
+        """
+        self._subscriptions._remove(self)
+
+    def __repr__(self) -> str:
+        return f"Subscription({self.pattern!r}, {self.callback!r})"
+
+
+class Subscriptions:
+    """
+    Registry of the subscribers to the changes of a configuration, indexed in a trie of their path patterns.
+    """
+
+    def __init__(self, separator: str = "."):
+        """
+        :param separator: Separator between the keys of the patterns.
+        """
+        self.separator = separator
+        self._root = _TrieNode()
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def subscribe(self, pattern: str, callback: SubscriberCallback) -> Subscription:
+        """
+        Subscribes to the changes of the paths that match a pattern.
+
+        A pattern matches a path if each key of the pattern is `*` or equal to the key of the path at the same
+        position, ex: "db.*" matches "db.HOST" and "db.replica.HOST". A changed path also concerns the patterns
+        that match its descendants, ex: replacing the whole "db" namespace notifies the subscribers of "db.HOST".
+
+        :param pattern: Path pattern, ex: "db.*". An empty pattern matches all the paths.
+        :param callback: Function called with the added, removed and changed paths that concern the subscriber.
+        :return: The subscription, which can be cancelled with `Subscription.unsubscribe`.
+        """
+        subscription = Subscription(self, pattern, callback)
+        with self._lock:
+            node = self._root
+            for key in pattern.split(self.separator) if pattern else ():
+                node = node.children.setdefault(key, _TrieNode())
+            node.subscriptions.append(subscription)
+            self._count += 1
+
+        return subscription
+
+    def _remove(self, subscription: Subscription) -> None:
+        pattern = subscription.pattern
+        with self._lock:
+            nodes = [self._root]
+            for key in pattern.split(self.separator) if pattern else ():
+                node = nodes[-1].children.get(key)
+                if node is None:
+                    return
+                nodes.append(node)
+
+            if subscription not in nodes[-1].subscriptions:
+                return
+            nodes[-1].subscriptions.remove(subscription)
+            self._count -= 1
+
+            # Prune the branches that do not lead to any subscription anymore
+            keys = pattern.split(self.separator) if pattern else []
+            for depth in range(len(keys), 0, -1):
+                node = nodes[depth]
+                if node.subscriptions or node.children:
+                    break
+                del nodes[depth - 1].children[keys[depth - 1]]
+
+    def _match(self, path: ConfigPath) -> Iterator[Subscription]:
+        """
+        Yields the subscriptions concerned by a change at a path: the subscriptions whose pattern matches the path or
+        one of its ancestors, and the subscriptions whose pattern may match a descendant of the path.
+        """
+        nodes = [self._root]
+        for key in path:
+            key = str(key)
+            next_nodes = []
+            for node in nodes:
+                yield from node.subscriptions
+                child = node.children.get(key)
+                if child is not None:
+                    next_nodes.append(child)
+                if key != WILDCARD:
+                    child = node.children.get(WILDCARD)
+                    if child is not None:
+                        next_nodes.append(child)
+            nodes = next_nodes
+            if not nodes:
+                return
+
+        for node in nodes:
+            for descendant in node.walk():
+                yield from descendant.subscriptions
+
+    def notify(self, diff: ConfigDiff) -> None:
+        """
+        Calls the subscribers concerned by changes of the configuration, once each, with the changes that concern
+        them. Exceptions raised by the callbacks are logged and do not prevent notifying the other subscribers.
+
+        :param diff: Changes of the configuration, see `diff_configs`.
+        """
+        diffs: Dict[Subscription, ConfigDiff] = {}
+        with self._lock:
+            for kind in ConfigDiff._fields:
+                for path in getattr(diff, kind):
+                    for subscription in self._match(path):
+                        subscriber_diff: Optional[ConfigDiff] = diffs.get(subscription)
+                        if subscriber_diff is None:
+                            subscriber_diff = diffs[subscription] = ConfigDiff([], [], [])
+                        paths = getattr(subscriber_diff, kind)
+                        if not paths or paths[-1] != path:
+                            paths.append(path)
+
+        for subscription, subscriber_diff in diffs.items():
+            try:
+                subscription.callback(subscriber_diff)
+            except Exception:
+                LOGGER.exception("Subscriber %r failed to process configuration changes.", subscription)
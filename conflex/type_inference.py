@@ -0,0 +1,187 @@
+"""
+Type inference for configuration values defined as strings (ex: environment variables).
+
+A TypeInferenceEngine tries a list of rules on each value, in order. A rule is a function that takes the value string
+and returns the converted value, or NO_MATCH if the value is not of its type. Rules never raise exceptions for values
+they do not match, which keeps the conversion of large configurations fast.
+
+The default rules convert booleans, integers and floating-point numbers. Additional rules are available for null
+values, durations, sizes and lists:
+>>> engine = TypeInferenceEngine(rules=[null_rule, *DEFAULT_RULES, duration_rule, size_rule, make_list_rule(",")])
+>>> engine.convert("30s")
+datetime.timedelta(seconds=30)
+"""
+
+import datetime
+import re
+from typing import Any, Callable, Dict, List, MutableMapping, Optional, Sequence
+
+NO_MATCH = object()
+
+Rule = Callable[[str], Any]
+
+BOOL_VALUES = {"true": True, "t": True, "y": True, "false": False, "f": False, "n": False}
+NULL_VALUES = frozenset(("null", "none", "~"))
+
+# Same syntax as `int` and `float`: surrounding whitespace and underscores between digits are allowed
+_DIGITS = r"\d(?:_?\d)*"
+_INT_REGEX = re.compile(rf"\s*[+-]?{_DIGITS}\s*\Z")
+_FLOAT_REGEX = re.compile(
+    rf"\s*[+-]?(?:{_DIGITS}\.(?:{_DIGITS})?|\.{_DIGITS}|{_DIGITS})(?:[eE][+-]?{_DIGITS})?\s*\Z"
+    r"|\s*[+-]?(?:inf|infinity|nan)\s*\Z",
+    re.IGNORECASE,
+)
+_DURATION_PART_REGEX = re.compile(r"([0-9]+(?:\.[0-9]+)?)(ms|s|m|h|d|w)")
+_DURATION_REGEX = re.compile(r"(?:[0-9]+(?:\.[0-9]+)?(?:ms|s|m|h|d|w))+\Z")
+_DURATION_UNITS = {
+    "ms": "milliseconds",
+    "s": "seconds",
+    "m": "minutes",
+    "h": "hours",
+    "d": "days",
+    "w": "weeks",
+}
+_SIZE_REGEX = re.compile(r"([0-9]+(?:\.[0-9]+)?) ?([kmgt]i?b?|b)\Z", re.IGNORECASE)
+_SIZE_UNITS = {"b": 1, "kb": 10**3, "mb": 10**6, "gb": 10**9, "tb": 10**12}
+_SIZE_UNITS.update({"k": 2**10, "m": 2**20, "g": 2**30, "t": 2**40})
+_SIZE_UNITS.update({"ki": 2**10, "mi": 2**20, "gi": 2**30, "ti": 2**40})
+_SIZE_UNITS.update({"kib": 2**10, "mib": 2**20, "gib": 2**30, "tib": 2**40})
+
+
+def bool_rule(value_str: str) -> Any:
+    """
+    Converts "true"/"t"/"y" and "false"/"f"/"n" (case-insensitive) to booleans.
+    """
+    return BOOL_VALUES.get(value_str.lower(), NO_MATCH)
+
+
+def int_rule(value_str: str) -> Any:
+    """
+    Converts decimal integers, ex: "8080", "-1" or "1_000".
+    """
+    return int(value_str) if _INT_REGEX.match(value_str) else NO_MATCH
+
+
+def float_rule(value_str: str) -> Any:
+    """
+    Converts floating-point numbers, ex: "1.5", "1e-3", "1_000.5" or "inf".
+    """
+    return float(value_str) if _FLOAT_REGEX.match(value_str) else NO_MATCH
+
+
+def null_rule(value_str: str) -> Any:
+    """
+    Converts "null", "none" and "~" (case-insensitive) to None.
+    """
+    return None if value_str.lower() in NULL_VALUES else NO_MATCH
+
+
+def duration_rule(value_str: str) -> Any:
+    """
+    Converts durations to timedelta objects, ex: "500ms", "30s", "1h30m". Supported units are ms, s, m, h, d and w.
+    """
+    if not _DURATION_REGEX.match(value_str):
+        return NO_MATCH
+
+    parts = _DURATION_PART_REGEX.findall(value_str)
+    units = [unit for _, unit in parts]
+    if len(set(units)) != len(units):
+        return NO_MATCH
+    return datetime.timedelta(**{_DURATION_UNITS[unit]: float(amount) for amount, unit in parts})
+
+
+def size_rule(value_str: str) -> Any:
+    """
+    Converts sizes to a number of bytes, ex: "128M", "512Mi" or "1.5GB". Single-letter units (K, M, G, T) and IEC
+    units (Ki, Mi... or KiB, MiB...) are powers of 1024, SI units (KB, MB...) are powers of 1000. Units are
+    case-insensitive.
+    """
+    match = _SIZE_REGEX.match(value_str)
+    if match is None:
+        return NO_MATCH
+
+    amount, unit = match.groups()
+    return int(float(amount) * _SIZE_UNITS[unit.lower()])
+
+
+def make_list_rule(separator: str = ",", item_rules: Optional[Sequence[Rule]] = None) -> Rule:
+    """
+    Creates a rule that converts separated values to lists, ex: "a,b,c". Values without separator do not match.
+
+    :param separator: Separator between the items.
+    :param item_rules: Rules used to convert the items. Defaults to DEFAULT_RULES.
+    :return: The list rule.
+    """
+    item_engine = TypeInferenceEngine(item_rules if item_rules is not None else DEFAULT_RULES)
+
+    def list_rule(value_str: str) -> Any:
+        if separator not in value_str:
+            return NO_MATCH
+        return [item_engine.convert(item.strip()) for item in value_str.split(separator)]
+
+    return list_rule
+
+
+DEFAULT_RULES: Sequence[Rule] = (bool_rule, int_rule, float_rule)
+
+
+class TypeInferenceEngine:
+    """
+    Converts string values to the most logical type using a list of rules. See the module documentation.
+
+    Conversions are memoized by value string, as the same values tend to be repeated across configurations.
+    Values converted to mutable objects (ex: lists) are not memoized.
+    """
+
+    def __init__(self, rules: Sequence[Rule] = DEFAULT_RULES, cache_size: int = 65536):
+        """
+        :param rules: Conversion rules, by order of priority.
+        :param cache_size: Maximum number of memoized conversions. The cache is cleared when it is full.
+        """
+        self.rules = tuple(rules)
+        self.cache_size = cache_size
+        self._cache: Dict[str, Any] = {}
+
+    def convert(self, value_str: str) -> Any:
+        """
+        Converts a string value with the first matching rule.
+
+        :param value_str: Value to convert, in string format.
+        :return: The value in its real type, or the string itself if no rule matches.
+        """
+        cache = self._cache
+        value = cache.get(value_str, NO_MATCH)
+        if value is not NO_MATCH:
+            return value
+
+        value = value_str
+        for rule in self.rules:
+            converted_value = rule(value_str)
+            if converted_value is not NO_MATCH:
+                value = converted_value
+                break
+
+        if isinstance(value, (list, dict, set)):
+            return value
+        if len(cache) >= self.cache_size:
+            cache.clear()
+        cache[value_str] = value
+        return value
+
+    def cast_values(self, config: MutableMapping[Any, Any]) -> None:
+        """
+        Converts all the string leaves of a configuration in place.
+        :param config: Configuration dictionary. Nested dictionaries are converted as well.
+        """
+        convert = self.convert
+        stack: List[MutableMapping[Any, Any]] = [config]
+        while stack:
+            node = stack.pop()
+            for k, v in node.items():
+                if isinstance(v, str):
+                    node[k] = convert(v)
+                elif isinstance(v, dict):
+                    stack.append(v)
+
+
+DEFAULT_ENGINE = TypeInferenceEngine()
@@ -15,7 +15,9 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/odesenfans/conflex.git",
     install_requires=["pyyaml>=5.0.0"],
+    extras_require={"json": ["orjson>=3.0.0"], "toml": ["tomli>=1.1.0; python_version < '3.11'"]},
     packages=setuptools.find_packages(exclude=("tests",)),
+    entry_points={"console_scripts": ["conflex=conflex.cli:main"]},
     classifiers=["Programming Language :: Python :: 3", "Operating System :: OS Independent",],
     python_requires=">=3.7",
 )
@@ -0,0 +1,130 @@
+import pickle
+import tracemalloc
+import unittest
+
+from conflex.compact import CompactConfigDict, CompactionPool, CompactPathIndex, compact_config
+from conflex.config_dict import merge_layers
+from conflex.config_store import ConfigStore
+
+from utils import DictConfigLoader
+
+
+def services_config(n_services: int) -> dict:
+    return {
+        f"service_{i}": {
+            "db": {"HOST": f"db-{i % 4}.internal", "PORT": 5432, "TIMEOUT": 30.0},
+            "features": {f"FLAG_{j}": j % 3 == 0 for j in range(10)},
+        }
+        for i in range(n_services)
+    }
+
+
+class CompactConfigDictTest(unittest.TestCase):
+    def test_read_api(self):
+        config = compact_config({"db": {"HOST": "localhost", "PORT": 5432, "HOSTS": ["a", "b"]}, "DEBUG": False})
+
+        self.assertIsInstance(config.db, CompactConfigDict)
+        self.assertEqual("localhost", config.db.HOST)
+        self.assertEqual(5432, config["db"]["PORT"])
+        self.assertEqual(("a", "b"), config.db.HOSTS)
+        self.assertIsNone(config.get("USER"))
+        self.assertEqual(["db", "DEBUG"], list(config))
+        self.assertEqual(2, len(config))
+        self.assertIn("DEBUG", config)
+        self.assertEqual([("DEBUG", False)], list(config.items())[1:])
+        self.assertEqual({"db": {"HOST": "localhost", "PORT": 5432, "HOSTS": ("a", "b")}, "DEBUG": False}, config)
+
+        with self.assertRaises(KeyError):
+            config["USER"]
+        with self.assertRaises(AttributeError):
+            config.USER
+        with self.assertRaises(TypeError):
+            config.DEBUG = True
+
+    def test_hash_and_pickle(self):
+        config = compact_config({"db": {"HOST": "localhost", "PORT": 5432}})
+        self.assertEqual(
+            hash(config), hash(CompactConfigDict({"db": CompactConfigDict({"PORT": 5432, "HOST": "localhost"})}))
+        )
+        self.assertEqual(config, pickle.loads(pickle.dumps(config)))
+
+    def test_shared_key_indexes(self):
+        config = compact_config({"a": {"HOST": "a", "PORT": 1}, "b": {"HOST": "b", "PORT": 2}})
+        self.assertIs(config.a._key_index, config.b._key_index)
+
+    def test_deduplication(self):
+        pool = CompactionPool()
+        base = pool.compact({"a": {"PORT": 5432, "TIMEOUT": 30.0}, "b": {"PORT": 5432, "TIMEOUT": 30.0}})
+        override = pool.compact({"a": {"TIMEOUT": 10.0}, "c": {"PORT": 5432, "TIMEOUT": 30.0}})
+
+        # Identical subtrees are shared, within and across configurations
+        self.assertIs(base.a, base.b)
+        self.assertIs(base.a, override.c)
+        merged_config = pool.compact(merge_layers([base, override], node_types=(dict, CompactConfigDict)))
+        self.assertEqual({"a": {"PORT": 5432, "TIMEOUT": 10.0}, "b": base.b, "c": base.b}, merged_config)
+        self.assertIs(base.b, merged_config.b)
+        self.assertIs(override.a.TIMEOUT, merged_config.a.TIMEOUT)
+
+    def test_compact_nodes_are_kept(self):
+        config = compact_config({"db": {"HOST": "localhost"}})
+        self.assertIs(config, CompactionPool().compact(config))
+
+    def test_signed_zeros(self):
+        config = compact_config({"a": 0.0, "b": -0.0})
+        self.assertEqual("-0x0.0p+0", config.b.hex())
+
+    def test_path_index(self):
+        path_index = CompactPathIndex(compact_config({"db": {"HOST": "localhost"}}))
+        self.assertEqual("localhost", path_index.get("db.HOST"))
+        self.assertIsNone(path_index.get("db.USER"))
+        self.assertEqual("default", path_index.get("db.HOST.NAME", "default"))
+
+
+class CompactConfigStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.env_loader = DictConfigLoader({"db": {"HOST": "remote"}})
+        self.config_store = ConfigStore(compact=True)
+        self.config_store.add(
+            "base", DictConfigLoader({"db": {"HOST": "localhost", "PORT": 5432}, "api": {"PORT": 80}})
+        )
+        self.config_store.add("env", self.env_loader)
+
+    def test_access(self):
+        self.assertIsInstance(self.config_store.db, CompactConfigDict)
+        self.assertEqual({"HOST": "remote", "PORT": 5432}, self.config_store.db)
+        self.assertEqual(80, self.config_store.get("api.PORT"))
+        self.assertIsNone(self.config_store.get("api.HOST"))
+        # The layers are compacted and share their subtrees with the merged configuration
+        self.assertIsInstance(self.config_store.configs["base"], CompactConfigDict)
+        self.assertIs(self.config_store.configs["base"].api, self.config_store.api)
+
+    def test_reload(self):
+        self.config_store.get("db.HOST")
+        diffs = []
+        self.config_store.subscribe("db.*", diffs.append)
+
+        self.env_loader.config = {"db": {"HOST": "other-remote"}}
+        self.config_store.reload(["env"])
+        self.assertEqual("other-remote", self.config_store.db.HOST)
+        self.assertEqual("other-remote", self.config_store.get("db.HOST"))
+        self.assertEqual([[("db", "HOST")]], [diff.changed for diff in diffs])
+        self.assertIsInstance(self.config_store.configs["env"], CompactConfigDict)
+
+    def test_overlay(self):
+        self.config_store.get("db.HOST")
+        overlay = self.config_store.overlay()
+        self.assertEqual({"HOST": "remote", "PORT": 5432}, overlay.db)
+
+    def test_memory(self):
+        def retained_memory(compact: bool) -> int:
+            tracemalloc.start()
+            try:
+                config_store = ConfigStore(compact=compact)
+                config_store.add("base", DictConfigLoader(services_config(200)))
+                config_store.add("env", DictConfigLoader({"service_0": {"db": {"HOST": "remote"}}}))
+                config_store.service_0
+                return tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+
+        self.assertLess(retained_memory(compact=True), retained_memory(compact=False) / 2)
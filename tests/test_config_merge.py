@@ -1,5 +1,15 @@
 import unittest
 
+from conflex.config_dict import (
+    DELETED,
+    ConfigDiff,
+    diff_configs,
+    diff_paths,
+    merge_layers,
+    minimal_paths,
+    remerge_paths,
+    replace_paths,
+)
 from conflex.config_store import ConfigDict, merge_configs
 
 
@@ -82,3 +92,135 @@ class ConfigMergeTest(unittest.TestCase):
 
         merged_dict = merge_configs(dict1, dict2)
         self.assertEqual(value, merged_dict.a.b.c.d)
+
+    def test_merge_conflict_error_messages(self):
+        with self.assertRaisesRegex(Exception, r"node \$\.a\.x\. Base layer is not a dict"):
+            merge_configs({"a": {"x": 1}}, {"a": {"x": {"y": "z"}}})
+        with self.assertRaisesRegex(Exception, r"node \$\.a\.x\. Base layer is a dict"):
+            merge_configs({"a": {"x": {"y": "z"}}}, {"a": {"x": 1}})
+
+    def test_merge_layers(self):
+        layers = [{"a": {"x": 1, "y": 2}}, {"a": {"x": 42}, "b": 3}, {"a": {"z": {"k": "v"}}}]
+
+        merged_dict = merge_layers(layers, dict_type=ConfigDict)
+
+        self.assertEqual({"a": {"x": 42, "y": 2, "z": {"k": "v"}}, "b": 3}, merged_dict)
+        self.assertIsInstance(merged_dict.a, ConfigDict)
+        self.assertIsInstance(merged_dict.a.z, ConfigDict)
+        self.assertEqual({"a": {"x": 1, "y": 2}}, layers[0])
+
+    def test_merge_layers_shares_untouched_subtrees(self):
+        base = ConfigDict(a=ConfigDict(x=1), b=ConfigDict(y=2))
+        override = ConfigDict(b=ConfigDict(y=3), c=ConfigDict(z=4))
+
+        merged_dict = merge_layers((base, override), dict_type=ConfigDict)
+
+        self.assertIs(base.a, merged_dict.a)
+        self.assertIs(override.c, merged_dict.c)
+        self.assertIsNot(base.b, merged_dict.b)
+        self.assertEqual(3, merged_dict.b.y)
+        self.assertEqual(2, base.b.y)
+
+    def test_merge_layers_converts_nested_dicts(self):
+        layer = ConfigDict({"db": {"HOST": "x", "replica": {"HOST": "y"}}, "api": ConfigDict(PORT=80)})
+
+        merged_dict = merge_layers((layer,), dict_type=ConfigDict)
+        self.assertEqual("x", merged_dict.db.HOST)
+        self.assertEqual("y", merged_dict.db.replica.HOST)
+        self.assertEqual(80, merged_dict.api.PORT)
+        self.assertEqual({"HOST": "x", "replica": {"HOST": "y"}}, layer["db"])
+        self.assertIs(dict, type(layer["db"]))
+
+        merged_dict = merge_configs(ConfigDict(), ConfigDict(db={"HOST": "x"}))
+        self.assertIsInstance(merged_dict["db"], ConfigDict)
+
+        # Plain dicts several levels below ConfigDict nodes
+        merged_dict = merge_configs(ConfigDict(), ConfigDict(api=ConfigDict(x={"a": 1}, y=ConfigDict(z={"b": 2}))))
+        self.assertEqual(1, merged_dict.api.x.a)
+        self.assertEqual(2, merged_dict.api.y.z.b)
+
+        # Layers made of ConfigDict nodes only are shared
+        layer = ConfigDict(api=ConfigDict(x=ConfigDict(a=1)))
+        self.assertIs(layer.api, merge_layers((layer, {"db": {}}), dict_type=ConfigDict).api)
+
+    def test_merge_layers_deep_nesting(self):
+        depth = 5000
+        layer = leaf = {}
+        for _ in range(depth):
+            leaf["a"] = {}
+            leaf = leaf["a"]
+        leaf["x"] = 1
+
+        merged_dict = merge_layers((layer, layer, {"b": 2}), dict_type=ConfigDict)
+
+        node = merged_dict
+        for _ in range(depth):
+            node = node.a
+        self.assertEqual(1, node.x)
+        self.assertEqual(2, merged_dict.b)
+
+    def test_merge_layers_non_string_keys(self):
+        merged_dict = merge_layers(({1: {2: "a"}}, {1: {3: "b"}}), dict_type=ConfigDict)
+        self.assertEqual({1: {2: "a", 3: "b"}}, merged_dict)
+
+    def test_diff_paths(self):
+        shared = {"x": 1}
+        old_config = {"a": {"x": 1, "y": 2}, "b": shared, "c": {"z": 3}, "d": 4}
+        new_config = {"a": {"x": 1, "y": 3}, "b": shared, "c": 3, "e": {"f": 5}}
+
+        self.assertEqual(
+            sorted([("a", "y"), ("c",), ("d",), ("e",)]),
+            sorted(diff_paths(old_config, new_config)),
+        )
+        self.assertEqual([], diff_paths(old_config, old_config))
+        self.assertEqual([("a",)], diff_paths({"a": 1}, {"a": True}))
+
+    def test_diff_configs(self):
+        shared = {"x": 1}
+        old_config = {"a": {"x": 1, "y": 2}, "b": shared, "c": {"z": 3}, "d": 4}
+        new_config = {"a": {"x": 1, "y": 3}, "b": shared, "c": 3, "e": {"f": 5}}
+
+        diff = diff_configs(old_config, new_config)
+        self.assertEqual([("e",)], diff.added)
+        self.assertEqual([("d",)], diff.removed)
+        self.assertEqual(sorted([("a", "y"), ("c",)]), sorted(diff.changed))
+        self.assertTrue(diff_configs(old_config, old_config).is_empty())
+
+    def test_diff_configs_at_paths(self):
+        old_config = {"a": {"x": 1, "y": 2}, "b": {"k": "v"}, "c": 1}
+        new_config = {"a": {"x": 1, "y": 3, "z": 4}, "b": {"k": "v"}, "c": 2}
+
+        # Only the listed paths are compared
+        self.assertEqual(
+            ConfigDiff(added=[("a", "z")], removed=[], changed=[("a", "y")]),
+            diff_configs(old_config, new_config, [("a",), ("b",), ("a", "x")]),
+        )
+        self.assertTrue(diff_configs(old_config, new_config, []).is_empty())
+
+    def test_minimal_paths(self):
+        self.assertEqual([("a",), ("b", "c")], minimal_paths([("a", "x"), ("a",), ("b", "c"), ("a", "y", "z")]))
+
+    def test_replace_paths(self):
+        config = ConfigDict(a=ConfigDict(x=1, y=ConfigDict(z=2)), b=ConfigDict(k="v"))
+
+        new_config = replace_paths(config, {("a", "y", "z"): 3, ("a", "x"): DELETED})
+
+        self.assertEqual({"a": {"y": {"z": 3}}, "b": {"k": "v"}}, new_config)
+        self.assertIsInstance(new_config.a.y, ConfigDict)
+        self.assertIs(config.b, new_config.b)
+        self.assertEqual({"a": {"x": 1, "y": {"z": 2}}, "b": {"k": "v"}}, config)
+
+    def test_remerge_paths(self):
+        lower = ConfigDict(a=ConfigDict(x=1, y=2), b=ConfigDict(k="v"))
+        layer = ConfigDict(a=ConfigDict(x=10))
+        merged = merge_layers((lower, layer), dict_type=ConfigDict)
+
+        new_layer = ConfigDict(a=ConfigDict(x=20, z=ConfigDict(w=1)))
+        new_merged = remerge_paths(merged, lower, new_layer, diff_paths(layer, new_layer))
+
+        self.assertEqual(merge_layers((lower, new_layer), dict_type=ConfigDict), new_merged)
+        self.assertIs(merged.b, new_merged.b)
+
+        with self.assertRaisesRegex(Exception, r"node \$\.a\.y\. Base layer is not a dict"):
+            conflicting_layer = ConfigDict(a=ConfigDict(y=ConfigDict(w=1)))
+            remerge_paths(merged, lower, conflicting_layer, diff_paths(layer, conflicting_layer))
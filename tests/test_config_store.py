@@ -0,0 +1,242 @@
+import asyncio
+import random
+import threading
+import time
+import unittest
+
+from conflex.config_dict import ConfigDict, FrozenConfigDict, build_path_index, freeze_config, merge_layers
+from conflex.config_loader import AsyncConfigLoader, ConfigLoader
+from conflex.config_store import ConfigStore
+from conflex.exc import ConfigLoadErrors, ConfigLoaderException
+
+from utils import DictConfigLoader
+
+
+class FailingConfigLoader(ConfigLoader):
+    def __init__(self, message: str):
+        self.message = message
+
+    def load(self) -> ConfigDict:
+        raise ConfigLoaderException(self.message)
+
+
+class AsyncDictConfigLoader(AsyncConfigLoader):
+    def __init__(self, config: dict, delay: float = 0.0):
+        self.config = config
+        self.delay = delay
+
+    async def aload(self) -> ConfigDict:
+        await asyncio.sleep(self.delay)
+        return merge_layers((self.config,), dict_type=ConfigDict)
+
+
+class ConfigStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.config_store = ConfigStore()
+        self.config_store.add("base", DictConfigLoader({"db": {"HOST": "localhost", "PORT": 5432}, "DEBUG": False}))
+        self.config_store.add("override", DictConfigLoader({"db": {"HOST": "remote"}}))
+
+    def test_get(self):
+        self.assertEqual("remote", self.config_store.get("db.HOST"))
+        self.assertEqual(5432, self.config_store.get("db.PORT"))
+        self.assertEqual(False, self.config_store.get("DEBUG"))
+        self.assertEqual({"HOST": "remote", "PORT": 5432}, self.config_store.get("db"))
+        self.assertEqual(self.config_store.db.HOST, self.config_store.get("db.HOST"))
+
+    def test_get_missing_path(self):
+        self.assertIsNone(self.config_store.get("db.USER"))
+        self.assertEqual("postgres", self.config_store.get("db.USER", "postgres"))
+        self.assertEqual("x", self.config_store.get("db.HOST.x", default="x"))
+
+    def test_get_many(self):
+        self.assertEqual(
+            ["remote", 5432, None],
+            self.config_store.get_many(["db.HOST", "db.PORT", "db.USER"]),
+        )
+
+    def test_concurrent_first_access(self):
+        loaders = [DictConfigLoader({"a": {"X": i}}, delay=0.05) for i in range(3)]
+        config_store = ConfigStore()
+        for i, loader in enumerate(loaders):
+            config_store.add(f"layer-{i}", loader)
+
+        results = []
+        barrier = threading.Barrier(8)
+
+        def read_config():
+            barrier.wait()
+            results.append((config_store.a.X, config_store["layer-0"].a.X))
+
+        threads = [threading.Thread(target=read_config) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([(2, 0)] * 8, results)
+        self.assertEqual([1, 1, 1], [loader.load_count for loader in loaders])
+
+
+class ParallelLoadTest(unittest.TestCase):
+    def test_parallel_load(self):
+        loaders = [DictConfigLoader({"a": {"X": i, f"Y{i}": i}}, delay=0.2) for i in range(4)]
+        config_store = ConfigStore(parallel_load=True, max_load_workers=4)
+        for i, loader in enumerate(loaders):
+            config_store.add(f"layer-{i}", loader)
+
+        start = time.perf_counter()
+        self.assertEqual(3, config_store.a.X)
+        self.assertLess(time.perf_counter() - start, 0.6)
+
+        self.assertEqual(["X", "Y0", "Y1", "Y2", "Y3"], list(config_store.a))
+        self.assertEqual([1, 1, 1, 1], [loader.load_count for loader in loaders])
+
+    def test_parallel_load_errors(self):
+        config_store = ConfigStore(parallel_load=True)
+        config_store.add("base", DictConfigLoader({"a": 1}))
+        config_store.add("secrets", FailingConfigLoader("secrets not found"))
+        config_store.add("override", FailingConfigLoader("override not found"))
+
+        with self.assertRaises(ConfigLoadErrors) as cm:
+            _ = config_store.a
+
+        self.assertEqual(["secrets", "override"], list(cm.exception.errors))
+        self.assertIn("secrets not found", str(cm.exception))
+        self.assertIn("override not found", str(cm.exception))
+
+    def test_parallel_load_single_error(self):
+        config_store = ConfigStore(parallel_load=True)
+        config_store.add("base", DictConfigLoader({"a": 1}))
+        config_store.add("secrets", FailingConfigLoader("secrets not found"))
+
+        self.assertRaisesRegex(ConfigLoaderException, "secrets not found", getattr, config_store, "a")
+
+
+class AsyncLoadTest(unittest.TestCase):
+    def test_aload(self):
+        config_store = ConfigStore()
+        config_store.add("base", DictConfigLoader({"db": {"HOST": "localhost", "PORT": 5432}}, delay=0.2))
+        config_store.add("secrets", AsyncDictConfigLoader({"db": {"PASSWORD": "hunter2"}}, delay=0.2))
+        config_store.add("override", AsyncDictConfigLoader({"db": {"HOST": "remote"}}, delay=0.2))
+
+        start = time.perf_counter()
+        asyncio.run(config_store.aload())
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+        self.assertIsNotNone(config_store.merged_config)
+        self.assertEqual({"HOST": "remote", "PORT": 5432, "PASSWORD": "hunter2"}, config_store.db)
+
+    def test_aload_errors(self):
+        config_store = ConfigStore()
+        config_store.add("base", AsyncDictConfigLoader({"a": 1}))
+        config_store.add("secrets", FailingConfigLoader("secrets not found"))
+        config_store.add("override", FailingConfigLoader("override not found"))
+
+        with self.assertRaises(ConfigLoadErrors) as cm:
+            asyncio.run(config_store.aload())
+        self.assertEqual(["secrets", "override"], list(cm.exception.errors))
+        self.assertEqual({"a": 1}, config_store["base"])
+
+    def test_async_loader_sync_access(self):
+        config_store = ConfigStore()
+        config_store.add("base", AsyncDictConfigLoader({"a": 1}))
+        self.assertEqual(1, config_store.a)
+
+
+def random_config(rng: random.Random, depth: int = 3) -> dict:
+    config = {}
+    for key in rng.sample("abcdef", rng.randint(1, 4)):
+        if depth > 0 and key in "abc":
+            config[key] = random_config(rng, depth - 1)
+        else:
+            config[key.upper()] = rng.randint(0, 3)
+    return config
+
+
+class IncrementalMergeTest(unittest.TestCase):
+    def test_reload_shares_unchanged_subtrees(self):
+        base_loader = DictConfigLoader({"db": {"HOST": "localhost"}, "api": {"VERSION": "1.0"}})
+        env_loader = DictConfigLoader({"db": {"HOST": "remote"}})
+        config_store = ConfigStore()
+        config_store.add("base", base_loader)
+        config_store.add("env", env_loader)
+
+        self.assertEqual("remote", config_store.db.HOST)
+        old_config = config_store.merged_config
+        env_loader.config = {"db": {"HOST": "other-remote"}}
+        config_store.reload(["env"])
+
+        self.assertEqual("other-remote", config_store.db.HOST)
+        self.assertEqual("other-remote", config_store.get("db.HOST"))
+        self.assertIs(old_config.api, config_store.api)
+        self.assertEqual(1, base_loader.load_count)
+
+    def test_reload_matches_full_merge(self):
+        rng = random.Random(42)
+        reload_count = 0
+        for freeze in (False, True):
+            loaders = [DictConfigLoader(random_config(rng)) for _ in range(4)]
+            config_store = ConfigStore(freeze=freeze)
+            for i, loader in enumerate(loaders):
+                config_store.add(f"layer-{i}", loader)
+
+            for _ in range(30):
+                try:
+                    config_store._get_merged_config()
+                except Exception:
+                    # Conflicting random layers, start over with other layers
+                    break
+
+                changed_loaders = rng.sample(range(4), rng.randint(1, 2))
+                old_layers = [loader.config for loader in loaders]
+                for i in changed_loaders:
+                    loaders[i].config = random_config(rng)
+                try:
+                    expected_config = merge_layers([loader.config for loader in loaders], dict_type=ConfigDict)
+                except Exception:
+                    for loader, layer in zip(loaders, old_layers):
+                        loader.config = layer
+                    continue
+
+                config_store.reload([f"layer-{i}" for i in changed_loaders])
+                if freeze:
+                    expected_config = freeze_config(expected_config)
+                self.assertEqual(expected_config, config_store.merged_config)
+                self.assertEqual(build_path_index(expected_config), config_store._path_index)
+                reload_count += 1
+                if freeze:
+                    for value in config_store._path_index.values():
+                        self.assertNotIsInstance(value, dict)
+
+        self.assertGreater(reload_count, 10)
+
+
+class FrozenConfigStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.config_store = ConfigStore(freeze=True)
+        self.config_store.add("base", DictConfigLoader({"db": {"HOST": "localhost", "REPLICAS": ["r1", "r2"]}}))
+        self.config_store.add("override", DictConfigLoader({"db": {"HOST": "remote"}}))
+
+    def test_frozen_merged_config(self):
+        db_config = self.config_store.db
+
+        self.assertIsInstance(db_config, FrozenConfigDict)
+        self.assertEqual("remote", db_config.HOST)
+        self.assertEqual(("r1", "r2"), db_config.REPLICAS)
+        self.assertEqual(("r1", "r2"), self.config_store.get("db.REPLICAS"))
+        self.assertEqual({"db": {"HOST": "remote", "REPLICAS": ("r1", "r2")}}, dict(self.config_store.merged_config))
+
+    def test_frozen_config_is_immutable(self):
+        db_config = self.config_store.db
+
+        with self.assertRaises(TypeError):
+            db_config["HOST"] = "localhost"
+        with self.assertRaises(TypeError):
+            db_config.HOST = "localhost"
+        with self.assertRaises(AttributeError):
+            _ = db_config.USER
+
+    def test_frozen_config_is_hashable(self):
+        db_config = self.config_store.db
+        self.assertEqual(hash(db_config), hash(FrozenConfigDict(db_config)))
+        self.assertEqual(1, len({db_config, FrozenConfigDict(db_config)}))
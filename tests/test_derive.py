@@ -0,0 +1,138 @@
+import gc
+import unittest
+import weakref
+from dataclasses import dataclass
+
+from conflex.config_dict import ConfigDict, FrozenConfigDict, LayeredPathIndex, build_path_index, merge_layers
+from conflex.config_store import ConfigStore
+from conflex.exc import ConfigStoreException
+
+from utils import DictConfigLoader
+
+BASE_CONFIG = {
+    "db": {"HOST": "localhost", "PORT": 5432, "options": {"SSL": False}},
+    "api": {"PORT": 80, "TIMEOUT": 10},
+}
+
+
+class LayeredPathIndexTest(unittest.TestCase):
+    def test_get(self):
+        base_config = merge_layers((BASE_CONFIG,), dict_type=ConfigDict)
+        config = ConfigDict(base_config)
+        config["db"] = ConfigDict({**base_config.db, "HOST": "remote", "options": "none"})
+        path_index = LayeredPathIndex(build_path_index(base_config), base_config, config)
+
+        self.assertEqual("remote", path_index.get("db.HOST"))
+        self.assertEqual(5432, path_index.get("db.PORT"))
+        self.assertEqual(config.db, path_index.get("db"))
+        self.assertEqual("none", path_index.get("db.options"))
+        self.assertEqual("default", path_index.get("db.options.SSL", "default"))
+        self.assertEqual(80, path_index.get("api.PORT"))
+        self.assertIsNone(path_index.get("api.HOST"))
+        # Only the changed paths and their ancestors are indexed
+        self.assertEqual({"db", "db.HOST", "db.options", "db.options.SSL"}, set(path_index.paths))
+
+
+class DeriveTest(unittest.TestCase):
+    def setUp(self):
+        self.base_loader = DictConfigLoader(BASE_CONFIG)
+        self.config_store = ConfigStore()
+        self.config_store.add("base", self.base_loader)
+        self.tenant_loader = DictConfigLoader({"db": {"HOST": "tenant-db"}})
+        self.tenant_store = self.config_store.derive("tenant", self.tenant_loader)
+
+    def test_access(self):
+        self.assertEqual({"HOST": "tenant-db", "PORT": 5432, "options": {"SSL": False}}, self.tenant_store.db)
+        self.assertEqual("tenant-db", self.tenant_store.get("db.HOST"))
+        self.assertEqual(80, self.tenant_store.get("api.PORT"))
+        self.assertEqual("localhost", self.config_store.db.HOST)
+        self.assertEqual({"HOST": "localhost", "PORT": 5432, "options": {"SSL": False}}, self.tenant_store["base"].db)
+        self.assertEqual({"HOST": "tenant-db"}, self.tenant_store["tenant"].db)
+
+        # Unchanged subtrees are shared with the parent store
+        self.assertIs(self.config_store.api, self.tenant_store.api)
+        self.assertIs(self.config_store.db.options, self.tenant_store.db.options)
+
+    def test_overlay(self):
+        overlay = self.tenant_store.overlay()
+        self.assertEqual("tenant-db", overlay.db.HOST)
+        self.assertEqual(80, overlay.api.PORT)
+
+    def test_duplicate_namespace(self):
+        with self.assertRaises(ConfigStoreException):
+            self.config_store.derive("base", DictConfigLoader({}))
+        with self.assertRaises(ConfigStoreException):
+            self.tenant_store.add("base", DictConfigLoader({}))
+        # The namespaces of the parent store are locked once it is derived
+        with self.assertRaises(ConfigStoreException):
+            self.config_store.add("tenant", DictConfigLoader({}))
+
+    def test_parent_reload(self):
+        self.tenant_store.get("db.HOST")
+        diffs = []
+        self.tenant_store.subscribe("api.*", diffs.append)
+
+        self.base_loader.config = {**BASE_CONFIG, "api": {"PORT": 8080, "TIMEOUT": 10}}
+        self.config_store.reload(["base"])
+        self.assertEqual(8080, self.tenant_store.api.PORT)
+        self.assertEqual(8080, self.tenant_store.get("api.PORT"))
+        self.assertEqual("tenant-db", self.tenant_store.db.HOST)
+        self.assertEqual([[("api", "PORT")]], [diff.changed for diff in diffs])
+
+    def test_no_follow(self):
+        tenant_store = self.config_store.derive("other", DictConfigLoader({}), follow=False)
+        tenant_store.get("api.PORT")
+
+        self.base_loader.config = {**BASE_CONFIG, "api": {"PORT": 8080}}
+        self.config_store.reload(["base"])
+        self.assertEqual(80, tenant_store.get("api.PORT"))
+        self.assertEqual(8080, self.tenant_store.get("api.PORT"))
+
+    def test_reload(self):
+        self.tenant_store.get("db.HOST")
+        self.tenant_loader.config = {"api": {"TIMEOUT": 30}}
+        self.tenant_store.reload(["tenant"])
+        self.assertEqual("localhost", self.tenant_store.get("db.HOST"))
+        self.assertEqual(30, self.tenant_store.api.TIMEOUT)
+        self.assertIs(self.config_store.db, self.tenant_store.db)
+
+    def test_frozen_store(self):
+        config_store = ConfigStore(freeze=True)
+        config_store.add("base", self.base_loader)
+        tenant_store = config_store.derive("tenant", self.tenant_loader)
+
+        self.assertIsInstance(tenant_store.db, FrozenConfigDict)
+        self.assertEqual("tenant-db", tenant_store.db.HOST)
+        self.assertIs(config_store.api, tenant_store.api)
+
+    def test_schema(self):
+        @dataclass
+        class Api:
+            PORT: int
+            TIMEOUT: int
+
+        @dataclass
+        class AppConfig:
+            api: Api
+
+        config_store = ConfigStore(schema=AppConfig)
+        config_store.add("base", self.base_loader)
+        self.assertIsNone(config_store.derive("tenant", self.tenant_loader).schema)
+
+        tenant_store = config_store.derive("typed-tenant", self.tenant_loader, inherit_schema=True)
+        self.assertEqual(80, tenant_store.typed().api.PORT)
+
+    def test_unsupported_stores(self):
+        for options in ({"compact": True}, {"interpolate": True}):
+            config_store = ConfigStore(**options)
+            with self.assertRaises(ConfigStoreException):
+                config_store.derive("tenant", self.tenant_loader)
+
+    def test_derived_stores_are_not_kept_alive(self):
+        tenant_store = self.config_store.derive("other", DictConfigLoader({}))
+        tenant_store.get("db.HOST")
+        reference = weakref.ref(tenant_store)
+        del tenant_store
+        gc.collect()
+        self.assertIsNone(reference())
+        self.config_store.reload(["base"])
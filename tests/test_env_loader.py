@@ -2,7 +2,7 @@ import os
 import unittest
 from unittest import mock
 
-from conflex.backends.env import EnvConfigLoader
+from conflex.backends.env import EnvConfigLoader, EnvironmentIndex
 
 
 class EnvConfigLoaderTest(unittest.TestCase):
@@ -44,3 +44,45 @@ class EnvConfigLoaderTest(unittest.TestCase):
         self.assertEqual(False, config_dict.FALSE)
         self.assertEqual(True, config_dict.TRUE)
         self.assertEqual(1.4142, config_dict.FLOAT)
+
+    @mock.patch.dict(os.environ, {"CONF__DB__HOST": "localhost", "FLAG__NEW_UI": "true"})
+    def test_reuse_config_until_environment_changes(self):
+        loader = EnvConfigLoader(prefix="CONF__", separator="__")
+        flag_loader = EnvConfigLoader(prefix="FLAG__")
+
+        config_dict = loader.load()
+        self.assertIs(config_dict, loader.load())
+        self.assertEqual(True, flag_loader.load().NEW_UI)
+
+        os.environ["CONF__DB__PORT"] = "5432"
+        new_config_dict = loader.load()
+        self.assertIsNot(config_dict, new_config_dict)
+        self.assertEqual({"db": {"HOST": "localhost", "PORT": 5432}}, new_config_dict)
+        self.assertEqual({"db": {"HOST": "localhost"}}, config_dict)
+
+
+class EnvironmentIndexTest(unittest.TestCase):
+    def test_variables(self):
+        environ = {"CONF_X": "0", "CONF__A": "1", "CONF__B": "2", "CONF": "3", "OTHER__A": "4"}
+        index = EnvironmentIndex(environ)
+
+        version, variables = index.variables("CONF__")
+        self.assertEqual([("CONF__A", "1"), ("CONF__B", "2")], variables)
+        self.assertEqual([("OTHER__A", "4")], index.variables("OTHER__")[1])
+        self.assertEqual([], index.variables("MISSING__")[1])
+        self.assertEqual(version, index.variables("CONF__")[0])
+
+        environ["CONF__C"] = "5"
+        new_version, variables = index.variables("CONF__")
+        self.assertNotEqual(version, new_version)
+        self.assertEqual([("CONF__A", "1"), ("CONF__B", "2"), ("CONF__C", "5")], variables)
+
+    def test_environment_order(self):
+        environ = {"CONF__b": "1", "CONF__a": "2", "CONF__B": "3"}
+        index = EnvironmentIndex(environ)
+        self.assertEqual([("CONF__b", "1"), ("CONF__a", "2"), ("CONF__B", "3")], index.variables("CONF__")[1])
+
+    @mock.patch.dict(os.environ, {"CONF__api__HOST": "localhost"})
+    def test_last_variable_wins(self):
+        os.environ["CONF__API__HOST"] = "remote"
+        self.assertEqual("remote", EnvConfigLoader(prefix="CONF__", separator="__").load().api.HOST)
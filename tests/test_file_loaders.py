@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from conflex.backends import (
+    FILE_LOADERS,
+    JsonConfigLoader,
+    TomlConfigLoader,
+    YamlConfigLoader,
+    load_file,
+    register_file_loader,
+)
+from conflex.backends import json as json_backend
+from conflex.backends import toml as toml_backend
+from conflex.config_dict import ConfigDict, to_config_dict
+from conflex.config_store import ConfigStore
+from conflex.exc import ConfigLoaderException
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class FileLoaderTestMixin:
+    loader_class = None
+    fixture_name = None
+    invalid_contents = ()
+
+    def fixture_path(self) -> str:
+        return os.path.join(FIXTURES_DIR, self.fixture_name)
+
+    def test_loader(self):
+        config_dict = self.loader_class(self.fixture_path()).load()
+        self.assertEqual(3.141592, config_dict.app.VERSION)
+        self.assertEqual("localhost", config_dict.db.HOST)
+        self.assertEqual("admin", config_dict.db.USER)
+        self.assertEqual("replica-2", config_dict.db.REPLICAS[1].HOST)
+
+    def test_config_dict_nodes(self):
+        config_dict = self.loader_class(self.fixture_path()).load()
+        self.assertIsInstance(config_dict, ConfigDict)
+        self.assertIsInstance(config_dict.db, ConfigDict)
+        self.assertIsInstance(config_dict.db.REPLICAS[0], ConfigDict)
+
+    def test_config_store(self):
+        config_store = ConfigStore()
+        config_store.add("base", load_file(self.fixture_path()))
+        self.assertEqual("localhost", config_store.db.HOST)
+        self.assertEqual([self.fixture_path()], config_store.loaders["base"].sources())
+
+    def test_invalid_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config_file_path = os.path.join(tmp_dir, self.fixture_name)
+            for content in self.invalid_contents:
+                with open(config_file_path, "w") as f:
+                    f.write(content)
+                self.assertRaises(ConfigLoaderException, self.loader_class(config_file_path).load)
+
+            self.assertRaises(ConfigLoaderException, self.loader_class(os.path.join(tmp_dir, "missing")).load)
+
+
+class JsonConfigLoaderTest(FileLoaderTestMixin, unittest.TestCase):
+    loader_class = JsonConfigLoader
+    fixture_name = "config_fixture.json"
+    invalid_contents = ('{"db": ', "[1, 2]", "")
+
+    def test_standard_library_parser(self):
+        with mock.patch.object(json_backend, "orjson", None):
+            self.test_config_dict_nodes()
+            self.test_invalid_files()
+
+
+class TomlConfigLoaderTest(FileLoaderTestMixin, unittest.TestCase):
+    loader_class = TomlConfigLoader
+    fixture_name = "config_fixture.toml"
+    invalid_contents = ("[db", "HOST = localhost")
+
+    def setUp(self):
+        if toml_backend.tomllib is None:
+            self.skipTest("Parsing TOML files requires Python 3.11+ or tomli")
+
+
+class LoadFileTest(unittest.TestCase):
+    def test_loader_by_extension(self):
+        self.assertIsInstance(load_file("config.json"), JsonConfigLoader)
+        self.assertIsInstance(load_file("config.toml"), TomlConfigLoader)
+        self.assertIsInstance(load_file("config.yaml"), YamlConfigLoader)
+        self.assertIsInstance(load_file("config.YML", help_msg="help"), YamlConfigLoader)
+
+    def test_unsupported_extension(self):
+        with self.assertRaises(ConfigLoaderException):
+            load_file("config.ini")
+
+    def test_register_file_loader(self):
+        with mock.patch.dict(FILE_LOADERS):
+            register_file_loader(".CONF", JsonConfigLoader)
+            self.assertIsInstance(load_file("app.conf"), JsonConfigLoader)
+
+
+class ToConfigDictTest(unittest.TestCase):
+    def test_conversion(self):
+        config = to_config_dict({"a": {"b": [{"c": 1}, [{"d": 2}]]}, "e": 3})
+        self.assertEqual({"a": {"b": [{"c": 1}, [{"d": 2}]]}, "e": 3}, config)
+        self.assertIsInstance(config.a, ConfigDict)
+        self.assertIsInstance(config.a.b[0], ConfigDict)
+        self.assertIsInstance(config.a.b[1][0], ConfigDict)
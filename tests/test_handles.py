@@ -0,0 +1,114 @@
+import gc
+import unittest
+import weakref
+
+from conflex.config_store import ConfigStore
+from conflex.handles import ConfigHandle, ConfigHandles
+
+from utils import DictConfigLoader
+
+
+class RecordingPathIndex(dict):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.paths = []
+
+    def get(self, path, default=None):
+        self.paths.append(path)
+        return super().get(path, default)
+
+
+class ConfigHandlesTest(unittest.TestCase):
+    def setUp(self):
+        self.store = ConfigStore()
+        self.handles = ConfigHandles()
+        self.bound = [ConfigHandle(self.store, path) for path in ("db", "db.HOST", "db.replica.HOST", "api.PORT")]
+        for handle in self.bound:
+            self.handles.add(handle)
+
+    def refreshed_paths(self, changed_paths):
+        path_index = RecordingPathIndex({"db.HOST": "remote"})
+        self.handles.refresh(path_index, changed_paths)
+        return sorted(path_index.paths)
+
+    def test_refresh(self):
+        self.assertEqual(["db", "db.HOST"], self.refreshed_paths([("db", "HOST")]))
+        self.assertEqual(["db", "db.HOST", "db.replica.HOST"], self.refreshed_paths([("db",)]))
+        self.assertEqual([], self.refreshed_paths([("cache", "HOST")]))
+        self.assertEqual(["api.PORT", "db", "db.HOST", "db.replica.HOST"], self.refreshed_paths(None))
+        self.assertEqual("remote", self.bound[1].value)
+        self.assertIsNone(self.bound[0].value)
+
+    def test_remove(self):
+        self.handles.remove(self.bound[1])
+        self.handles.remove(self.bound[1])
+        self.assertEqual(3, len(self.handles))
+        self.assertEqual(["db"], self.refreshed_paths([("db", "HOST")]))
+
+    def test_weak_references(self):
+        del self.bound[1:]
+        gc.collect()
+        self.assertEqual(1, len(self.handles))
+
+
+class ConfigStoreBindTest(unittest.TestCase):
+    def setUp(self):
+        self.env_loader = DictConfigLoader({"db": {"HOST": "remote"}})
+        self.config_store = ConfigStore()
+        self.config_store.add(
+            "base", DictConfigLoader({"db": {"HOST": "localhost", "PORT": 5432}, "api": {"PORT": 80}})
+        )
+        self.config_store.add("env", self.env_loader)
+
+    def test_bind(self):
+        db_host = self.config_store.bind("db.HOST")
+        self.assertEqual("remote", db_host.value)
+        self.assertEqual({"HOST": "remote", "PORT": 5432}, self.config_store.bind("db").value)
+        self.assertEqual("default", self.config_store.bind("db.USER", default="default").value)
+        self.assertIs(self.config_store, db_host.store)
+
+        with self.assertRaises(ValueError):
+            self.config_store.bind("")
+
+    def test_reload(self):
+        db_host = self.config_store.bind("db.HOST")
+        db_user = self.config_store.bind("db.USER", default="default")
+        db = self.config_store.bind("db")
+        api_port = self.config_store.bind("api.PORT")
+        api = api_port.value
+
+        self.env_loader.config = {"db": {"HOST": "other-remote", "USER": "user"}}
+        self.config_store.reload(["env"])
+        self.assertEqual("other-remote", db_host.value)
+        self.assertEqual("user", db_user.value)
+        self.assertIs(self.config_store.db, db.value)
+        self.assertIs(api, api_port.value)
+
+        self.env_loader.config = {}
+        self.config_store.reload(["env"])
+        self.assertEqual("localhost", db_host.value)
+        self.assertEqual("default", db_user.value)
+
+    def test_unbind(self):
+        db_host = self.config_store.bind("db.HOST")
+        db_host.unbind()
+        self.env_loader.config = {"db": {"HOST": "other-remote"}}
+        self.config_store.reload(["env"])
+        self.assertEqual("remote", db_host.value)
+
+    def test_derived_store(self):
+        tenant_store = self.config_store.derive("tenant", DictConfigLoader({"db": {"USER": "tenant"}}))
+        db_host = tenant_store.bind("db.HOST")
+        self.env_loader.config = {"db": {"HOST": "other-remote"}}
+        self.config_store.reload(["env"])
+        self.assertEqual("other-remote", db_host.value)
+
+    def test_store_is_not_kept_alive(self):
+        db_host = self.config_store.bind("db.HOST")
+        reference = weakref.ref(self.config_store)
+        del self.config_store
+        gc.collect()
+        self.assertIsNone(reference())
+        self.assertIsNone(db_host.store)
+        self.assertEqual("remote", db_host.value)
+        db_host.unbind()
@@ -0,0 +1,205 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from conflex.backends.http import ConnectionPool, HttpConfigLoader
+from conflex.config_store import ConfigStore
+from conflex.exc import ConfigLoaderException
+
+
+class StubConfigHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers), self.client_address))
+        if server.failures:
+            server.failures -= 1
+            self.send_response(server.failure_status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", server.content_type)
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubConfigServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubConfigHandler)
+        self.requests = []
+        self.failures = 0
+        self.failure_status = 503
+        self.set_document(b'{"db": {"HOST": "localhost", "PORT": 5432}}', '"v1"')
+
+    def set_document(self, body: bytes, etag: str, content_type: str = "application/json"):
+        self.body, self.etag, self.content_type = body, etag, content_type
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/config"
+
+
+class HttpConfigLoaderTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StubConfigServer()
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.pool = ConnectionPool()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fallback_path = os.path.join(self.tmp_dir.name, "config.fallback")
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def create_loader(self, **kwargs) -> HttpConfigLoader:
+        kwargs.setdefault("retry_backoff", 0.0)
+        return HttpConfigLoader(self.server.url, pool=self.pool, **kwargs)
+
+    def test_load(self):
+        config = self.create_loader().load()
+        self.assertEqual({"db": {"HOST": "localhost", "PORT": 5432}}, config)
+        self.assertEqual("localhost", config.db.HOST)
+        self.assertEqual("/config", self.server.requests[0][0])
+
+    def test_formats(self):
+        self.server.set_document(b"db:\n  HOST: localhost\n", '"v1"', content_type="application/yaml")
+        self.assertEqual({"db": {"HOST": "localhost"}}, self.create_loader().load())
+        self.server.set_document(b'[db]\nHOST = "localhost"\n', '"v1"', content_type="text/plain")
+        self.assertEqual({"db": {"HOST": "localhost"}}, self.create_loader(format="toml").load())
+        self.server.set_document(b"[1, 2]", '"v1"')
+        with self.assertRaises(ConfigLoaderException):
+            self.create_loader().load()
+
+    def test_ttl_cache(self):
+        loader = self.create_loader(ttl=60.0)
+        config = loader.load()
+        self.assertIs(config, loader.load())
+        self.assertEqual(1, len(self.server.requests))
+
+    def test_revalidation(self):
+        loader = self.create_loader(ttl=0.0)
+        config = loader.load()
+
+        self.assertIs(config, loader.load())
+        self.assertEqual(2, len(self.server.requests))
+        self.assertEqual('"v1"', self.server.requests[1][1]["If-None-Match"])
+        # Keep-alive: both requests were sent on the same connection
+        self.assertEqual(self.server.requests[0][2], self.server.requests[1][2])
+
+        self.server.set_document(b'{"db": {"HOST": "remote"}}', '"v2"')
+        self.assertEqual({"db": {"HOST": "remote"}}, loader.load())
+
+    def test_stale_while_revalidate(self):
+        loader = self.create_loader(ttl=0.0, stale_while_revalidate=60.0)
+        config = loader.load()
+        self.server.set_document(b'{"db": {"HOST": "remote"}}', '"v2"')
+
+        self.assertIs(config, loader.load())
+        loader._revalidation.join(5)
+        self.assertEqual({"db": {"HOST": "remote"}}, loader.load())
+
+    def test_retries(self):
+        self.server.failures = 2
+        self.assertEqual("localhost", self.create_loader(max_retries=2).load().db.HOST)
+        self.assertEqual(3, len(self.server.requests))
+
+        self.server.failures = 2
+        with self.assertRaises(ConfigLoaderException):
+            self.create_loader(max_retries=1).load()
+
+    def test_fallback(self):
+        config = self.create_loader(fallback_path=self.fallback_path).load()
+
+        # The validators of the fallback file are sent after a restart
+        loader = self.create_loader(fallback_path=self.fallback_path)
+        self.assertEqual(config, loader.load())
+        self.assertEqual('"v1"', self.server.requests[-1][1]["If-None-Match"])
+
+        # The fallback file is used if the server is down
+        self.server.failures = 10
+        with self.assertLogs("conflex.backends.http", level="WARNING"):
+            self.assertEqual(config, self.create_loader(fallback_path=self.fallback_path, max_retries=0).load())
+
+        with self.assertRaises(ConfigLoaderException):
+            self.create_loader(max_retries=0).load()
+
+        # The configuration of the fallback file is used until it expires
+        loader = self.create_loader(fallback_path=self.fallback_path, max_retries=0)
+        with self.assertLogs("conflex.backends.http", level="WARNING"):
+            loader.load()
+        requests = len(self.server.requests)
+        self.assertEqual(config, loader.load())
+        self.assertEqual(requests, len(self.server.requests))
+
+    def test_server_down(self):
+        loader = self.create_loader(ttl=0.0, max_retries=0)
+        config = loader.load()
+        self.server.shutdown()
+        self.server.server_close()
+        self.pool.close()
+
+        with self.assertLogs("conflex.backends.http", level="WARNING"):
+            self.assertIs(config, loader.load())
+
+    def test_server_down_expiration(self):
+        loader = self.create_loader(ttl=60.0, max_retries=1)
+        config = loader.load()
+        loader._entry.fetched_at -= 60.0
+        self.server.failures = 10
+
+        with self.assertLogs("conflex.backends.http", level="WARNING"):
+            self.assertIs(config, loader.load())
+        self.assertEqual(3, len(self.server.requests))
+        # The server is not contacted again until the last configuration expires
+        self.assertIs(config, loader.load())
+        self.assertEqual(3, len(self.server.requests))
+
+    def test_error_status(self):
+        loader = self.create_loader(ttl=0.0, fallback_path=self.fallback_path)
+        loader.load()
+        self.server.failures, self.server.failure_status = 1, 404
+
+        with self.assertRaises(ConfigLoaderException):
+            loader.load()
+        # The request is not retried and the last configuration is not used
+        self.assertEqual(2, len(self.server.requests))
+
+    def test_config_store(self):
+        config_store = ConfigStore()
+        config_store.add("remote", self.create_loader(ttl=0.0))
+        self.assertEqual("localhost", config_store.db.HOST)
+
+        merged_config = config_store.merged_config
+        config_store.reload()
+        self.assertIs(merged_config, config_store.merged_config)
+
+        self.server.set_document(b'{"db": {"HOST": "remote"}}', '"v2"')
+        config_store.reload()
+        self.assertEqual("remote", config_store.db.HOST)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            HttpConfigLoader(self.server.url, format="ini")
+        with self.assertRaises(ValueError):
+            self.pool.request("ftp://localhost/config", {})
@@ -0,0 +1,94 @@
+import unittest
+
+from conflex.config_store import ConfigStore
+from conflex.instrumentation import Instrumentation, StatsInstrumentation, count_values
+
+from utils import DictConfigLoader
+
+
+class StatsInstrumentationTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = []
+        self.instrumentation = StatsInstrumentation(
+            track_access=True,
+            access_sample_interval=1,
+            callbacks=[lambda metric, value, tags: self.metrics.append((metric, value, tags))],
+        )
+        self.base_loader = DictConfigLoader({"db": {"HOST": "localhost", "PORT": 5432}, "DEBUG": False})
+        self.config_store = ConfigStore(instrumentation=self.instrumentation)
+        self.config_store.add("base", self.base_loader)
+        self.config_store.add("env", DictConfigLoader({"db": {"HOST": "remote"}}))
+
+    def test_loads_and_merges(self):
+        self.config_store.get("db.HOST")
+
+        stats = self.config_store.stats()
+        self.assertEqual({"base", "env"}, set(stats["loads"]))
+        self.assertEqual(1, stats["loads"]["base"]["count"])
+        self.assertEqual(3, stats["loads"]["base"]["size"])
+        self.assertEqual(1, stats["loads"]["env"]["size"])
+        self.assertGreaterEqual(stats["loads"]["base"]["last_time"], 0)
+        self.assertEqual(1, stats["merges"]["count"])
+        self.assertEqual(0, stats["merges"]["incremental_count"])
+
+        self.base_loader.config = {"db": {"HOST": "localhost", "PORT": 5433}}
+        self.config_store.reload(["base"])
+        stats = self.config_store.stats()
+        self.assertEqual(2, stats["loads"]["base"]["count"])
+        self.assertEqual(2, stats["loads"]["base"]["size"])
+        self.assertEqual(2, stats["merges"]["count"])
+        self.assertEqual(1, stats["merges"]["incremental_count"])
+
+    def test_accesses(self):
+        self.config_store.get("db.HOST")
+        self.config_store.get_many(["db.HOST", "db.PORT"])
+        self.config_store.DEBUG
+
+        self.assertEqual({"db.HOST": 2, "db.PORT": 1, "DEBUG": 1}, self.config_store.stats()["accesses"])
+        self.assertEqual("db.HOST", next(iter(self.config_store.stats()["accesses"])))
+
+    def test_sampled_accesses(self):
+        instrumentation = StatsInstrumentation(track_access=True, access_sample_interval=10)
+        for _ in range(100):
+            instrumentation.on_access("db.HOST")
+        self.assertEqual({"db.HOST": 100}, instrumentation.stats()["accesses"])
+
+    def test_callbacks(self):
+        self.config_store.get("db.HOST")
+
+        metrics = {(metric, tuple(tags.items())) for metric, _, tags in self.metrics}
+        self.assertIn(("conflex.load.duration", (("namespace", "base"),)), metrics)
+        self.assertIn(("conflex.load.size", (("namespace", "env"),)), metrics)
+        self.assertIn(("conflex.merge.duration", (("incremental", "false"),)), metrics)
+        self.assertIn(("conflex.access.count", (("path", "db.HOST"),)), metrics)
+
+    def test_reset(self):
+        self.config_store.get("db.HOST")
+        self.instrumentation.reset()
+        self.assertEqual({}, self.config_store.stats()["loads"])
+        self.assertEqual({}, self.config_store.stats()["accesses"])
+
+    def test_no_access_tracking(self):
+        config_store = ConfigStore(instrumentation=StatsInstrumentation())
+        config_store.add("base", DictConfigLoader({"DEBUG": False}))
+        config_store.DEBUG
+        self.assertEqual({}, config_store.stats()["accesses"])
+        self.assertIsNone(config_store._on_access)
+
+
+class InstrumentationTest(unittest.TestCase):
+    def test_not_instrumented(self):
+        config_store = ConfigStore()
+        config_store.add("base", DictConfigLoader({"DEBUG": False}))
+        self.assertIs(False, config_store.DEBUG)
+        self.assertEqual({}, config_store.stats())
+
+    def test_base_instrumentation(self):
+        config_store = ConfigStore(instrumentation=Instrumentation())
+        config_store.add("base", DictConfigLoader({"DEBUG": False}))
+        self.assertIs(False, config_store.DEBUG)
+        self.assertEqual({}, config_store.stats())
+
+    def test_count_values(self):
+        self.assertEqual(0, count_values({}))
+        self.assertEqual(3, count_values({"a": 1, "b": {"c": [1, 2], "d": {"e": None}}}))
@@ -0,0 +1,141 @@
+import unittest
+from dataclasses import dataclass
+from unittest import mock
+
+from conflex.config_dict import FrozenConfigDict
+from conflex.config_store import ConfigStore
+from conflex.exc import ConfigInterpolationException, ConfigSchemaException, ConfigStoreException
+from conflex.interpolation import Interpolator
+
+from utils import DictConfigLoader
+
+
+class InterpolatorTest(unittest.TestCase):
+    def test_interpolate(self):
+        config = {
+            "db": {"HOST": "localhost", "PORT": 5432, "URL": "postgres://${db.HOST}:${db.PORT}/app"},
+            "api": {"PORT": "${db.PORT}", "URLS": ["http://${db.HOST}", 1], "PRICE": "$$5 for ${db.HOST}"},
+            "other": {"KEY": "value"},
+        }
+        interpolated, changed_paths = Interpolator().interpolate(config)
+
+        self.assertIsNone(changed_paths)
+        self.assertEqual("postgres://localhost:5432/app", interpolated["db"]["URL"])
+        self.assertEqual(5432, interpolated["api"]["PORT"])
+        self.assertEqual(["http://localhost", 1], interpolated["api"]["URLS"])
+        self.assertEqual("$5 for localhost", interpolated["api"]["PRICE"])
+        # Subtrees without references are shared, the configuration is not modified
+        self.assertIs(config["other"], interpolated["other"])
+        self.assertEqual("${db.PORT}", config["api"]["PORT"])
+
+    def test_chained_references(self):
+        interpolated, _ = Interpolator().interpolate({"a": "${b}/a", "b": "${c}/b", "c": "c", "escaped": "$${a}"})
+        self.assertEqual("c/b/a", interpolated["a"])
+        self.assertEqual("${a}", interpolated["escaped"])
+
+    def test_circular_reference(self):
+        with self.assertRaisesRegex(ConfigInterpolationException, "api.URL -> db.URL"):
+            Interpolator().interpolate({"db": {"URL": "${api.URL}"}, "api": {"URL": "${db.URL}/api"}})
+        with self.assertRaisesRegex(ConfigInterpolationException, "a -> a"):
+            Interpolator().interpolate({"a": "${a}"})
+
+    def test_invalid_reference(self):
+        with self.assertRaisesRegex(ConfigInterpolationException, r"'\$\{db.USER\}' at 'api.USER': no such value"):
+            Interpolator().interpolate({"db": {"HOST": "localhost"}, "api": {"USER": "${db.USER}"}})
+        with self.assertRaisesRegex(ConfigInterpolationException, "cannot reference a namespace"):
+            Interpolator().interpolate({"db": {"HOST": "localhost"}, "api": {"DB": "${db}"}})
+
+    def test_incremental(self):
+        interpolator = Interpolator()
+        config = {
+            "db": {"HOST": "localhost", "URL": "postgres://${db.HOST}"},
+            "api": {"HOST": "api", "URL": "http://${api.HOST}", "DB_URL": "${db.URL}"},
+        }
+        previous, _ = interpolator.interpolate(config)
+
+        new_config = {"db": {"HOST": "remote", "URL": config["db"]["URL"]}, "api": config["api"]}
+        with mock.patch.object(interpolator, "_render", wraps=interpolator._render) as render:
+            interpolated, changed_paths = interpolator.interpolate(new_config, [("db", "HOST")])
+
+        self.assertEqual({("db", "HOST"), ("db", "URL"), ("api", "DB_URL")}, set(changed_paths))
+        self.assertEqual(2, render.call_count)
+        self.assertEqual("postgres://remote", interpolated["db"]["URL"])
+        self.assertEqual("postgres://remote", interpolated["api"]["DB_URL"])
+        self.assertIs(previous["api"]["URL"], interpolated["api"]["URL"])
+
+    def test_incremental_new_templates(self):
+        interpolator = Interpolator()
+        interpolator.interpolate({"db": {"HOST": "localhost"}, "api": {"URL": "http://api"}})
+
+        interpolated, changed_paths = interpolator.interpolate(
+            {"db": {"HOST": "localhost"}, "api": {"URL": "http://${db.HOST}"}}, [("api", "URL")]
+        )
+        self.assertEqual("http://localhost", interpolated["api"]["URL"])
+        self.assertEqual([("api", "URL")], changed_paths)
+
+        interpolated, _ = interpolator.interpolate(
+            {"db": {"HOST": "remote"}, "api": {}}, [("db", "HOST"), ("api", "URL")]
+        )
+        self.assertEqual({"db": {"HOST": "remote"}, "api": {}}, interpolated)
+
+
+class InterpolatedConfigStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.env_loader = DictConfigLoader({"db": {"HOST": "remote"}})
+        self.config_store = ConfigStore(interpolate=True)
+        self.config_store.add(
+            "base", DictConfigLoader({"db": {"HOST": "localhost", "PORT": 5432, "URL": "pg://${db.HOST}:${db.PORT}"}})
+        )
+        self.config_store.add("env", self.env_loader)
+
+    def test_references_across_layers(self):
+        self.assertEqual("pg://remote:5432", self.config_store.db.URL)
+        self.assertEqual("pg://remote:5432", self.config_store.get("db.URL"))
+
+    def test_reload(self):
+        self.config_store.get("db.URL")
+        self.env_loader.config = {"db": {"HOST": "other-remote"}}
+        self.config_store.reload(["env"])
+        self.assertEqual("pg://other-remote:5432", self.config_store.get("db.URL"))
+        self.assertEqual("pg://other-remote:5432", self.config_store.db.URL)
+
+    def test_failed_reload(self):
+        self.config_store.get("db.URL")
+        self.env_loader.config = {"db": {"HOST": "${db.URL}"}}
+        with self.assertRaises(ConfigInterpolationException):
+            self.config_store.reload(["env"])
+        self.assertEqual("pg://remote:5432", self.config_store.get("db.URL"))
+
+        self.env_loader.config = {"db": {"HOST": "fixed"}}
+        self.config_store.reload(["env"])
+        self.assertEqual("pg://fixed:5432", self.config_store.get("db.URL"))
+
+    def test_overlay(self):
+        # The lazy view would return the templates instead of the resolved values
+        with self.assertRaises(ConfigStoreException):
+            self.config_store.overlay()
+        self.assertEqual("pg://remote:5432", self.config_store.get("db.URL"))
+
+    def test_frozen_store(self):
+        config_store = ConfigStore(freeze=True, interpolate=True)
+        config_store.add("base", DictConfigLoader({"db": {"HOST": "localhost", "URLS": ["pg://${db.HOST}"]}}))
+        self.assertIsInstance(config_store.db, FrozenConfigDict)
+        self.assertEqual(("pg://localhost",), config_store.db.URLS)
+
+    def test_schema(self):
+        @dataclass
+        class DbConfig:
+            PORT: int
+
+        @dataclass
+        class AppConfig:
+            db: DbConfig
+
+        config_store = ConfigStore(schema=AppConfig, interpolate=True)
+        config_store.add("base", DictConfigLoader({"db": {"PORT": "${api.PORT}"}, "api": {"PORT": "8080"}}))
+        self.assertEqual(8080, config_store.typed().db.PORT)
+
+        config_store = ConfigStore(schema=AppConfig, interpolate=True)
+        config_store.add("base", DictConfigLoader({"db": {"PORT": "${api.PORT}"}, "api": {"PORT": "port"}}))
+        with self.assertRaises(ConfigSchemaException):
+            config_store.typed()
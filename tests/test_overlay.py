@@ -0,0 +1,89 @@
+import unittest
+
+from conflex.config_dict import ConfigDict, FrozenConfigDict
+from conflex.config_store import ConfigStore
+from conflex.exc import ConfigStoreException
+
+from utils import DictConfigLoader
+
+
+class OverlayConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.base_loader = DictConfigLoader(
+            {"db": {"HOST": "localhost", "PORT": 5432, "options": {"SSL": False}}, "LOG_LEVEL": "INFO"}
+        )
+        self.env_loader = DictConfigLoader({"db": {"HOST": "remote", "options": {"TIMEOUT": 10}}, "DEBUG": True})
+        self.config_store = ConfigStore()
+        self.config_store.add("base", self.base_loader)
+        self.config_store.add("env", self.env_loader)
+
+    def test_only_loads_needed_layers(self):
+        overlay = self.config_store.overlay()
+        self.assertEqual("remote", overlay.get("db.HOST"))
+        self.assertIs(True, overlay.DEBUG)
+        self.assertEqual(1, self.env_loader.load_count)
+        self.assertEqual(0, self.base_loader.load_count)
+
+        self.assertEqual("INFO", overlay["LOG_LEVEL"])
+        self.assertEqual(1, self.base_loader.load_count)
+        self.assertIsNone(self.config_store.merged_config)
+
+    def test_missing_values(self):
+        overlay = self.config_store.overlay()
+        self.assertIsNone(overlay.get("db.USER"))
+        self.assertEqual("postgres", overlay.get("db.USER", "postgres"))
+        self.assertIsNone(overlay.get("db.HOST.NAME"))
+        with self.assertRaises(KeyError):
+            overlay["USER"]
+        with self.assertRaises(AttributeError):
+            overlay.USER
+        self.assertNotIn("USER", overlay)
+        self.assertIn("LOG_LEVEL", overlay)
+
+    def test_merged_subtrees(self):
+        overlay = self.config_store.overlay()
+        db_config = overlay.db
+        self.assertIsInstance(db_config, ConfigDict)
+        self.assertEqual(self.config_store.db, db_config)
+        self.assertEqual({"SSL": False, "TIMEOUT": 10}, overlay.get("db.options"))
+        self.assertIs(db_config, overlay.db)
+
+    def test_same_as_merged_config(self):
+        overlay = self.config_store.overlay()
+        merged_config = self.config_store._get_merged_config()
+        self.assertEqual(merged_config, {key: overlay[key] for key in overlay})
+        self.assertEqual(len(merged_config), len(overlay))
+
+    def test_merge_conflict(self):
+        config_store = ConfigStore()
+        config_store.add("base", DictConfigLoader({"db": "localhost"}))
+        config_store.add("env", DictConfigLoader({"db": {"HOST": "remote"}}))
+
+        with self.assertRaises(Exception):
+            config_store.overlay().db
+
+    def test_reload(self):
+        overlay = self.config_store.overlay()
+        self.assertEqual("remote", overlay.db.HOST)
+
+        self.env_loader.config = {"db": {"HOST": "other-remote"}}
+        self.config_store.reload()
+        self.assertEqual("other-remote", overlay.db.HOST)
+        self.assertEqual("other-remote", overlay.get("db.HOST"))
+
+    def test_frozen(self):
+        config_store = ConfigStore(freeze=True)
+        config_store.add("base", DictConfigLoader({"db": {"HOST": "localhost", "REPLICAS": ["a", "b"]}}))
+        overlay = config_store.overlay()
+        replicas = overlay.get("db.REPLICAS")
+        self.assertEqual(("a", "b"), replicas)
+        with self.assertRaises(AttributeError):
+            replicas.append("c")
+        self.assertIs(replicas, overlay.get("db.REPLICAS"))
+        self.assertEqual(["a", "b"], config_store["base"].db.REPLICAS)
+        self.assertIsInstance(overlay.db, FrozenConfigDict)
+
+    def test_cannot_add_after_use(self):
+        self.config_store.overlay()
+        with self.assertRaises(ConfigStoreException):
+            self.config_store.add("other", DictConfigLoader({}))
@@ -0,0 +1,90 @@
+import unittest
+
+from conflex.config_store import ConfigStore
+from conflex.path_trie import PathTrie
+
+from utils import DictConfigLoader
+
+CONFIG = {
+    "services": {
+        "api": {"TIMEOUT": 10, "db": {"HOST": "api-db"}},
+        "worker": {"TIMEOUT": 60, "queue": {"db": {"HOST": "queue-db"}}},
+    },
+    "db": {"HOST": "localhost"},
+    "TIMEOUT": 5,
+}
+
+
+class PathTrieTest(unittest.TestCase):
+    def setUp(self):
+        self.path_trie = PathTrie(CONFIG)
+
+    def test_keys(self):
+        self.assertEqual({"db.HOST": "localhost"}, self.path_trie.select("db.HOST"))
+        self.assertEqual({"db": {"HOST": "localhost"}}, self.path_trie.select("db"))
+        self.assertEqual({}, self.path_trie.select("db.PORT"))
+        self.assertEqual({}, self.path_trie.select("TIMEOUT.VALUE"))
+
+    def test_wildcard(self):
+        self.assertEqual(
+            {"services.api.TIMEOUT": 10, "services.worker.TIMEOUT": 60}, self.path_trie.select("services.*.TIMEOUT")
+        )
+        self.assertEqual(["db.HOST"], list(self.path_trie.select("*.HOST")))
+
+    def test_recursive_wildcard(self):
+        self.assertEqual(
+            ["services.api.db.HOST", "services.worker.queue.db.HOST", "db.HOST"],
+            list(self.path_trie.select("**.db.HOST")),
+        )
+        self.assertEqual(
+            ["services.api.TIMEOUT", "services.worker.TIMEOUT"], list(self.path_trie.select("services.**.TIMEOUT"))
+        )
+        self.assertEqual(
+            ["services.worker", "services.worker.TIMEOUT"], list(self.path_trie.select("**.worker.**"))[:2]
+        )
+        self.assertEqual(
+            ["services.api.db.HOST", "services.worker.queue.db.HOST"], list(self.path_trie.select("services.**.*.HOST"))
+        )
+        self.assertEqual(13, len(self.path_trie.select("**")))
+        self.assertEqual(13, len(self.path_trie))
+
+    def test_cache(self):
+        path_trie = PathTrie(CONFIG, cache_size=2)
+        self.assertEqual(path_trie.select("**.HOST"), path_trie.select("**.HOST"))
+        path_trie.select("db")
+        path_trie.select("services")
+        self.assertEqual(["db", "services"], list(path_trie._cache))
+
+    def test_empty_pattern(self):
+        with self.assertRaises(ValueError):
+            self.path_trie.select("")
+
+
+class ConfigStoreSelectTest(unittest.TestCase):
+    def setUp(self):
+        self.env_loader = DictConfigLoader({"services": {"api": {"TIMEOUT": 20}}})
+        self.config_store = ConfigStore()
+        self.config_store.add("base", DictConfigLoader(CONFIG))
+        self.config_store.add("env", self.env_loader)
+
+    def test_select(self):
+        self.assertEqual(
+            {"services.api.TIMEOUT": 20, "services.worker.TIMEOUT": 60}, self.config_store.select("services.*.TIMEOUT")
+        )
+
+    def test_reload(self):
+        self.config_store.select("services.*.TIMEOUT")
+        self.env_loader.config = {"services": {"api": {"TIMEOUT": 30}}}
+        self.config_store.reload(["env"])
+        self.assertEqual(
+            {"services.api.TIMEOUT": 30, "services.worker.TIMEOUT": 60}, self.config_store.select("services.*.TIMEOUT")
+        )
+
+    def test_frozen_and_compact_stores(self):
+        for options in ({"freeze": True}, {"compact": True}):
+            config_store = ConfigStore(**options)
+            config_store.add("base", DictConfigLoader(CONFIG))
+            self.assertEqual(
+                {"services.api.db.HOST": "api-db", "services.worker.queue.db.HOST": "queue-db", "db.HOST": "localhost"},
+                config_store.select("**.HOST"),
+            )
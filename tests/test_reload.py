@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from conflex.backends.yaml import YamlConfigLoader
+from conflex.config_store import ConfigStore
+from conflex.reload import ConfigReloader, InotifyFileWatcher
+
+from utils import write_file
+
+
+class ConfigReloaderTest(unittest.TestCase):
+    backend = "poll"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_path = os.path.join(self.tmp_dir.name, "base.yaml")
+        self.override_path = os.path.join(self.tmp_dir.name, "override.yaml")
+        write_file(self.base_path, "db:\n  HOST: localhost\n  PORT: 5432\n")
+        write_file(self.override_path, "db:\n  HOST: remote\n")
+
+        self.config_store = ConfigStore()
+        self.config_store.add("base", YamlConfigLoader(self.base_path))
+        self.config_store.add("override", YamlConfigLoader(self.override_path))
+        self.reloader = ConfigReloader(self.config_store, backend=self.backend)
+
+    def tearDown(self):
+        self.reloader.close()
+        self.tmp_dir.cleanup()
+
+    def test_no_change(self):
+        self.assertEqual("remote", self.config_store.db.HOST)
+        self.assertEqual([], self.reloader.check())
+
+    def test_reload_changed_file(self):
+        self.assertEqual("remote", self.config_store.db.HOST)
+        old_config = self.config_store.merged_config
+        base_config = self.config_store["base"]
+
+        write_file(self.override_path, "db:\n  HOST: other-remote\n")
+
+        self.assertEqual(["override"], self.reloader.check())
+        self.assertEqual("other-remote", self.config_store.db.HOST)
+        self.assertEqual(5432, self.config_store.get("db.PORT"))
+        self.assertIs(base_config, self.config_store["base"])
+        # The previous merged configuration is left untouched
+        self.assertEqual("remote", old_config.db.HOST)
+
+        self.assertEqual([], self.reloader.check())
+
+    def test_reload_invalid_file(self):
+        self.assertEqual("remote", self.config_store.db.HOST)
+        write_file(self.override_path, "db: [")
+
+        with self.assertRaises(Exception):
+            self.reloader.check()
+        self.assertEqual("remote", self.config_store.db.HOST)
+        # The reload is retried until it succeeds
+        with self.assertRaises(Exception):
+            self.reloader.check()
+
+        write_file(self.override_path, "db:\n  HOST: other-remote\n")
+        self.assertEqual(["override"], self.reloader.check())
+        self.assertEqual("other-remote", self.config_store.db.HOST)
+
+    def test_retry_failed_reload(self):
+        self.assertEqual("remote", self.config_store.db.HOST)
+        write_file(self.override_path, "db:\n  HOST: other-remote\n")
+
+        with mock.patch.object(self.config_store, "reload", side_effect=OSError("Temporary failure")):
+            with self.assertRaises(OSError):
+                self.reloader.check()
+        self.assertEqual("remote", self.config_store.db.HOST)
+
+        self.assertEqual(["override"], self.reloader.check())
+        self.assertEqual("other-remote", self.config_store.db.HOST)
+        self.assertEqual([], self.reloader.check())
+
+
+@unittest.skipUnless(os.path.exists("/proc/self"), "inotify is only available on Linux")
+class InotifyConfigReloaderTest(ConfigReloaderTest):
+    backend = "inotify"
+
+    def test_backend(self):
+        self.assertIsInstance(self.reloader._watcher, InotifyFileWatcher)
@@ -0,0 +1,192 @@
+import datetime
+import enum
+import sys
+import unittest
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from conflex.config_dict import ConfigDict
+from conflex.config_store import ConfigStore
+from conflex.exc import ConfigSchemaException, ConfigStoreException
+from conflex.schema import TypedConfig, compile_config
+
+from utils import DictConfigLoader
+
+if sys.version_info >= (3, 8):
+    from typing import TypedDict
+else:  # pragma: no cover
+    from typing_extensions import TypedDict
+
+
+class LogLevel(enum.Enum):
+    DEBUG = "debug"
+    INFO = "info"
+
+
+@dataclass
+class DbConfig:
+    HOST: str
+    PORT: int = 5432
+    TIMEOUT: datetime.timedelta = datetime.timedelta(seconds=10)
+
+
+@dataclass
+class AppConfig:
+    db: DbConfig
+    DEBUG: bool = False
+    LOG_LEVEL: LogLevel = LogLevel.INFO
+    WORKERS: List[int] = field(default_factory=list)
+    TAGS: Optional[Dict[str, str]] = None
+
+
+class CacheConfig(TypedDict):
+    HOST: str
+    SIZE: float
+
+
+class CompileConfigTest(unittest.TestCase):
+    def test_compile_dataclass(self):
+        config = compile_config(AppConfig, {"db": {"HOST": "localhost", "PORT": "5433"}, "DEBUG": "true"})
+
+        self.assertIsInstance(config, TypedConfig)
+        self.assertEqual("localhost", config.db.HOST)
+        self.assertEqual(5433, config.db.PORT)
+        self.assertEqual(datetime.timedelta(seconds=10), config.db.TIMEOUT)
+        self.assertIs(True, config.DEBUG)
+        self.assertIs(LogLevel.INFO, config.LOG_LEVEL)
+        self.assertEqual([], config.WORKERS)
+        self.assertIsNone(config.TAGS)
+
+    def test_compile_typed_dict(self):
+        config = compile_config(CacheConfig, ConfigDict(HOST="cache", SIZE=1))
+        self.assertEqual("cache", config.HOST)
+        self.assertEqual(1.0, config.SIZE)
+        self.assertIsInstance(config.SIZE, float)
+
+    def test_cast_values(self):
+        config = compile_config(
+            AppConfig,
+            {
+                "db": {"HOST": "localhost", "TIMEOUT": "1m30s"},
+                "LOG_LEVEL": "debug",
+                "WORKERS": ["1", 2],
+                "TAGS": {"env": "prod"},
+            },
+        )
+        self.assertEqual(datetime.timedelta(minutes=1, seconds=30), config.db.TIMEOUT)
+        self.assertIs(LogLevel.DEBUG, config.LOG_LEVEL)
+        self.assertEqual([1, 2], config.WORKERS)
+        self.assertEqual({"env": "prod"}, config.TAGS)
+
+    def test_extra_values_are_ignored(self):
+        config = compile_config(DbConfig, {"HOST": "localhost", "USER": "admin"})
+        self.assertFalse(hasattr(config, "USER"))
+
+    def test_invalid_value(self):
+        with self.assertRaises(ConfigSchemaException) as cm:
+            compile_config(AppConfig, {"db": {"HOST": "localhost", "PORT": "not-a-port"}})
+        self.assertIn("$.db.PORT", str(cm.exception))
+
+        with self.assertRaises(ConfigSchemaException) as cm:
+            compile_config(AppConfig, {"db": {"HOST": "localhost"}, "WORKERS": [1, "two"]})
+        self.assertIn("$.WORKERS.1", str(cm.exception))
+
+        with self.assertRaises(ConfigSchemaException) as cm:
+            compile_config(AppConfig, {"db": "localhost"})
+        self.assertIn("$.db", str(cm.exception))
+
+    def test_bool_is_not_an_int(self):
+        with self.assertRaises(ConfigSchemaException):
+            compile_config(DbConfig, {"HOST": "localhost", "PORT": True})
+
+    def test_missing_value(self):
+        with self.assertRaises(ConfigSchemaException) as cm:
+            compile_config(AppConfig, {"db": {"PORT": 5432}})
+        self.assertIn("$.db.HOST", str(cm.exception))
+
+    def test_read_only(self):
+        config = compile_config(DbConfig, {"HOST": "localhost"})
+        with self.assertRaises(TypeError):
+            config.HOST = "remote"
+        with self.assertRaises(AttributeError):
+            config.__dict__
+
+    def test_equality(self):
+        config = compile_config(DbConfig, {"HOST": "localhost"})
+        self.assertEqual(config, compile_config(DbConfig, {"HOST": "localhost", "PORT": 5432}))
+        self.assertNotEqual(config, compile_config(DbConfig, {"HOST": "remote"}))
+        self.assertEqual(hash(config), hash(compile_config(DbConfig, {"HOST": "localhost"})))
+
+    def test_hash_with_collections(self):
+        config = compile_config(AppConfig, {"db": {"HOST": "localhost"}, "WORKERS": [1, 2], "TAGS": {"env": "prod"}})
+        other_config = compile_config(
+            AppConfig, {"db": {"HOST": "localhost"}, "WORKERS": [1, 2], "TAGS": {"env": "prod"}}
+        )
+        self.assertEqual(hash(config), hash(other_config))
+
+    @unittest.skipIf(sys.version_info < (3, 8), "Literal types require Python 3.8+")
+    def test_literal(self):
+        from typing import Literal
+
+        @dataclass
+        class ServerConfig:
+            MODE: Literal["fast", "safe"]
+            PORT: Literal[80, 443] = 80
+
+        config = compile_config(ServerConfig, {"MODE": "safe", "PORT": "443"})
+        self.assertEqual("safe", config.MODE)
+        self.assertEqual(443, config.PORT)
+        with self.assertRaises(ConfigSchemaException) as cm:
+            compile_config(ServerConfig, {"MODE": "slow"})
+        self.assertIn("$.MODE", str(cm.exception))
+
+    def test_not_a_schema(self):
+        with self.assertRaises(TypeError):
+            compile_config(dict, {})
+
+
+class ConfigStoreSchemaTest(unittest.TestCase):
+    def test_typed_merged_config(self):
+        config_store = ConfigStore(schema=AppConfig)
+        config_store.add("base", DictConfigLoader({"db": {"HOST": "localhost", "PORT": 5432}}))
+        config_store.add("override", DictConfigLoader({"db": {"PORT": "5433"}}))
+
+        config = config_store.typed()
+        self.assertEqual("localhost", config.db.HOST)
+        self.assertEqual(5433, config.db.PORT)
+        self.assertIs(config, config_store.typed())
+
+    def test_typed_namespace(self):
+        config_store = ConfigStore()
+        config_store.add("db", DictConfigLoader({"HOST": "localhost"}), schema=DbConfig)
+        config_store.add("other", DictConfigLoader({}))
+
+        config = config_store.typed("db")
+        self.assertEqual("localhost", config.HOST)
+        self.assertIs(config, config_store.typed("db"))
+
+        with self.assertRaises(ConfigStoreException):
+            config_store.typed("other")
+        with self.assertRaises(ConfigStoreException):
+            config_store.typed()
+
+    def test_namespace_error_path(self):
+        config_store = ConfigStore()
+        config_store.add("db", DictConfigLoader({"HOST": "localhost", "PORT": "x"}), schema=DbConfig)
+
+        with self.assertRaises(ConfigSchemaException) as cm:
+            config_store.typed("db")
+        self.assertIn("$.db.PORT", str(cm.exception))
+
+    def test_invalid_reload_keeps_config(self):
+        loader = DictConfigLoader({"db": {"HOST": "localhost"}})
+        config_store = ConfigStore(schema=AppConfig)
+        config_store.add("base", loader)
+        self.assertEqual(5432, config_store.typed().db.PORT)
+
+        loader.config = {"db": {"HOST": "localhost", "PORT": "x"}}
+        with self.assertRaises(ConfigSchemaException):
+            config_store.reload()
+        self.assertEqual(5432, config_store.typed().db.PORT)
+        self.assertIsNone(config_store.get("db.PORT"))
+        self.assertNotIn("PORT", config_store["base"].db)
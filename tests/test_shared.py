@@ -0,0 +1,122 @@
+import datetime
+import os
+import pickle
+import tempfile
+import unittest
+
+from conflex.config_store import ConfigStore
+from conflex.shared import SharedConfigDict, SharedPathIndex, encode_config, open_shared_config, write_shared_config
+
+from utils import DictConfigLoader
+
+
+class SharedConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "config.shared")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def share(self, config: dict) -> SharedConfigDict:
+        write_shared_config(config, self.file_path)
+        return open_shared_config(self.file_path)
+
+    def test_round_trip(self):
+        config = {
+            "db": {"HOST": "localhost", "PORT": 5432, "TIMEOUT": 1.5, "SSL": True, "PASSWORD": None},
+            "api": {"VERSION": "1.0", "LIMIT": 2**70, "TTL": datetime.timedelta(seconds=30), "EMPTY": {}},
+            "unicode": {"clé": "valeur 🔑"},
+        }
+        shared_config = self.share(config)
+
+        self.assertEqual(config, shared_config)
+        self.assertEqual("localhost", shared_config.db.HOST)
+        self.assertEqual(5432, shared_config["db"]["PORT"])
+        self.assertEqual(2**70, shared_config.api.LIMIT)
+        self.assertEqual(datetime.timedelta(seconds=30), shared_config.api.TTL)
+        self.assertEqual("valeur 🔑", shared_config.unicode["clé"])
+        self.assertIsInstance(shared_config.db, SharedConfigDict)
+
+    def test_lists_are_tuples(self):
+        shared_config = self.share({"hosts": ["db1", {"HOST": "db2"}, [1, 2]]})
+        self.assertEqual(("db1", {"HOST": "db2"}, (1, 2)), shared_config.hosts)
+        self.assertEqual("db2", shared_config.hosts[1].HOST)
+
+    def test_keys(self):
+        keys = [f"KEY_{i}" for i in reversed(range(100))] + [1, 2.5, None]
+        shared_config = self.share({key: str(key) for key in keys})
+
+        self.assertEqual(keys, list(shared_config))
+        self.assertEqual(len(keys), len(shared_config))
+        for key in keys:
+            self.assertEqual(str(key), shared_config[key])
+        self.assertNotIn("KEY_100", shared_config)
+        self.assertNotIn(["unhashable"], shared_config)
+        self.assertIsNone(shared_config.get("missing"))
+        with self.assertRaises(AttributeError):
+            shared_config.missing
+
+    def test_deduplication(self):
+        subtree = {f"KEY_{i}": f"value-{i}" for i in range(100)}
+        shared_size = len(encode_config({"a": subtree, "b": subtree}))
+        copied_size = len(encode_config({"a": subtree, "b": dict(subtree)}))
+        self.assertLess(shared_size, len(encode_config({"a": subtree})) * 1.1)
+        self.assertLess(shared_size, copied_size)
+
+    def test_path_index(self):
+        path_index = SharedPathIndex(self.share({"db": {"HOST": "localhost"}}))
+        self.assertEqual("localhost", path_index.get("db.HOST"))
+        self.assertEqual({"HOST": "localhost"}, path_index.get("db"))
+        self.assertEqual("default", path_index.get("db.HOST.NAME", "default"))
+        self.assertIsNone(path_index.get("api.VERSION"))
+
+    def test_pickle(self):
+        shared_config = self.share({"db": {"HOST": "localhost"}})
+        self.assertEqual({"db": {"HOST": "localhost"}}, pickle.loads(pickle.dumps(shared_config)))
+
+    def test_invalid_file(self):
+        with open(self.file_path, "wb") as f:
+            f.write(b"not a shared configuration")
+        with self.assertRaises(ValueError):
+            open_shared_config(self.file_path)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "fork is not available")
+    def test_fork(self):
+        shared_config = self.share({"db": {"HOST": "localhost"}})
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            os._exit(0 if shared_config.db.HOST == "localhost" else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(0, status)
+
+
+class SharedConfigStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.shared_path = os.path.join(self.tmp_dir.name, "config.shared")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_shared_store(self):
+        env_loader = DictConfigLoader({"db": {"HOST": "remote"}})
+        config_store = ConfigStore(shared_path=self.shared_path)
+        config_store.add("base", DictConfigLoader({"db": {"HOST": "localhost", "PORT": 5432}}))
+        config_store.add("env", env_loader)
+
+        self.assertEqual("remote", config_store.db.HOST)
+        self.assertIsInstance(config_store.merged_config, SharedConfigDict)
+        self.assertEqual(5432, config_store.get("db.PORT"))
+        self.assertEqual(["remote", None], config_store.get_many(["db.HOST", "db.USER"]))
+        self.assertEqual({"db": {"HOST": "remote", "PORT": 5432}}, open_shared_config(self.shared_path))
+        # Only the shared file holds the merged configuration
+        self.assertEqual([], config_store._layer_merges)
+
+        old_config = config_store.merged_config
+        env_loader.config = {"db": {"HOST": "other-remote"}}
+        config_store.reload()
+        self.assertEqual("other-remote", config_store.get("db.HOST"))
+        self.assertEqual([], config_store._layer_merges)
+        # Processes that mapped the previous version of the file can still read it
+        self.assertEqual("remote", old_config.db.HOST)
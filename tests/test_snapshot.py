@@ -0,0 +1,145 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from conflex import cli
+from conflex.backends.env import EnvConfigLoader
+from conflex.backends.yaml import YamlConfigLoader
+from conflex.config_dict import FrozenConfigDict
+from conflex.config_store import ConfigStore
+from conflex.exc import ConfigStoreException
+from conflex.snapshot import write_snapshot
+
+from utils import write_file
+
+
+class CountingYamlConfigLoader(YamlConfigLoader):
+    def __init__(self, config_file_path: str):
+        super().__init__(config_file_path)
+        self.load_count = 0
+
+    def load(self):
+        self.load_count += 1
+        return super().load()
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_path = os.path.join(self.tmp_dir.name, "base.yaml")
+        self.override_path = os.path.join(self.tmp_dir.name, "override.yaml")
+        self.snapshot_path = os.path.join(self.tmp_dir.name, "config.snapshot")
+        write_file(self.base_path, "db:\n  HOST: localhost\n  PORT: 5432\n")
+        write_file(self.override_path, "db:\n  HOST: remote\n")
+
+        environ = mock.patch.dict(os.environ, {"SNAPSHOT_TEST__DB__USER": "admin"})
+        environ.start()
+        self.addCleanup(environ.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_config_store(self, **kwargs) -> ConfigStore:
+        config_store = ConfigStore(**kwargs)
+        config_store.add("base", CountingYamlConfigLoader(self.base_path))
+        config_store.add("override", CountingYamlConfigLoader(self.override_path))
+        config_store.add("env", EnvConfigLoader("SNAPSHOT_TEST__", separator="__"))
+        return config_store
+
+    def test_read_snapshot(self):
+        write_snapshot(self.create_config_store(), self.snapshot_path)
+
+        config_store = self.create_config_store().from_snapshot(self.snapshot_path)
+        self.assertIsNotNone(config_store.merged_config)
+        self.assertEqual("remote", config_store.db.HOST)
+        self.assertEqual(5432, config_store.get("db.PORT"))
+        self.assertEqual("admin", config_store.db.USER)
+        self.assertEqual(0, config_store.loaders["base"].load_count)
+        self.assertEqual(0, config_store.loaders["override"].load_count)
+
+    def test_outdated_file(self):
+        write_snapshot(self.create_config_store(), self.snapshot_path)
+        write_file(self.override_path, "db:\n  HOST: other-remote\n")
+
+        config_store = self.create_config_store().from_snapshot(self.snapshot_path)
+        self.assertIsNone(config_store.merged_config)
+        self.assertEqual("other-remote", config_store.db.HOST)
+        self.assertEqual(0, config_store.loaders["base"].load_count)
+        self.assertEqual(1, config_store.loaders["override"].load_count)
+
+    def test_outdated_environment(self):
+        write_snapshot(self.create_config_store(), self.snapshot_path)
+        os.environ["SNAPSHOT_TEST__DB__USER"] = "root"
+
+        config_store = self.create_config_store().from_snapshot(self.snapshot_path)
+        self.assertEqual("root", config_store.db.USER)
+        self.assertEqual(0, config_store.loaders["base"].load_count)
+
+    def test_different_loaders(self):
+        write_snapshot(self.create_config_store(), self.snapshot_path)
+
+        config_store = ConfigStore()
+        config_store.add("base", CountingYamlConfigLoader(self.override_path))
+        config_store.from_snapshot(self.snapshot_path)
+        self.assertEqual({"HOST": "remote"}, config_store.db)
+
+    def test_frozen_store(self):
+        write_snapshot(self.create_config_store(), self.snapshot_path)
+
+        config_store = self.create_config_store(freeze=True).from_snapshot(self.snapshot_path)
+        self.assertIsInstance(config_store.db, FrozenConfigDict)
+        self.assertEqual("remote", config_store.get("db.HOST"))
+
+    def test_missing_or_invalid_snapshot(self):
+        config_store = self.create_config_store().from_snapshot(self.snapshot_path)
+        self.assertEqual("remote", config_store.db.HOST)
+
+        write_file(self.snapshot_path, "not a snapshot")
+        with self.assertLogs("conflex.snapshot", level="WARNING"):
+            config_store = self.create_config_store().from_snapshot(self.snapshot_path)
+        self.assertEqual("remote", config_store.db.HOST)
+
+    def test_store_in_use(self):
+        write_snapshot(self.create_config_store(), self.snapshot_path)
+        config_store = self.create_config_store()
+        config_store.db
+        with self.assertRaises(ConfigStoreException):
+            config_store.from_snapshot(self.snapshot_path)
+
+
+class CompileCommandTest(unittest.TestCase):
+    def test_compile(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            write_file(os.path.join(tmp_dir, "base.yaml"), "db:\n  HOST: localhost\n")
+            write_file(
+                os.path.join(tmp_dir, "snapshot_test_config.py"),
+                "import os\n"
+                "from conflex.backends.yaml import YamlConfigLoader\n"
+                "from conflex.config_store import ConfigStore\n"
+                "config_store = ConfigStore()\n"
+                "config_store.add('base', YamlConfigLoader(os.path.join(os.path.dirname(__file__), 'base.yaml')))\n",
+            )
+            snapshot_path = os.path.join(tmp_dir, "config.snapshot")
+
+            sys.path.insert(0, tmp_dir)
+            try:
+                with redirect_stdout(io.StringIO()):
+                    self.assertEqual(0, cli.main(["compile", "snapshot_test_config:config_store", "-o", snapshot_path]))
+                config_module = sys.modules.pop("snapshot_test_config")
+            finally:
+                sys.path.remove(tmp_dir)
+
+            config_store = ConfigStore()
+            config_store.add("base", config_module.config_store.loaders["base"])
+            config_store.from_snapshot(snapshot_path)
+            self.assertEqual({"db": {"HOST": "localhost"}}, config_store.merged_config)
+
+    def test_invalid_reference(self):
+        with self.assertRaises(ValueError):
+            cli.import_config_store("conflex.config_store")
+        with self.assertRaises(ValueError):
+            cli.import_config_store("conflex:__version__")
@@ -0,0 +1,102 @@
+import unittest
+
+from conflex.config_dict import ConfigDiff
+from conflex.config_store import ConfigStore
+from conflex.subscriptions import Subscriptions
+
+from utils import DictConfigLoader
+
+
+class SubscriptionsTest(unittest.TestCase):
+    def setUp(self):
+        self.subscriptions = Subscriptions()
+        self.notifications = []
+
+    def subscribe(self, pattern: str):
+        return self.subscriptions.subscribe(pattern, lambda diff: self.notifications.append((pattern, diff)))
+
+    def notified_patterns(self, diff: ConfigDiff):
+        self.notifications.clear()
+        self.subscriptions.notify(diff)
+        return sorted(pattern for pattern, _ in self.notifications)
+
+    def test_matching(self):
+        for pattern in ["db", "db.*", "db.HOST", "db.*.HOST", "api.*", "*.PORT", ""]:
+            self.subscribe(pattern)
+
+        self.assertEqual(
+            ["", "db", "db.*", "db.*.HOST", "db.HOST"], self.notified_patterns(ConfigDiff([], [], [("db", "HOST")]))
+        )
+        self.assertEqual(
+            ["", "*.PORT", "db", "db.*", "db.*.HOST"], self.notified_patterns(ConfigDiff([("db", "PORT")], [], []))
+        )
+        self.assertEqual(
+            ["", "db", "db.*", "db.*.HOST"], self.notified_patterns(ConfigDiff([], [], [("db", "replica", "HOST")]))
+        )
+        # Replacing a whole subtree concerns the patterns of its descendants
+        self.assertEqual(
+            ["", "*.PORT", "db", "db.*", "db.*.HOST", "db.HOST"], self.notified_patterns(ConfigDiff([], [("db",)], []))
+        )
+        self.assertEqual(["", "*.PORT"], self.notified_patterns(ConfigDiff([], [], [("log", "PORT")])))
+
+    def test_subscriber_diff(self):
+        self.subscribe("db.*")
+        self.subscriptions.notify(ConfigDiff([("db", "USER")], [("api", "KEY")], [("db", "HOST"), ("db", "PORT")]))
+
+        self.assertEqual(
+            [("db.*", ConfigDiff([("db", "USER")], [], [("db", "HOST"), ("db", "PORT")]))], self.notifications
+        )
+
+    def test_unsubscribe(self):
+        subscription = self.subscribe("db.HOST")
+        self.subscribe("db")
+        self.assertEqual(2, len(self.subscriptions))
+
+        subscription.unsubscribe()
+        subscription.unsubscribe()
+        self.assertEqual(1, len(self.subscriptions))
+        self.assertEqual(["db"], self.notified_patterns(ConfigDiff([], [], [("db", "HOST")])))
+        self.assertEqual({}, self.subscriptions._root.children["db"].children)
+
+    def test_failing_subscriber(self):
+        self.subscriptions.subscribe("db", lambda diff: 1 / 0)
+        self.subscribe("db")
+        with self.assertLogs("conflex.subscriptions", level="ERROR"):
+            self.assertEqual(["db"], self.notified_patterns(ConfigDiff([], [], [("db", "HOST")])))
+
+
+class ConfigStoreSubscriptionTest(unittest.TestCase):
+    def setUp(self):
+        self.env_loader = DictConfigLoader({"db": {"HOST": "remote"}, "api": {"PORT": 8080}})
+        self.config_store = ConfigStore()
+        self.config_store.add("base", DictConfigLoader({"db": {"HOST": "localhost", "PORT": 5432}}))
+        self.config_store.add("env", self.env_loader)
+        self.diffs = []
+        self.config_store.subscribe("db.*", self.diffs.append)
+
+    def test_reload(self):
+        self.config_store.get("db.HOST")
+        self.env_loader.config = {"db": {"HOST": "other-remote", "USER": "admin"}, "api": {"PORT": 8081}}
+        self.config_store.reload(["env"])
+
+        self.assertEqual([ConfigDiff([("db", "USER")], [], [("db", "HOST")])], self.diffs)
+
+    def test_no_changes(self):
+        self.config_store.get("db.HOST")
+        self.env_loader.config = {"db": {"HOST": "remote"}, "api": {"PORT": 8081}}
+        self.config_store.reload(["env"])
+        # A higher priority layer masks the change
+        self.env_loader.config = {"db": {"HOST": "remote", "PORT": 5432}, "api": {"PORT": 8081}}
+        self.config_store.reload(["env"])
+
+        self.assertEqual([], self.diffs)
+
+    def test_frozen_store(self):
+        config_store = ConfigStore(freeze=True)
+        config_store.add("env", self.env_loader)
+        config_store.subscribe("api.PORT", self.diffs.append)
+        config_store.get("db.HOST")
+        self.env_loader.config = {"db": {"HOST": "remote"}, "api": {"PORT": 8081}}
+        config_store.reload()
+
+        self.assertEqual([ConfigDiff([], [], [("api", "PORT")])], self.diffs)
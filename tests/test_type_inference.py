@@ -0,0 +1,79 @@
+import datetime
+import unittest
+
+from conflex.config_dict import ConfigDict, convert_str_value, convert_to_bool
+from conflex.type_inference import (
+    DEFAULT_RULES,
+    TypeInferenceEngine,
+    duration_rule,
+    make_list_rule,
+    null_rule,
+    size_rule,
+)
+
+
+class TypeInferenceTest(unittest.TestCase):
+    def assertConverted(self, expected, value_str, engine=None):
+        value = (engine or TypeInferenceEngine()).convert(value_str)
+        self.assertEqual(expected, value)
+        self.assertIs(type(expected), type(value))
+
+    def test_default_rules(self):
+        self.assertConverted(True, "true")
+        self.assertConverted(False, "N")
+        self.assertConverted(8080, "8080")
+        self.assertConverted(-1, "-1")
+        self.assertConverted(1.4142, "1.4142")
+        self.assertConverted(1e-3, "1e-3")
+        self.assertConverted(float("inf"), "inf")
+        # Same syntax as int() and float()
+        self.assertConverted(42, " 42 ")
+        self.assertConverted(1000, "1_000")
+        self.assertConverted(1000.5, "1_000.5\n")
+        self.assertConverted("1__000", "1__000")
+        self.assertConverted("1.2.3", "1.2.3")
+        self.assertConverted("128M", "128M")
+        self.assertConverted("localhost", "localhost")
+
+    def test_convert_str_value(self):
+        self.assertConverted(8080, "8080", engine=None)
+        self.assertEqual(8080, convert_str_value("8080"))
+        self.assertIs(int, type(convert_str_value("8080")))
+        self.assertEqual(True, convert_to_bool("t"))
+        self.assertRaises(ValueError, convert_to_bool, "maybe")
+
+    def test_extra_rules(self):
+        engine = TypeInferenceEngine(rules=[null_rule, *DEFAULT_RULES, duration_rule, size_rule, make_list_rule(",")])
+
+        self.assertConverted(None, "null", engine)
+        self.assertConverted(datetime.timedelta(seconds=30), "30s", engine)
+        self.assertConverted(datetime.timedelta(hours=1, minutes=30), "1h30m", engine)
+        self.assertConverted(datetime.timedelta(milliseconds=500), "500ms", engine)
+        self.assertConverted(128 * 2**20, "128M", engine)
+        self.assertConverted(2 * 10**9, "2GB", engine)
+        self.assertConverted(2**10, "1KiB", engine)
+        self.assertConverted(10 * 2**10, "10Ki", engine)
+        self.assertConverted(512 * 2**20, "512Mi", engine)
+        self.assertConverted(2 * 2**30, "2gi", engine)
+        self.assertConverted(["a", 1, True], "a, 1, true", engine)
+        self.assertConverted("1h1h", "1h1h", engine)
+
+    def test_memoization(self):
+        engine = TypeInferenceEngine(rules=[*DEFAULT_RULES, make_list_rule(",")], cache_size=2)
+
+        self.assertIs(engine.convert("1234567"), engine.convert("1234567"))
+        # Mutable values are not shared
+        self.assertIsNot(engine.convert("a,b"), engine.convert("a,b"))
+
+        for i in range(10):
+            self.assertEqual(i, engine.convert(str(i)))
+        self.assertLessEqual(len(engine._cache), 2)
+
+    def test_cast_values(self):
+        config = ConfigDict(a=ConfigDict(PORT="8080", b=ConfigDict(DEBUG="false")), NAME="app", RATIO="0.5")
+        config.cast_values()
+        self.assertEqual({"a": {"PORT": 8080, "b": {"DEBUG": False}}, "NAME": "app", "RATIO": 0.5}, config)
+
+        config = ConfigDict(TIMEOUT="30s")
+        config.cast_values(TypeInferenceEngine(rules=[duration_rule]))
+        self.assertEqual(datetime.timedelta(seconds=30), config.TIMEOUT)
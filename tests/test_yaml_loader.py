@@ -1,8 +1,16 @@
 import os
+import pickle
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 
-from conflex.backends.yaml import YamlConfigLoader
+import yaml
+
+from conflex.backends.yaml import ConfigDictSafeLoader, LazyConfigDict, YamlConfigLoader, parse_yaml
+from conflex.config_dict import ConfigDict
 from conflex.config_store import ConfigStore
+from conflex.exc import ConfigLoaderException
 
 FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
 
@@ -24,3 +32,140 @@ class YamlConfigLoaderTest(unittest.TestCase):
         self.assertEqual("localhost", config_store.db.HOST)
         self.assertEqual("admin", config_store.db.USER)
         self.assertEqual("admin", config_store.db.PASSWORD)
+
+    def test_config_dict_nodes(self):
+        loader = YamlConfigLoader(config_file_path=os.path.join(FIXTURES_DIR, "config_fixture.yaml"))
+        config_dict = loader.load()
+        self.assertIsInstance(config_dict, ConfigDict)
+        self.assertIsInstance(config_dict.db, ConfigDict)
+
+    @unittest.skipUnless(yaml.__with_libyaml__, "PyYAML was built without libyaml")
+    def test_libyaml_parser(self):
+        self.assertTrue(issubclass(ConfigDictSafeLoader, yaml.CSafeLoader))
+
+    def test_invalid_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config_file_path = os.path.join(tmp_dir, "config.yaml")
+            for content in ("db: [", "- a\n- b\n"):
+                with open(config_file_path, "w") as f:
+                    f.write(content)
+                self.assertRaises(ConfigLoaderException, YamlConfigLoader(config_file_path).load)
+
+            self.assertRaises(ConfigLoaderException, YamlConfigLoader(os.path.join(tmp_dir, "missing.yaml")).load)
+
+    def test_multiple_documents(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config_file_path = os.path.join(tmp_dir, "config.yaml")
+            with open(config_file_path, "w") as f:
+                f.write("db:\n  HOST: localhost\n  PORT: 5432\n---\n---\ndb:\n  HOST: remote\nDEBUG: true\n")
+
+            config_dict = YamlConfigLoader(config_file_path).load()
+            self.assertEqual({"db": {"HOST": "remote", "PORT": 5432}, "DEBUG": True}, config_dict)
+
+
+class YamlParseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        self.config_file_path = os.path.join(self.tmp_dir.name, "config.yaml")
+        shutil.copy(os.path.join(FIXTURES_DIR, "config_fixture.yaml"), self.config_file_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cache_hit(self):
+        config_dict = YamlConfigLoader(self.config_file_path, cache_dir=self.cache_dir).load()
+
+        with mock.patch("conflex.backends.yaml.parse_yaml_documents", side_effect=AssertionError("file parsed again")):
+            cached_config_dict = YamlConfigLoader(self.config_file_path, cache_dir=self.cache_dir).load()
+
+        self.assertEqual(config_dict, cached_config_dict)
+        self.assertIsInstance(cached_config_dict.db, ConfigDict)
+        self.assertEqual("localhost", cached_config_dict.db.HOST)
+
+    def test_cache_invalidation(self):
+        loader = YamlConfigLoader(self.config_file_path, cache_dir=self.cache_dir)
+        self.assertEqual("localhost", loader.load().db.HOST)
+
+        with open(self.config_file_path, "a") as f:
+            f.write("\nextra:\n  KEY: value\n")
+
+        config_dict = loader.load()
+        self.assertEqual("value", config_dict.extra.KEY)
+        self.assertEqual("localhost", config_dict.db.HOST)
+
+    def test_corrupted_cache(self):
+        loader = YamlConfigLoader(self.config_file_path, cache_dir=self.cache_dir)
+        loader.load()
+        for file_name in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, file_name), "wb") as f:
+                f.write(b"garbage")
+
+        self.assertEqual("localhost", loader.load().db.HOST)
+
+
+class LazyYamlConfigLoaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config_file_path = os.path.join(self.tmp_dir.name, "config.yaml")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def load(self, content: str) -> ConfigDict:
+        with open(self.config_file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return YamlConfigLoader(self.config_file_path, lazy=True).load()
+
+    def test_sections_parsed_on_access(self):
+        content = "app:\n  NAME: café\nsecrets:\n  VAULT_NAME: vault # comment\ndb:\n  HOSTS: [a, b]\n"
+        with mock.patch("conflex.backends.yaml.parse_yaml", wraps=parse_yaml) as parse:
+            config_dict = self.load(content)
+            self.assertIsInstance(config_dict, LazyConfigDict)
+            self.assertEqual(0, parse.call_count)
+
+            self.assertEqual("vault", config_dict.secrets.VAULT_NAME)
+            self.assertEqual(1, parse.call_count)
+            self.assertIn("db", config_dict)
+            self.assertNotIn("cache", config_dict)
+            self.assertEqual(3, len(config_dict))
+            self.assertIsNone(config_dict.get("cache"))
+            with self.assertRaises(KeyError):
+                config_dict["cache"]
+            self.assertEqual(1, parse.call_count)
+
+            self.assertEqual("café", config_dict["app"].NAME)
+            self.assertEqual(["app", "secrets", "db"], list(config_dict))
+            self.assertEqual(3, parse.call_count)
+
+        self.assertEqual(YamlConfigLoader(self.config_file_path).load(), config_dict)
+        self.assertEqual(["a", "b"], pickle.loads(pickle.dumps(config_dict)).db.HOSTS)
+
+    def test_multiple_documents(self):
+        config_dict = self.load("db:\n  HOST: localhost\n  PORT: 5432\n---\ndb:\n  HOST: remote\nDEBUG: true\n...\n")
+        self.assertIsInstance(config_dict, LazyConfigDict)
+        self.assertEqual({"HOST": "remote", "PORT": 5432}, config_dict.db)
+        self.assertEqual({"db": {"HOST": "remote", "PORT": 5432}, "DEBUG": True}, config_dict)
+
+    def test_fallback_to_full_parsing(self):
+        for content in ("base: &base\n  PORT: 5432\ndb: *base\n", "{db: {PORT: 5432}}", "1: a\n"):
+            config_dict = self.load(content)
+            self.assertNotIsInstance(config_dict, LazyConfigDict)
+            self.assertEqual(YamlConfigLoader(self.config_file_path).load(), config_dict)
+
+        self.assertEqual({}, self.load("# Empty\n"))
+
+    def test_invalid_files(self):
+        for content in ("db: [", "- a\n- b\n", "db: 1\n---\n- a\n"):
+            self.assertRaises(ConfigLoaderException, self.load, content)
+
+    def test_config_store(self):
+        self.load("base:\n  HOST: localhost\nsecrets:\n  VAULT_NAME: vault\n")
+        config_store = ConfigStore()
+        config_store.add("base", YamlConfigLoader(self.config_file_path, lazy=True))
+        self.assertEqual("vault", config_store["base"].secrets.VAULT_NAME)
+        self.assertEqual("localhost", config_store.base.HOST)
+
+    def test_cache_dir(self):
+        with self.assertRaises(ValueError):
+            YamlConfigLoader(self.config_file_path, cache_dir=self.tmp_dir.name, lazy=True)
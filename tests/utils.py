@@ -0,0 +1,34 @@
+"""
+Helpers shared by the test modules.
+"""
+
+import os
+import time
+
+from conflex.config_dict import ConfigDict, merge_layers
+from conflex.config_loader import ConfigLoader
+
+
+class DictConfigLoader(ConfigLoader):
+    """
+    Loads a configuration from a dictionary and counts the number of calls to `load`.
+    """
+
+    def __init__(self, config: dict, delay: float = 0.0):
+        self.config = config
+        self.delay = delay
+        self.load_count = 0
+
+    def load(self) -> ConfigDict:
+        self.load_count += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return merge_layers((self.config,), dict_type=ConfigDict)
+
+
+def write_file(file_path: str, content: str) -> None:
+    with open(file_path, "w") as f:
+        f.write(content)
+    # Make sure that the modification is visible even on file systems with a coarse mtime resolution
+    st = os.stat(file_path)
+    os.utime(file_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))